@@ -0,0 +1,72 @@
+# benchmarks/bench_data.py
+"""
+Bars/sec of CSVDataHandler vs ColumnarDataHandler.
+Run from the repo root: python -m benchmarks.bench_data --symbols 50 --bars 5000
+"""
+import argparse
+import tempfile
+import time
+from collections import deque
+
+from core.data import CSVDataHandler, ColumnarDataHandler
+from benchmarks.synthetic import write_synthetic_csvs
+
+
+class _ListQueue:
+    """Minimal sink so the benchmark measures the handler, not the queue."""
+    def __init__(self):
+        self.events = deque()
+
+    def put(self, event):
+        self.events.append(event)
+
+
+def drain(handler_cls, symbol_to_csv):
+    q = _ListQueue()
+    t0 = time.perf_counter()
+    handler = handler_cls(event_queue=q, symbol_to_csv=symbol_to_csv)
+    t_load = time.perf_counter() - t0
+    n = 0
+    t0 = time.perf_counter()
+    while handler.has_data():
+        handler.update_bars()
+        n += len(q.events)
+        q.events.clear()
+    t_stream = time.perf_counter() - t0
+    return n, t_load, t_stream
+
+
+def check_parity(symbol_to_csv):
+    """Both handlers must emit identical MarketEvent sequences."""
+    a, b = _ListQueue(), _ListQueue()
+    ha = CSVDataHandler(event_queue=a, symbol_to_csv=symbol_to_csv)
+    hb = ColumnarDataHandler(event_queue=b, symbol_to_csv=symbol_to_csv)
+    while ha.has_data():
+        ha.update_bars()
+    while hb.has_data():
+        hb.update_bars()
+    assert not hb.has_data()
+    assert list(a.events) == list(b.events), "ColumnarDataHandler diverges from CSVDataHandler"
+    return len(a.events)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--symbols", type=int, default=50)
+    ap.add_argument("--bars", type=int, default=5000)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    n = check_parity({s: f"data/{s}_1min.csv" for s in ["AAPL", "MSFT"]})
+    print(f"parity OK on bundled AAPL/MSFT ({n} events)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_synthetic_csvs(tmp, args.symbols, args.bars, seed=args.seed)
+        for cls in (CSVDataHandler, ColumnarDataHandler):
+            n, t_load, t_stream = drain(cls, paths)
+            print(f"{cls.__name__:<22} bars={n:>9}  load={t_load:7.3f}s  stream={t_stream:7.3f}s  "
+                  f"{n / t_stream:>12,.0f} bars/sec")
+
+
+if __name__ == "__main__":
+    main()
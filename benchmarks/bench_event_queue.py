@@ -0,0 +1,67 @@
+# benchmarks/bench_event_queue.py
+"""
+Events/sec through EventQueue (queue.Queue), FastEventQueue (deque) and PriorityEventQueue (heap).
+Run from the repo root: python -m benchmarks.bench_event_queue --events 500000
+"""
+import argparse
+import datetime as dt
+import time
+
+from core.event_queue import EventQueue, FastEventQueue, PriorityEventQueue
+from core.events import MarketEvent, OrderEvent, FillEvent
+
+
+def make_events(n: int):
+    t0 = dt.datetime(2024, 1, 2, 14, 30, tzinfo=dt.timezone.utc)
+    out = []
+    for i in range(n):
+        ts = t0 + dt.timedelta(minutes=i // 4)
+        k = i % 4
+        if k < 2:
+            out.append(MarketEvent(ts, "AAPL" if k == 0 else "MSFT", 1.0, 1.0, 1.0, 1.0, 0.0))
+        elif k == 2:
+            out.append(OrderEvent(timestamp=ts, symbol="AAPL", order_type="MARKET", quantity=10, direction="BUY"))
+        else:
+            out.append(FillEvent(timestamp=ts, symbol="AAPL", quantity=10, direction="BUY", fill_price=1.0))
+    return out
+
+
+def bench(queue_cls, events, batch: int = 4):
+    """Interleaved put/drain like the backtest loop: put a batch, drain it, repeat."""
+    q = queue_cls()
+    t0 = time.perf_counter()
+    for i in range(0, len(events), batch):
+        for e in events[i:i + batch]:
+            q.put(e)
+        while not q.empty():
+            q.get()
+    return len(events) / (time.perf_counter() - t0)
+
+
+def check_order():
+    """PriorityEventQueue pops by timestamp, then type rank, then insertion order."""
+    events = make_events(8)
+    q = PriorityEventQueue()
+    for e in reversed(events):
+        q.put(e)
+    popped = [q.get() for _ in range(len(events))]
+    assert [type(e) for e in popped[:4]] == [MarketEvent, MarketEvent, OrderEvent, FillEvent]
+    assert [e.timestamp for e in popped] == sorted(e.timestamp for e in events)
+    assert popped[0].symbol == "MSFT"  # same (timestamp, rank): later put pops later, reversed here
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--events", type=int, default=500_000)
+    args = ap.parse_args()
+    check_order()
+    events = make_events(args.events)
+    base = None
+    for cls in (EventQueue, FastEventQueue, PriorityEventQueue):
+        rate = bench(cls, events)
+        base = base or rate
+        print(f"{cls.__name__:<20} {rate:>12,.0f} events/sec  ({rate / base:4.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
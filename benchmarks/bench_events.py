@@ -0,0 +1,78 @@
+# benchmarks/bench_events.py
+"""
+Allocation count and memory per million bars for:
+- the previous MarketEvent layout (regular dataclass + per-bar ohlcv dict),
+- slotted/frozen MarketEvent with fixed OHLCV fields,
+- MarketBatchEvent carrying all symbols of a timestamp as arrays.
+Run from the repo root: python -m benchmarks.bench_events --bars 200000 --symbols 100
+"""
+import argparse
+import datetime as dt
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Dict
+
+import numpy as np
+
+from core.events import MarketEvent, MarketBatchEvent
+
+
+@dataclass
+class LegacyMarketEvent:
+    """MarketEvent as it was before slots: instance __dict__ plus an ohlcv dict per bar."""
+    timestamp: dt.datetime
+    symbol: str
+    ohlcv: Dict[str, Any]
+
+
+def _measure(build):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    t0 = time.perf_counter()
+    kept = build()
+    elapsed = time.perf_counter() - t0
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    blocks = sum(s.count_diff for s in stats)
+    size = sum(s.size_diff for s in stats)
+    del kept
+    return blocks, size, elapsed
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--bars", type=int, default=200_000)
+    ap.add_argument("--symbols", type=int, default=100)
+    args = ap.parse_args()
+    n_ts = args.bars // args.symbols
+    n = n_ts * args.symbols
+    t0 = dt.datetime(2024, 1, 2, 14, 30, tzinfo=dt.timezone.utc)
+    times = [t0 + dt.timedelta(minutes=k) for k in range(n_ts)]
+    symbols = tuple(f"SYM{k:03d}" for k in range(args.symbols))
+    rng = np.random.default_rng(0)
+    block = rng.random((n_ts, 5, args.symbols))
+    rows = block.transpose(0, 2, 1).tolist()  # python floats per bar, built outside the measurement
+
+    def legacy():
+        return [LegacyMarketEvent(times[t], s, {"open": r[0], "high": r[1], "low": r[2], "close": r[3], "volume": r[4]})
+                for t in range(n_ts) for s, r in zip(symbols, rows[t])]
+
+    def slotted():
+        return [MarketEvent(times[t], s, r[0], r[1], r[2], r[3], r[4])
+                for t in range(n_ts) for s, r in zip(symbols, rows[t])]
+
+    def batched():
+        return [MarketBatchEvent(times[t], symbols, *block[t].copy()) for t in range(n_ts)]
+
+    scale = 1_000_000 / n
+    print(f"{n} bars ({n_ts} timestamps x {args.symbols} symbols), figures scaled to 1M bars")
+    for name, fn in (("legacy dataclass+dict", legacy), ("slotted MarketEvent", slotted), ("MarketBatchEvent", batched)):
+        blocks, size, elapsed = _measure(fn)
+        print(f"{name:<22} allocations={blocks * scale:>12,.0f}  memory={size * scale / 2**20:8.1f}MB  "
+              f"build={elapsed * scale:6.2f}s (under tracemalloc)")
+
+
+if __name__ == "__main__":
+    main()
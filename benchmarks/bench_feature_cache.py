@@ -0,0 +1,111 @@
+# benchmarks/bench_feature_cache.py
+"""
+FeatureCache: cold computation, warm reload, and a small append, each checked against computing
+from scratch (labels exactly, features to rounding), plus automatic invalidation when history
+changes and LRU eviction under a size cap.
+Run from the repo root: python -m benchmarks.bench_feature_cache --bars 50000
+"""
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+from core.feature_cache import FeatureCache
+from core.feature_engine import REGISTRY, RollingMoments, make_features_fast
+from core.labeling import get_triple_barrier_labels
+from benchmarks.run_benchmarks import synthetic_frame
+
+PT, SL, TMAX = 0.002, 0.002, 60
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+
+def assert_same(cache: FeatureCache, df: pd.DataFrame, symbol: str):
+    X = cache.features(df, symbol)
+    want_X = make_features_fast(df)
+    assert X.index.equals(want_X.index) and list(X.columns) == list(want_X.columns)
+    assert np.allclose(X.to_numpy(), want_X.to_numpy(), rtol=1e-9, atol=1e-12, equal_nan=True)
+    lab = cache.labels(df, symbol, PT, SL, TMAX)
+    pd.testing.assert_frame_equal(lab, get_triple_barrier_labels(df["close"], df.index, PT, SL, TMAX))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--bars", type=int, default=50_000)
+    ap.add_argument("--append", type=int, default=500, help="bars added by the simulated data refresh")
+    args = ap.parse_args()
+
+    full = synthetic_frame(args.bars + args.append, seed=7)
+    old, new = full.iloc[:args.bars], full
+
+    with tempfile.TemporaryDirectory() as root:
+        cache = FeatureCache(os.path.join(root, "cache"))
+        _, t_cold = timed(lambda: (cache.features(old, "SYN"), cache.labels(old, "SYN", PT, SL, TMAX)))
+        _, t_warm = timed(lambda: (cache.features(old, "SYN"), cache.labels(old, "SYN", PT, SL, TMAX)))
+        _, t_ext = timed(lambda: (cache.features(new, "SYN"), cache.labels(new, "SYN", PT, SL, TMAX)))
+        assert (cache.misses, cache.hits, cache.extends) == (2, 2, 2), cache.stats()
+        assert_same(cache, new, "SYN")
+        assert cache.hits == 4
+        print(f"{args.bars:,} bars  cold={t_cold:7.2f}s  warm={t_warm:6.3f}s  "
+              f"+{args.append} bars={t_ext:6.3f}s  (entries checked against a full recompute)")
+
+        # Rewritten history (e.g. a corrected bar) invalidates the entry instead of extending it
+        edited = new.copy()
+        edited.iloc[10, edited.columns.get_loc("close")] *= 1.01
+        misses = cache.misses
+        assert_same(cache, edited, "SYN")
+        assert cache.misses == misses + 2
+        print("edited history recomputed")
+
+        # Different label parameters are separate entries
+        cache.labels(new, "SYN", 0.004, 0.004, TMAX)
+        assert cache.stats()["entries"] == 3
+
+    with tempfile.TemporaryDirectory() as root:
+        small = synthetic_frame(5_000, seed=8)
+        cache = FeatureCache(os.path.join(root, "cache"))
+        cache.features(small, "A")
+        entry_bytes = cache.stats()["bytes"]
+        cache = FeatureCache(os.path.join(root, "cache"), max_bytes=int(2.5 * entry_bytes))
+        for sym in ("B", "A", "C"):  # A is used again after B, so B is the least recently used
+            time.sleep(0.01)
+            cache.features(small, sym)
+        names = sorted(n.split("__")[0] for n in os.listdir(os.path.join(root, "cache")))
+        assert names == ["A", "C"], names
+        print(f"LRU eviction OK: kept {names} under {cache.max_bytes:,} bytes")
+
+    with tempfile.TemporaryDirectory() as root:
+        # Registering a feature changes the default column set: cached frames without it must not be
+        # returned or extended
+        bars = synthetic_frame(2_500, seed=9)
+        cache = FeatureCache(os.path.join(root, "cache"))
+        cache.features(bars.iloc[:2_000], "A")
+        REGISTRY.register("hl_ratio", ("high", "low"), lambda h, l: h / l - 1.0)
+        X = cache.features(bars, "A")
+        assert cache.misses == 2 and cache.extends == 0, cache.stats()
+        assert X.columns[-1] == "hl_ratio" and X["hl_ratio"].notna().all()
+        assert cache.features(bars, "A").equals(X) and cache.hits == 1
+        print("registered feature invalidates cached entries")
+
+        # An extend recomputes as much history as the plan reaches back, declared or not
+        bars = synthetic_frame(3_000, seed=10)
+        REGISTRY.register("sma_400", ("close",), lambda c: RollingMoments(c).mean(400), lookback=399)
+        REGISTRY.register("sma_400_undeclared", ("close",), lambda c: RollingMoments(c).mean(400))
+        for col in ("sma_400", "sma_400_undeclared"):
+            cache.features(bars.iloc[:2_000], "B", columns=[col])
+            X = cache.features(bars, "B", columns=[col])
+            want = make_features_fast(bars, columns=[col])
+            assert X[col].iloc[399:].notna().all()
+            assert np.allclose(X.to_numpy(), want.to_numpy(), rtol=1e-9, atol=1e-12, equal_nan=True)
+        assert cache.extends == 2, cache.stats()
+        print("400-bar window extended without gaps (declared and undeclared lookback)")
+
+
+if __name__ == "__main__":
+    main()
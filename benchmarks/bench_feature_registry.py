@@ -0,0 +1,121 @@
+# benchmarks/bench_feature_registry.py
+"""
+Feature registry and planner: a column subset computes the same values as the full matrix, plans
+share intermediates (one rolling mean feeds zscore and sma_diff), a new feature is one registration,
+and a pruned column set is proportionally cheaper in batch (make_features_fast) and streaming
+(FeatureState) form.
+Run from the repo root: python -m benchmarks.bench_feature_registry --bars 1000000
+"""
+import argparse
+import time
+import numpy as np
+
+from core.feature_engine import FEATURE_COLUMNS, REGISTRY, FeatureRegistry, make_features_fast
+from core.online_features import FeatureState
+from benchmarks.run_benchmarks import synthetic_frame
+
+# A pruned model, e.g. the top 10 of shap_global_folds' ranking
+TOP_10 = ["ret_1", "rv_15", "range_mean_15", "zscore_15", "zscore_60", "mom_30", "vol_z_60",
+          "sma_diff_10_30", "rsi_14", "val_traded_20"]
+
+
+def check_subsets(df, n_trials: int = 20, seed: int = 0):
+    full = make_features_fast(df)
+    rng = np.random.default_rng(seed)
+    for _ in range(n_trials):
+        cols = list(rng.choice(FEATURE_COLUMNS, size=int(rng.integers(1, len(FEATURE_COLUMNS))), replace=False))
+        part = make_features_fast(df, columns=cols)
+        assert list(part.columns) == cols
+        assert np.array_equal(part.to_numpy(), full[cols].to_numpy(), equal_nan=True)
+    print(f"subset parity OK  ({n_trials} random column subsets, bitwise equal to the full matrix)")
+
+
+def check_plan():
+    nodes = REGISTRY.plan(["zscore_30", "sma_diff_10_30"]).nodes
+    assert nodes.count("px_mean_30") == 1 and nodes.count("px_moments") == 1
+    assert not any(n.startswith(("vol_", "hl_", "rv_", "rsi_")) for n in nodes)
+    print(f"plan for zscore_30 + sma_diff_10_30: {nodes}")
+    for bad in (["ret_1", "zscore_5", "ret_1"], ["px_moments"], ["px_mean_30"]):
+        try:
+            REGISTRY.plan(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"plan({bad}) should be rejected")
+
+
+def check_fingerprint():
+    # Constants, defaults and closure cells are part of a feature function's identity
+    def fingerprint(fn, lookback=0):
+        reg = FeatureRegistry()
+        reg.register("x", ("high", "low"), fn, lookback=lookback)
+        return reg.fingerprint()
+
+    def scaled(k):
+        return lambda h, l: h / l - k
+
+    base = fingerprint(lambda h, l: h / l - 1.0)
+    assert fingerprint(lambda h, l: h / l - 1.0) == base
+    for other in (fingerprint(lambda h, l: h / l - 2.0), fingerprint(lambda h, l, k=2.0: h / l - k),
+                  fingerprint(scaled(2.0)), fingerprint(lambda h, l: h / l - 1.0, lookback=1)):
+        assert other != base
+    assert fingerprint(scaled(1.0)) != fingerprint(scaled(2.0))
+    print("registry fingerprint tracks constants, defaults, closures and lookbacks")
+
+
+def check_registration(df):
+    # A new feature is one registration on top of existing intermediates
+    REGISTRY.register("range_z_15", ("high", "low", "hl_mean_15", "hl_std_15"),
+                      lambda h, l, m, s: ((h - l) - m) / (s + 1e-8))
+    X = make_features_fast(df, columns=["range_z_15", "range_mean_15"])
+    hl = (df["high"] - df["low"]).astype(float)
+    want = (hl - hl.rolling(15).mean()) / (hl.rolling(15).std() + 1e-8)
+    ok = want.notna().to_numpy()
+    assert np.array_equal(np.isnan(X["range_z_15"].to_numpy()), ~ok)
+    assert np.allclose(X["range_z_15"].to_numpy()[ok], want.to_numpy()[ok], rtol=1e-6, atol=1e-8)
+    print("registered range_z_15 matches pandas")
+
+
+def best_of(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def bench(n_bars: int, n_stream: int = 50_000):
+    df = synthetic_frame(n_bars, seed=3)
+    t_all = best_of(lambda: make_features_fast(df))
+    t_top = best_of(lambda: make_features_fast(df, columns=TOP_10))
+    t_one = best_of(lambda: make_features_fast(df, columns=["zscore_15"]))
+    print(f"batch  {n_bars:,} bars  all {len(FEATURE_COLUMNS)} columns={t_all:6.2f}s  top 10={t_top:6.2f}s  "
+          f"zscore_15 only={t_one:6.2f}s")
+
+    bars = list(zip(*(df[c].to_numpy()[:n_stream].tolist() for c in ("high", "low", "close", "volume"))))
+
+    def stream(columns):
+        st = FeatureState(columns)
+        for h, l, c, v in bars:
+            st.update(h, l, c, v)
+
+    s_all = best_of(lambda: stream(None), repeat=1) / n_stream
+    s_top = best_of(lambda: stream(TOP_10), repeat=1) / n_stream
+    s_one = best_of(lambda: stream(["zscore_15"]), repeat=1) / n_stream
+    print(f"stream per bar  all={1e6 * s_all:5.1f}us  top 10={1e6 * s_top:5.1f}us  zscore_15 only={1e6 * s_one:5.1f}us")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--bars", type=int, default=1_000_000)
+    args = ap.parse_args()
+    df = synthetic_frame(20_000, seed=1)
+    check_subsets(df)
+    check_plan()
+    check_fingerprint()
+    check_registration(df)
+    bench(args.bars)
+
+
+if __name__ == "__main__":
+    main()
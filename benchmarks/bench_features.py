@@ -0,0 +1,98 @@
+# benchmarks/bench_features.py
+"""
+make_features_fast against core.features.make_features: same columns and NaN pattern, values
+within tolerance (both also compared to an exact sliding-window z-score, where the pandas
+running sums are the less accurate of the two), float32 output, and timings on millions of bars.
+Run from the repo root: python -m benchmarks.bench_features --bars 1000000 5000000
+"""
+import argparse
+import time
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from core.bar_store import load_bars
+from core.feature_engine import FEATURE_COLUMNS, compute_features, make_features_fast
+from core.features import make_features
+from benchmarks.run_benchmarks import synthetic_frame
+
+
+def exact_zscore(px: np.ndarray, w: int) -> np.ndarray:
+    win = sliding_window_view(px, w)
+    z = np.full(len(px), np.nan)
+    z[w - 1:] = (px[w - 1:] - win.mean(axis=1)) / (win.std(axis=1, ddof=1) + 1e-8)
+    return z
+
+
+def check_parity(df, label: str, rtol: float = 1e-4):
+    want = make_features(df)
+    got = make_features_fast(df)
+    assert list(got.columns) == list(want.columns) == FEATURE_COLUMNS
+    assert got.index.equals(want.index)
+    worst = 0.0
+    for c in FEATURE_COLUMNS:
+        a, b = want[c].to_numpy(), got[c].to_numpy()
+        assert np.array_equal(np.isnan(a), np.isnan(b)), c
+        ok = ~np.isnan(a)
+        # Relative to the column's scale: z-scores of near-flat windows amplify pandas' own rounding
+        err = np.abs(a[ok] - b[ok]).max() / max(np.abs(a[ok]).max(), 1e-12) if ok.any() else 0.0
+        assert err < rtol, (c, err)
+        worst = max(worst, err)
+
+    px = df["close"].to_numpy(dtype=np.float64)
+    z = exact_zscore(px, 5)
+    ok = ~np.isnan(z)
+    err_pd = np.abs(want["zscore_5"].to_numpy()[ok] - z[ok]).max()
+    err_fast = np.abs(got["zscore_5"].to_numpy()[ok] - z[ok]).max()
+    assert err_fast <= err_pd + 1e-12
+    print(f"parity OK  {label:<22} max scaled err = {worst:.1e}  "
+          f"zscore_5 vs exact: make_features {err_pd:.1e}, fast {err_fast:.1e}")
+
+
+def check_float32(df):
+    ref = make_features_fast(df).to_numpy()
+    out = np.empty((len(df), len(FEATURE_COLUMNS)), dtype=np.float32, order="F")
+    res = compute_features(df["high"].to_numpy(), df["low"].to_numpy(), df["close"].to_numpy(),
+                           df["volume"].to_numpy(), out=out)
+    assert res is out
+    assert np.array_equal(np.isnan(ref), np.isnan(out))
+    assert np.allclose(out, ref.astype(np.float32), rtol=1e-6, atol=0, equal_nan=True)
+    print(f"float32 output OK  ({out.nbytes / 2 ** 20:.1f} MiB vs {ref.nbytes / 2 ** 20:.1f} MiB)")
+
+
+def bench(n_bars: int, include_reference: bool):
+    df = synthetic_frame(n_bars, seed=2)
+    t_ref = float("nan")
+    if include_reference:
+        t0 = time.perf_counter()
+        make_features(df)
+        t_ref = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    make_features_fast(df)
+    t64 = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    make_features_fast(df, dtype=np.float32)
+    t32 = time.perf_counter() - t0
+    print(f"{n_bars:>10,} bars  make_features={t_ref:7.2f}s  fast float64={t64:6.2f}s  float32={t32:6.2f}s  "
+          f"({n_bars / t64 / 1e6:.1f}M bars/s)")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--bars", type=int, nargs="+", default=[1_000_000, 5_000_000])
+    ap.add_argument("--reference-max", type=int, default=1_000_000,
+                    help="skip make_features above this many bars (it runs a Python callback per row)")
+    args = ap.parse_args()
+
+    check_parity(load_bars("AAPL"), "AAPL (bundled data)")
+    check_parity(synthetic_frame(300_000, seed=1), "synthetic 300k bars")
+    gaps = synthetic_frame(20_000, seed=4)
+    gaps.iloc[[100, 101, 5_000, 19_990], gaps.columns.get_loc("close")] = np.nan
+    gaps.iloc[[300, 7_000], gaps.columns.get_loc("volume")] = np.nan
+    check_parity(gaps, "synthetic with NaNs")
+    check_float32(synthetic_frame(100_000, seed=3))
+    for n in args.bars:
+        bench(n, include_reference=n <= args.reference_max)
+
+
+if __name__ == "__main__":
+    main()
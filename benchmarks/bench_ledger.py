@@ -0,0 +1,89 @@
+# benchmarks/bench_ledger.py
+"""
+TradeLedger: recording cost per fill, FIFO round-trip reconstruction, .npz round trip, and a
+consistency check against Portfolio (for every symbol that ends flat, FIFO gross PnL minus all
+commission equals Position.realized_pnl).
+Run from the repo root: python -m benchmarks.bench_ledger --fills 1000000
+"""
+import argparse
+import datetime as dt
+import os
+import tempfile
+import time
+import numpy as np
+
+from core.events import FillEvent
+from core.ledger import TradeLedger
+from core.portfolio import Portfolio
+from run_loop_ml import SYMBOLS, load_signal_inputs, run_event_backtest
+
+
+def make_fills(n: int, n_symbols: int = 50, seed: int = 0):
+    """Random fills, followed by one closing fill per symbol so every position ends flat."""
+    rng = np.random.default_rng(seed)
+    t0 = dt.datetime(2024, 1, 2, 14, 30, tzinfo=dt.timezone.utc)
+    times = [t0 + dt.timedelta(minutes=i) for i in range(n // 10 + 1)]
+    syms = [f"S{i:03d}" for i in range(n_symbols)]
+    sym = rng.integers(0, n_symbols, n).tolist()
+    qty = rng.integers(1, 100, n).tolist()
+    buy = (rng.random(n) < 0.5).tolist()
+    price = (100.0 * np.exp(rng.normal(0, 0.01, n))).tolist()
+    fills = [FillEvent(times[i // 10], syms[sym[i]], qty[i], "BUY" if buy[i] else "SELL", price[i],
+                       commission=price[i] * qty[i] * 1e-3, slippage=price[i] * qty[i] * 5e-4) for i in range(n)]
+    net = dict.fromkeys(syms, 0)
+    for f in fills:
+        net[f.symbol] += f.quantity if f.direction == "BUY" else -f.quantity
+    end = times[-1] + dt.timedelta(minutes=1)
+    fills.extend(FillEvent(end, s, abs(q), "SELL" if q > 0 else "BUY", 100.0) for s, q in net.items() if q)
+    return fills
+
+
+def check_against_portfolio(ledger: TradeLedger, portfolio: Portfolio):
+    trades = ledger.round_trips()
+    fills = ledger.fills()
+    flat = [s for s, p in portfolio.positions.items() if p.quantity == 0]
+    for s in flat:
+        fifo = trades.loc[trades["symbol"] == s, "gross_pnl"].sum() - fills.loc[fills["symbol"] == s, "commission"].sum()
+        assert np.isclose(fifo, portfolio.positions[s].realized_pnl, rtol=1e-9, atol=1e-6), s
+    return len(flat)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--fills", type=int, default=1_000_000)
+    args = ap.parse_args()
+
+    fills = make_fills(args.fills)
+    ledger, portfolio = TradeLedger(), Portfolio()
+    t0 = time.perf_counter()
+    for f in fills:
+        ledger.on_fill(f)
+    t_record = time.perf_counter() - t0
+    for f in fills:
+        portfolio.on_fill(f)
+    print(f"recorded {len(ledger):,} fills in {t_record:.2f}s ({1e9 * t_record / len(ledger):.0f} ns/fill)")
+
+    t0 = time.perf_counter()
+    trades = ledger.round_trips()
+    stats = ledger.stats(trades)
+    print(f"round trips: {len(trades):,} in {time.perf_counter() - t0:.2f}s, hit rate {stats['hit_rate']:.3f}, "
+          f"commission {stats['commission_bps']:.1f}bps, slippage {stats['slippage_bps']:.1f}bps")
+    print(f"consistent with Portfolio on {check_against_portfolio(ledger, portfolio)} flat symbols")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "fills.npz")
+        t0 = time.perf_counter()
+        ledger.save(path)
+        loaded = TradeLedger.load(path)
+        print(f"npz round trip {time.perf_counter() - t0:.2f}s, {os.path.getsize(path) / 1e6:.1f} MB")
+        assert loaded.fills().equals(ledger.fills())
+
+    pfeeds, _, _ = load_signal_inputs(SYMBOLS)
+    ledger = TradeLedger()
+    run_event_backtest(SYMBOLS, pfeeds, {s: 0.2 for s in SYMBOLS}, {s: 0.0 for s in SYMBOLS}, ledger=ledger)
+    print("bundled data, thr 0.2/0.0:", {k: v for k, v in ledger.stats().items()
+                                        if k in ("fills", "round_trips", "hit_rate", "avg_holding", "slippage_bps")})
+
+
+if __name__ == "__main__":
+    main()
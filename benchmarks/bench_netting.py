@@ -0,0 +1,94 @@
+# benchmarks/bench_netting.py
+"""
+NettingExecutionHandler vs SimulatedExecutionHandler with several noisy strategies sending
+opposing MARKET orders for the same symbols every bar: same final positions, fewer fills and
+less commission; allocations reproduce the parent fills' cash flow; and the standard event
+loop (one order per symbol per bar) is unchanged by netting.
+Run from the repo root: python -m benchmarks.bench_netting
+"""
+import tempfile
+import time
+import numpy as np
+
+from core.commission import FixedPercentageCommission
+from core.data import ColumnarDataHandler
+from core.dispatcher import EventDispatcher
+from core.event_queue import FastEventQueue
+from core.events import MarketEvent, OrderEvent, FillEvent
+from core.execution import NettingExecutionHandler, SimulatedExecutionHandler
+from core.ledger import TradeLedger
+from core.portfolio import Portfolio
+from core.slippage import FixedBasisPointsSlippage
+from run_loop_ml import SYMBOLS, load_signal_inputs, run_event_backtest
+from benchmarks.synthetic import write_synthetic_csvs
+
+
+class NoisyStrategies:
+    """n_strategies independent coin-flip traders, each sending one order per symbol with prob p."""
+    def __init__(self, n_strategies: int = 4, p: float = 0.5, seed: int = 0):
+        self.rng = np.random.default_rng(seed)
+        self.n = n_strategies
+        self.p = p
+
+    def on_market(self, evt: MarketEvent):
+        orders = []
+        for _ in range(self.n):
+            if self.rng.random() < self.p:
+                orders.append(OrderEvent(evt.timestamp, evt.symbol, "MARKET", int(self.rng.integers(1, 20)),
+                                         "BUY" if self.rng.random() < 0.5 else "SELL"))
+        return orders
+
+
+def run(exec_cls, paths, seed=0, **kwargs):
+    eq = FastEventQueue()
+    data = ColumnarDataHandler(eq, paths)
+    execution = exec_cls(eq, FixedPercentageCommission(0.001), FixedBasisPointsSlippage(5.0), **kwargs)
+    portfolio, ledger = Portfolio(), TradeLedger()
+    d = EventDispatcher(eq)
+    d.subscribe(MarketEvent, portfolio.on_market)
+    d.subscribe(MarketEvent, execution.on_market)
+    d.subscribe(MarketEvent, NoisyStrategies(seed=seed).on_market)
+    d.subscribe(OrderEvent, execution.on_order)
+    d.subscribe(FillEvent, portfolio.on_fill)
+    d.subscribe(FillEvent, ledger.on_fill)
+    if hasattr(execution, "flush"):
+        d.add_step_hook(execution.flush)
+    t0 = time.perf_counter()
+    d.run(data)
+    return portfolio, ledger, execution, d.events_dispatched, time.perf_counter() - t0
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_synthetic_csvs(tmp, n_symbols=20, n_bars=2_000, seed=5)
+        ref, ref_ledger, _, ref_events, t_ref = run(SimulatedExecutionHandler, paths)
+        net, net_ledger, netting, net_events, t_net = run(NettingExecutionHandler, paths, keep_allocations=True)
+
+    assert {s: p.quantity for s, p in ref.positions.items()} == {s: p.quantity for s, p in net.positions.items()}
+    # Allocations: every order filled in full, and their cash flows sum to the parent fills'
+    alloc_qty = sum(a.quantity for a in netting.allocations)
+    assert alloc_qty == sum(o.quantity for o in (a.order for a in netting.allocations))
+    alloc_cash = sum((a.quantity * a.price if a.order.direction == "BUY" else -a.quantity * a.price) + a.commission
+                     for a in netting.allocations)
+    fills = net_ledger.fills()
+    fill_cash = float((np.where(fills["direction"] == "BUY", 1, -1) * fills["quantity"] * fills["fill_price"]).sum()
+                      + fills["commission"].sum())
+    assert np.isclose(alloc_cash, fill_cash, rtol=1e-10), (alloc_cash, fill_cash)
+
+    r, n = ref_ledger.stats(), net_ledger.stats()
+    print(f"orders={netting.orders_received:,}")
+    print(f"  per-order fills: fills={r['fills']:>7,}  events={ref_events:>8,}  commission={r['commission']:>10,.2f}  "
+          f"slippage={r['slippage']:>9,.2f}  {t_ref:.2f}s")
+    print(f"  netted fills:    fills={n['fills']:>7,}  events={net_events:>8,}  commission={n['commission']:>10,.2f}  "
+          f"slippage={n['slippage']:>9,.2f}  {t_net:.2f}s")
+
+    pfeeds, _, _ = load_signal_inputs(SYMBOLS)
+    tu, td = {s: 0.2 for s in SYMBOLS}, {s: 0.0 for s in SYMBOLS}
+    a, _ = run_event_backtest(SYMBOLS, pfeeds, tu, td)
+    b, _ = run_event_backtest(SYMBOLS, pfeeds, tu, td, net_orders=True)
+    assert a.equals(b), "netting changed a run with one order per symbol and bar"
+    print("parity OK  run_loop_ml with net_orders=True")
+
+
+if __name__ == "__main__":
+    main()
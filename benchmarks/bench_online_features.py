@@ -0,0 +1,113 @@
+# benchmarks/bench_online_features.py
+"""
+OnlineFeatures against the batch functions: streaming every bar through FeatureState must reproduce
+make_features (within the tolerance of pandas' own running sums) and make_features_fast (tightly),
+NaN warm-up and gaps included. Then the per-bar cost against recomputing the batch features on the
+history so far.
+Run from the repo root: python -m benchmarks.bench_online_features
+"""
+import time
+import numpy as np
+
+from core.bar_store import load_bars
+from core.dispatcher import EventDispatcher
+from core.event_queue import PriorityEventQueue
+from core.events import MarketBatchEvent, MarketEvent
+from core.feature_engine import FEATURE_COLUMNS, make_features_fast
+from core.features import make_features
+from core.online_features import FeatureState, OnlineFeatures
+from benchmarks.run_benchmarks import synthetic_frame
+
+
+def stream(df) -> np.ndarray:
+    st = FeatureState()
+    cols = (df[c].to_numpy(dtype=np.float64).tolist() for c in ("high", "low", "close", "volume"))
+    return np.array([st.update(h, l, c, v) for h, l, c, v in zip(*cols)])
+
+
+def max_scaled_err(want: np.ndarray, got: np.ndarray) -> float:
+    worst = 0.0
+    for j, c in enumerate(FEATURE_COLUMNS):
+        a, b = want[:, j], got[:, j]
+        assert np.array_equal(np.isnan(a), np.isnan(b)), (c, np.flatnonzero(np.isnan(a) != np.isnan(b))[:5])
+        ok = ~np.isnan(a)
+        if ok.any():
+            worst = max(worst, np.abs(a[ok] - b[ok]).max() / max(np.abs(a[ok]).max(), 1e-12))
+    return worst
+
+
+def check_parity(df, label: str):
+    got = stream(df)
+    err_fast = max_scaled_err(make_features_fast(df).to_numpy(), got)
+    err_pd = max_scaled_err(make_features(df).to_numpy(), got)
+    # make_features carries pandas' rolling rounding (~1e-5 on near-flat z-scores), the NumPy engine does not
+    assert err_fast < 1e-6, err_fast
+    assert err_pd < 1e-4, err_pd
+    print(f"parity OK  {label:<22} max scaled err vs make_features_fast {err_fast:.1e}, vs make_features {err_pd:.1e}")
+
+
+def check_batches(df, n_symbols: int = 4):
+    """update_batch over several symbols gives each symbol its own single-symbol stream."""
+    frames = [synthetic_frame(len(df), seed=10 + k) for k in range(n_symbols)]
+    symbols = tuple(f"S{k}" for k in range(n_symbols))
+    online = OnlineFeatures(symbols)
+    out = []
+    for t in range(len(df)):
+        cols = [np.array([f[c].iat[t] for f in frames]) for c in ("open", "high", "low", "close", "volume")]
+        out.append(online.update_batch(MarketBatchEvent(df.index[t], symbols, *cols))[1])
+    out = np.stack(out)
+    for k, f in enumerate(frames):
+        assert np.array_equal(out[:, k, :], stream(f), equal_nan=True)
+    print(f"batch OK   {n_symbols} symbols x {len(df)} bars")
+
+    # As dispatcher handlers they queue nothing and leave the latest results on the object
+    queue = PriorityEventQueue()
+    dispatcher = EventDispatcher(queue)
+    online = OnlineFeatures(symbols)
+    dispatcher.subscribe(MarketEvent, online.on_market)
+    dispatcher.subscribe(MarketBatchEvent, online.on_market_batch)
+    f = frames[0]
+    for t in range(len(df)):
+        dispatcher.dispatch(MarketEvent(df.index[t], "S0", *(f[c].iat[t] for c in ("open", "high", "low", "close", "volume"))))
+        assert queue.empty()
+    assert np.array_equal(online.last_rows["S0"], stream(f)[-1], equal_nan=True)
+    dispatcher.dispatch(MarketBatchEvent(df.index[-1], symbols, *cols))
+    assert queue.empty() and online.last_batch[1].shape == (n_symbols, len(FEATURE_COLUMNS))
+
+
+def bench(n_bars: int, history: int):
+    df = synthetic_frame(n_bars, seed=6)
+    t0 = time.perf_counter()
+    stream(df)
+    per_bar = (time.perf_counter() - t0) / n_bars
+
+    # The alternative without state: recompute the batch features on the trailing history each bar
+    tail = df.iloc[:history]
+    reps = 20
+    t0 = time.perf_counter()
+    for _ in range(reps):
+        make_features_fast(tail)
+    recompute = (time.perf_counter() - t0) / reps
+    print(f"online update {1e6 * per_bar:6.1f}us/bar  vs make_features_fast on {history:,} bars of history "
+          f"{1e6 * recompute:9.1f}us/bar ({recompute / per_bar:,.0f}x)")
+
+
+def main():
+    check_parity(load_bars("AAPL"), "AAPL (bundled data)")
+    check_parity(synthetic_frame(100_000, seed=1), "synthetic 100k bars")
+    gaps = synthetic_frame(20_000, seed=4)
+    gaps.iloc[[0, 100, 101, 5_000, 19_990], gaps.columns.get_loc("close")] = np.nan
+    gaps.iloc[[300, 7_000], gaps.columns.get_loc("volume")] = np.nan
+    gaps.iloc[[9_000], gaps.columns.get_loc("high")] = np.nan
+    check_parity(gaps, "synthetic with NaNs")
+    flat = synthetic_frame(5_000, seed=5)
+    flat.iloc[1_000:1_200, [flat.columns.get_loc(c) for c in ("high", "low", "close")]] = 50.0
+    flat.iloc[2_000:2_300, flat.columns.get_loc("volume")] = 0.0
+    check_parity(flat, "flat stretches")
+    check_batches(synthetic_frame(2_000, seed=0))
+    for history in (10_000, 100_000):
+        bench(200_000, history)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# benchmarks/bench_orders.py
+"""
+Resting LIMIT/STOP orders in SimulatedExecutionHandler: fills match a brute-force scan of every
+resting order on every bar, and per-bar matching cost stays flat as the ladder grows.
+Run from the repo root: python -m benchmarks.bench_orders
+"""
+import dataclasses
+import datetime as dt
+import time
+import numpy as np
+
+from core.commission import FixedPercentageCommission
+from core.events import MarketEvent, OrderEvent
+from core.execution import SimulatedExecutionHandler
+from core.slippage import FixedBasisPointsSlippage
+from benchmarks.bench_data import _ListQueue
+from benchmarks.synthetic import gbm_arrays, synthetic_index
+
+
+def make_handler():
+    return SimulatedExecutionHandler(_ListQueue(), FixedPercentageCommission(0.001), FixedBasisPointsSlippage(5.0))
+
+
+def make_orders(n: int, ts, price: float, seed: int = 0, spread: float = 0.05, gap: float = 0.0, expiry_bars: int = 0):
+    """Random limits and stops on the untriggered side of `price`, between gap and gap + spread away."""
+    rng = np.random.default_rng(seed)
+    orders = []
+    for k in range(n):
+        buy = bool(rng.random() < 0.5)
+        limit = bool(rng.random() < 0.5)
+        # Buy limits / sell stops below the price, sell limits / buy stops above it
+        below = buy == limit
+        level = price * (1.0 - gap - rng.random() * spread if below else 1.0 + gap + rng.random() * spread)
+        expiry = None
+        if expiry_bars and rng.random() < 0.3:
+            expiry = ts + dt.timedelta(minutes=int(rng.integers(1, expiry_bars)))
+        orders.append(OrderEvent(ts, "AAA", "LIMIT" if limit else "STOP", int(rng.integers(1, 100)),
+                                 "BUY" if buy else "SELL", limit_price=level if limit else None,
+                                 stop_price=None if limit else level, expiry=expiry, order_id=k + 1))
+    return orders
+
+
+def reference_fills(orders, bars):
+    """O(resting) per bar: scan every live order in submission order."""
+    live = list(orders)
+    fills = []
+    for ts, o, h, l in bars:
+        live = [x for x in live if x.expiry is None or x.expiry >= ts]
+        keep = []
+        for x in live:
+            px = x.limit_price if x.order_type == "LIMIT" else x.stop_price
+            if x.order_type == "LIMIT":
+                hit = l <= px if x.direction == "BUY" else h >= px
+                fill = min(o, px) if x.direction == "BUY" else max(o, px)
+            else:
+                hit = h >= px if x.direction == "BUY" else l <= px
+                fill = max(o, px) if x.direction == "BUY" else min(o, px)
+            if hit:
+                if x.order_type == "STOP":
+                    fill *= 1.0 + 5e-4 if x.direction == "BUY" else 1.0 - 5e-4
+                fills.append((ts, x.direction, x.quantity, fill))
+            else:
+                keep.append(x)
+        live = keep
+    return fills
+
+
+def run(handler, orders, bars):
+    for x in orders:
+        handler.on_order(x)
+    t0 = time.perf_counter()
+    for ts, o, h, l in bars:
+        handler.on_market(MarketEvent(ts, "AAA", o, h, l, o, 0.0))
+    return time.perf_counter() - t0
+
+
+def main():
+    n_bars = 2_000
+    index = synthetic_index(n_bars + 1).to_pydatetime()
+    o, h, l, _, _ = gbm_arrays(n_bars + 1, seed=1, sigma_per_bar=0.002)
+    bars = list(zip(index[1:], o[1:].tolist(), h[1:].tolist(), l[1:].tolist()))
+
+    orders = make_orders(5_000, index[0], float(o[0]), expiry_bars=n_bars)
+    handler = make_handler()
+    run(handler, orders, bars)
+    got = sorted((f.timestamp, f.direction, f.quantity, f.fill_price) for f in handler.event_queue.events)
+    want = sorted(reference_fills(orders, bars))
+    assert len(got) == len(want), f"{len(got)} fills != {len(want)}"
+    for a, b in zip(got, want):
+        assert a[:3] == b[:3] and np.isclose(a[3], b[3], rtol=1e-12), (a, b)
+    print(f"parity OK  {len(orders)} orders, {len(got)} fills, {handler.expired_count} expired, "
+          f"{len(handler.open_orders())} still resting")
+
+    # Ids the handler assigns never collide with the caller's; a duplicate caller id is rejected
+    handler = make_handler()
+    auto = [dataclasses.replace(x, order_id=None) for x in make_orders(3, index[0], float(o[0]), gap=0.5)]
+    handler.on_order(auto[0])
+    first = handler.last_order_id
+    handler.on_order(dataclasses.replace(auto[1], order_id=first - 1))  # the next id the handler would pick
+    handler.on_order(auto[2])
+    assert len(handler.open_orders()) == 3 and handler.last_order_id not in (first, first - 1)
+    try:
+        handler.on_order(dataclasses.replace(auto[1], order_id=first - 1))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("duplicate order_id accepted")
+    assert handler.cancel(first) and len(handler.open_orders()) == 2
+
+    # Ladder far from the price: nothing triggers, so per-bar cost should not depend on its size
+    for n in (0, 1_000, 10_000, 100_000):
+        handler = make_handler()
+        ladder = make_orders(n, index[0], float(o[0]), gap=0.5, spread=0.4)
+        elapsed = run(handler, ladder, bars)
+        print(f"resting={n:>7,}  {1e6 * elapsed / n_bars:6.2f} us/bar  fills={len(handler.event_queue.events)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# benchmarks/bench_portfolio.py
+"""
+ArrayPortfolio vs Portfolio: identical equity curves and positions on a synthetic universe with
+random fills, per-symbol and batched marks, plus the event loop on the bundled data.
+Run from the repo root: python -m benchmarks.bench_portfolio --symbols 500 --bars 500
+"""
+import argparse
+import time
+import numpy as np
+import pandas as pd
+
+from core.events import FillEvent, MarketBatchEvent
+from core.portfolio import ArrayPortfolio, Portfolio
+from run_loop_ml import SYMBOLS, load_signal_inputs, run_event_backtest
+from benchmarks.synthetic import gbm_arrays, synthetic_index, synthetic_symbols
+
+
+def make_stream(n_symbols: int, n_bars: int, fill_prob: float = 0.02, seed: int = 0):
+    """One MarketBatchEvent per bar followed by that bar's random fills."""
+    rng = np.random.default_rng(seed)
+    symbols = tuple(synthetic_symbols(n_symbols))
+    index = synthetic_index(n_bars)
+    o, h, l, c, v = (np.column_stack(cols) for cols in zip(*(gbm_arrays(n_bars, seed=seed + k) for k in range(n_symbols))))
+    stream = []
+    for t, ts in enumerate(index.to_pydatetime()):
+        stream.append(MarketBatchEvent(ts, symbols, o[t], h[t], l[t], c[t], v[t]))
+        for j in np.flatnonzero(rng.random(n_symbols) < fill_prob):
+            stream.append(FillEvent(ts, symbols[j], int(rng.integers(1, 50)), "BUY" if rng.random() < 0.5 else "SELL",
+                                    float(o[t, j]), commission=float(o[t, j]) * 1e-3))
+    return symbols, stream
+
+
+def replay(portfolio, stream, batch: bool):
+    t0 = time.perf_counter()
+    for evt in stream:
+        if isinstance(evt, FillEvent):
+            portfolio.on_fill(evt)
+        elif batch:
+            portfolio.on_market_batch(evt)
+        else:
+            for me in evt.events():
+                portfolio.on_market(me)
+    return time.perf_counter() - t0
+
+
+def assert_same(ref: Portfolio, arr: ArrayPortfolio):
+    a, b = pd.DataFrame(ref.equity_curve), arr.equity_curve
+    assert len(a) == len(b), f"equity rows {len(a)} != {len(b)}"
+    assert (pd.to_datetime(a["timestamp"]) == b["timestamp"]).all()
+    for col in ("cash", "holdings", "equity"):
+        np.testing.assert_allclose(b[col].to_numpy(), a[col].to_numpy(), rtol=1e-10, atol=1e-6, err_msg=col)
+    assert arr.fill_count == ref.fill_count
+    ref_pos, arr_pos = ref.positions, arr.positions
+    assert ref_pos.keys() == arr_pos.keys()
+    for s, p in ref_pos.items():
+        assert (p.quantity, p.avg_price, p.realized_pnl) == (arr_pos[s].quantity, arr_pos[s].avg_price,
+                                                             arr_pos[s].realized_pnl), s
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--symbols", type=int, default=500)
+    ap.add_argument("--bars", type=int, default=500)
+    args = ap.parse_args()
+
+    symbols, stream = make_stream(args.symbols, args.bars)
+    n_marks = args.symbols * args.bars
+    for batch in (False, True):
+        ref, arr = Portfolio(), ArrayPortfolio(symbols=list(symbols))
+        t_ref = replay(ref, stream, batch)
+        t_arr = replay(arr, stream, batch)
+        assert_same(ref, arr)
+        mode = "batch" if batch else "per-symbol"
+        print(f"parity OK  {mode:<10} {args.symbols} symbols x {args.bars} bars  "
+              f"Portfolio={n_marks / t_ref:>12,.0f} marks/s  ArrayPortfolio={n_marks / t_arr:>12,.0f} marks/s  "
+              f"({t_ref / t_arr:.1f}x)")
+
+    pfeeds, _, _ = load_signal_inputs(SYMBOLS)
+    lo = {s: 0.2 for s in SYMBOLS}, {s: 0.0 for s in SYMBOLS}
+    ref_df, ref_fills = run_event_backtest(SYMBOLS, pfeeds, *lo)
+    arr_df, arr_fills = run_event_backtest(SYMBOLS, pfeeds, *lo, array_portfolio=True)
+    assert ref_fills == arr_fills and len(ref_df) == len(arr_df)
+    for col in ("cash", "holdings", "equity"):
+        np.testing.assert_allclose(arr_df[col].to_numpy(), ref_df[col].to_numpy(), rtol=1e-10, atol=1e-6, err_msg=col)
+    print(f"parity OK  run_loop_ml on bundled data, fills={arr_fills}")
+
+
+if __name__ == "__main__":
+    main()
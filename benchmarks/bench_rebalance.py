@@ -0,0 +1,101 @@
+# benchmarks/bench_rebalance.py
+"""
+HRP rebalancing from an incrementally updated covariance against re-estimating it from the whole
+window at every rebalance: identical weights (window mode exactly, EWM mode against pandas ewm),
+the event-driven HRPRebalancer agreeing with the batch hrp_weight_history, and per-bar cost.
+Run from the repo root: python -m benchmarks.bench_rebalance
+"""
+import time
+import numpy as np
+import pandas as pd
+
+from core.events import MarketBatchEvent
+from core.hrp_sizer import FastHRPSizer
+from core.rebalance import OnlineCovariance, HRPRebalancer, hrp_weight_history
+from benchmarks.synthetic import synthetic_index, synthetic_returns
+
+
+def check_covariance(n_symbols: int = 50, n_obs: int = 3_000, window: int = 500, halflife: float = 100.0):
+    x = synthetic_returns(n_symbols, n_obs, seed=3).to_numpy()
+    win = OnlineCovariance(n_symbols, window=window)
+    ewm = OnlineCovariance(n_symbols, halflife=halflife)
+    for row in x:
+        win.update(row)
+        ewm.update(row)
+    err_win = np.abs(win.cov() - np.cov(x[-window:], rowvar=False)).max()
+    ref = pd.DataFrame(x).ewm(halflife=halflife, adjust=False).cov(bias=True).iloc[-n_symbols:].to_numpy()
+    err_ewm = np.abs(ewm.cov() - ref).max()
+    assert err_win < 1e-15 and err_ewm < 1e-15, (err_win, err_ewm)
+    return err_win, err_ewm
+
+
+def replay(rets: pd.DataFrame, **kwargs) -> pd.DataFrame:
+    """Feeds prices rebuilt from `rets` bar by bar through HRPRebalancer."""
+    prices = np.vstack([np.full(rets.shape[1], 100.0), 100.0 * np.cumprod(1.0 + rets.to_numpy(), axis=0)])
+    symbols = tuple(rets.columns)
+    reb = HRPRebalancer(symbols, **kwargs)
+    for ts, p in zip(synthetic_index(len(prices)), prices):
+        reb.on_market_batch(MarketBatchEvent(ts, symbols, p, p, p, p, np.ones(len(p))))
+    return pd.DataFrame(list(reb.weight_history.values()), index=list(reb.weight_history), columns=list(symbols))
+
+
+def check_engines(n_symbols: int = 40, n_obs: int = 4_000):
+    rets = synthetic_returns(n_symbols, n_obs, seed=4)
+    rets.index = synthetic_index(n_obs + 1)[1:]
+    for mode in ({"window": 600, "halflife": None}, {"halflife": 200.0}):
+        online = replay(rets, rebalance_every=250, min_obs=600, **mode)
+        batch = hrp_weight_history(rets, rebalance_every=250, min_obs=600, n_workers=2, **mode)
+        assert online.index.equals(batch.index), (online.index, batch.index)
+        # Prices are rebuilt from the returns, so the online returns differ in the last bits
+        err = np.abs(online.to_numpy() - batch.to_numpy()).max()
+        assert err < 1e-9, err
+        print(f"HRPRebalancer == hrp_weight_history  {mode}  {len(batch)} rebalances  max |dw| = {err:.1e}")
+
+    # Window mode restarts each block `window` rows back, which must not change anything
+    one = hrp_weight_history(rets, rebalance_every=250, window=600, min_obs=600, n_workers=1)
+    many = hrp_weight_history(rets, rebalance_every=250, window=600, min_obs=600, n_workers=4)
+    assert np.abs(one.to_numpy() - many.to_numpy()).max() < 1e-12
+    # EWM with a 20-halflife burn-in: truncated weight < 2**-20
+    full = hrp_weight_history(rets, rebalance_every=250, halflife=50.0, min_obs=600, n_workers=4)
+    cut = hrp_weight_history(rets, rebalance_every=250, halflife=50.0, min_obs=600, n_workers=4, burn_in=1_000)
+    print(f"EWM burn-in 20 halflives: max |dw| vs full replay = {np.abs(full.to_numpy() - cut.to_numpy()).max():.1e}")
+
+
+def bench(n_symbols: int, n_obs: int, window: int, rebalance_every: int):
+    rets = synthetic_returns(n_symbols, n_obs, seed=5)
+    x = rets.to_numpy()
+    symbols = tuple(rets.columns)
+
+    t0 = time.perf_counter()
+    sizer = FastHRPSizer()
+    full = []
+    for t in range(window - 1, n_obs, rebalance_every):
+        full.append(sizer.get_target_weights({s: 1 for s in symbols}, rets.iloc[t - window + 1:t + 1]))
+    t_full = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    cov = OnlineCovariance(n_symbols, window=window)
+    sizer = FastHRPSizer()
+    online = []
+    for t in range(n_obs):
+        cov.update(x[t])
+        if t >= window - 1 and (t - window + 1) % rebalance_every == 0:
+            online.append(sizer.weights_from_cov(cov.cov(), symbols))
+    t_online = time.perf_counter() - t0
+
+    err = max(np.abs(np.array(list(a.values())) - b).max() for a, b in zip(full, online))
+    assert err < 1e-9, err
+    print(f"{n_symbols:>4} symbols, {n_obs} bars, window {window}, rebalance every {rebalance_every:>3}: "
+          f"full-window={t_full:6.2f}s  online={t_online:6.2f}s  ({t_full / t_online:4.1f}x, max |dw| {err:.1e})")
+
+
+def main():
+    err_win, err_ewm = check_covariance()
+    print(f"OnlineCovariance  window max err = {err_win:.1e}  EWM vs pandas max err = {err_ewm:.1e}")
+    check_engines()
+    for n, every in ((100, 60), (100, 15), (300, 60)):
+        bench(n, 5_000, 1_000, every)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# benchmarks/bench_streaming.py
+"""
+Peak RSS and throughput of StreamingCSVDataHandler across chunk sizes, against the
+load-everything ColumnarDataHandler. Each configuration runs in a fresh process so that
+peak RSS is not polluted by earlier runs.
+Run from the repo root: python -m benchmarks.bench_streaming --symbols 20 --bars 50000
+"""
+import argparse
+import multiprocessing as mp
+import tempfile
+import time
+
+from core.data import ColumnarDataHandler, StreamingCSVDataHandler, peak_rss_bytes
+from benchmarks.bench_data import _ListQueue
+from benchmarks.synthetic import write_synthetic_csvs
+
+
+def _run(kind, paths, chunk_rows, out):
+    q = _ListQueue()
+    baseline = peak_rss_bytes()
+    t0 = time.perf_counter()
+    if kind == "streaming":
+        handler = StreamingCSVDataHandler(q, paths, chunk_rows=chunk_rows)
+    else:
+        handler = ColumnarDataHandler(q, paths)
+    n = 0
+    while handler.has_data():
+        handler.update_bars()
+        n += len(q.events)
+        q.events.clear()
+    elapsed = time.perf_counter() - t0
+    row = {"bars": n, "elapsed_sec": elapsed, "bars_per_sec": n / elapsed,
+           "peak_rss_mb": peak_rss_bytes() / 2**20, "baseline_rss_mb": baseline / 2**20}
+    if kind == "streaming":
+        row["peak_buffer_mb"] = handler.stats()["peak_buffer_mb"]
+    out.put(row)
+
+
+def measure(kind, paths, chunk_rows=0):
+    ctx = mp.get_context("spawn")
+    out = ctx.Queue()
+    p = ctx.Process(target=_run, args=(kind, paths, chunk_rows, out))
+    p.start()
+    row = out.get()
+    p.join()
+    return row
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--symbols", type=int, default=20)
+    ap.add_argument("--bars", type=int, default=50_000)
+    ap.add_argument("--chunks", type=int, nargs="+", default=[256, 4096, 65536])
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_synthetic_csvs(tmp, args.symbols, args.bars)
+        runs = [("columnar", 0)] + [("streaming", c) for c in args.chunks]
+        for kind, chunk in runs:
+            r = measure(kind, paths, chunk)
+            label = kind if kind == "columnar" else f"streaming[{chunk}]"
+            buf = f"  buffer={r['peak_buffer_mb']:7.2f}MB" if "peak_buffer_mb" in r else ""
+            print(f"{label:<18} bars={r['bars']:>9}  {r['bars_per_sec']:>10,.0f} bars/sec  "
+                  f"peak_rss={r['peak_rss_mb']:8.1f}MB (startup {r['baseline_rss_mb']:.1f}MB){buf}")
+
+
+if __name__ == "__main__":
+    main()
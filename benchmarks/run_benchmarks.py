@@ -0,0 +1,229 @@
+# benchmarks/run_benchmarks.py
+"""
+Benchmark suite over seeded synthetic data. Times the data handlers, feature/label/CV/training
+steps, HRP sizing and the full event-driven loop, and writes one JSON file per run so results
+can be compared across commits.
+
+Run from the repo root:
+    python -m benchmarks.run_benchmarks --preset small
+    python -m benchmarks.run_benchmarks --preset medium --compare benchmarks/results/<older>.json
+"""
+import argparse
+import datetime as dt
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+from core.data import CSVDataHandler, ColumnarDataHandler
+from core.features import make_features
+from core.feature_engine import make_features_fast
+from core.labeling import get_triple_barrier_labels, get_triple_barrier_labels_fast
+from core.model_selection import CombinatorialPurgedCV
+from core.models import train_random_forest_cpcv
+from core.hrp_sizer import HRPSizer, FastHRPSizer
+from run_loop_ml import run_event_backtest
+from benchmarks.bench_data import _ListQueue
+from benchmarks.synthetic import (
+    generate_bars, synthetic_probas, synthetic_returns, synthetic_symbols,
+    write_synthetic_csvs, write_synthetic_store,
+)
+
+PRESETS: Dict[str, Dict[str, int]] = {
+    "small": dict(handler_symbols=10, handler_bars=5_000, feature_bars=100_000, label_bars=5_000,
+                  train_bars=3_000, hrp_symbols=50, hrp_obs=500, loop_symbols=10, loop_bars=5_000),
+    "medium": dict(handler_symbols=50, handler_bars=20_000, feature_bars=1_000_000, label_bars=50_000,
+                   train_bars=20_000, hrp_symbols=200, hrp_obs=1_000, loop_symbols=100, loop_bars=20_000),
+    "large": dict(handler_symbols=200, handler_bars=50_000, feature_bars=5_000_000, label_bars=1_000_000,
+                  train_bars=100_000, hrp_symbols=1_000, hrp_obs=2_000, loop_symbols=500, loop_bars=20_000),
+}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return "unknown"
+
+
+def timed(fn: Callable[[], int], repeat: int) -> Dict[str, float]:
+    """Best-of-`repeat` wall time; fn returns the number of items it processed."""
+    best, items = float("inf"), 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        items = fn()
+        best = min(best, time.perf_counter() - t0)
+    return {"seconds": best, "items": items, "items_per_sec": items / best if best > 0 else float("nan")}
+
+
+def synthetic_frame(n_bars: int, seed: int = 0) -> pd.DataFrame:
+    return generate_bars(n_bars, seed=seed).set_index("datetime")
+
+
+def build_cases(p: Dict[str, int], tmp: str, seed: int) -> Dict[str, Callable[[], Callable[[], int]]]:
+    """
+    Benchmark name -> setup function. Each setup generates its inputs (untimed) and returns the
+    callable to time, so --only skips the setup cost of benchmarks that are not selected.
+    """
+    def data_handler(cls):
+        def setup():
+            paths = write_synthetic_csvs(os.path.join(tmp, f"csv_{cls.__name__}"), p["handler_symbols"],
+                                         p["handler_bars"], seed=seed)
+
+            def run():
+                q = _ListQueue()
+                h = cls(q, paths)
+                n = 0
+                while h.has_data():
+                    h.update_bars()
+                    n += len(q.events)
+                    q.events.clear()
+                return n
+            return run
+        return setup
+
+    def features(fn):
+        def setup():
+            df = synthetic_frame(p["feature_bars"], seed)
+            return lambda: len(fn(df))
+        return setup
+
+    def labels(fn):
+        def setup():
+            df = synthetic_frame(p["label_bars"], seed)
+            return lambda: len(fn(df["close"], df.index, profit_take_pct=0.01, stop_loss_pct=0.01,
+                                  time_limit_periods=240))
+        return setup
+
+    def training_inputs():
+        df = synthetic_frame(p["train_bars"], seed)
+        X = make_features(df)
+        lab = get_triple_barrier_labels(df["close"], df.index, 0.002, 0.002, 60)
+        Z = X.join(lab[["label", "t_final", "ret"]], how="inner").dropna()
+        return Z[X.columns], (Z["label"] == 1).astype(int), lab, CombinatorialPurgedCV(n_splits=5, embargo_pct=0.01)
+
+    def cpcv_split():
+        Xz, y, lab, cpcv = training_inputs()
+        return lambda: sum(len(te) for _, te in cpcv.split(Xz, y, label_info=lab))
+
+    def train_rf():
+        Xz, y, lab, cpcv = training_inputs()
+        rf_params = {"n_estimators": 50, "min_samples_leaf": 5, "n_jobs": -1, "random_state": 42}
+        return lambda: len(train_random_forest_cpcv(Xz, y, cpcv, lab, rf_params=rf_params).oof_proba)
+
+    def hrp(cls):
+        def setup():
+            rets = synthetic_returns(p["hrp_symbols"], p["hrp_obs"], seed=seed)
+            sides = {s: 1 for s in rets.columns}
+            return lambda: len(cls().get_target_weights(sides, rets))
+        return setup
+
+    def event_loop():
+        data_dir = os.path.join(tmp, "loop")
+        store = write_synthetic_store(os.path.join(data_dir, "bars"), p["loop_symbols"], p["loop_bars"], seed=seed)
+        symbols = synthetic_symbols(p["loop_symbols"])
+        pfeeds = {s: synthetic_probas(store.read_frame(s).index, seed=seed + k) for k, s in enumerate(symbols)}
+        thr = {s: 0.75 for s in symbols}
+
+        def run():
+            run_event_backtest(symbols, pfeeds, thr, thr, data_dir=data_dir)
+            return p["loop_symbols"] * p["loop_bars"]
+        return run
+
+    return {
+        "CSVDataHandler": data_handler(CSVDataHandler),
+        "ColumnarDataHandler": data_handler(ColumnarDataHandler),
+        "make_features": features(make_features),
+        "make_features_fast": features(make_features_fast),
+        "get_triple_barrier_labels": labels(get_triple_barrier_labels),
+        "get_triple_barrier_labels_fast": labels(get_triple_barrier_labels_fast),
+        "CombinatorialPurgedCV.split": cpcv_split,
+        "train_random_forest_cpcv": train_rf,
+        "HRPSizer.get_target_weights": hrp(HRPSizer),
+        "FastHRPSizer.get_target_weights": hrp(FastHRPSizer),
+        "run_loop_ml (event loop)": event_loop,
+    }
+
+
+def compare(current: List[Dict], baseline_path: str):
+    with open(baseline_path) as f:
+        base = {r["name"]: r for r in json.load(f)["results"]}
+    print(f"\nvs {baseline_path}")
+    for r in current:
+        b = base.get(r["name"])
+        if not b or r.get("error") or b.get("error"):
+            continue
+        print(f"  {r['name']:<32} {b['seconds'] / r['seconds']:6.2f}x")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--preset", choices=sorted(PRESETS), default="small")
+    ap.add_argument("--only", nargs="*", help="run only benchmarks whose name contains one of these strings")
+    ap.add_argument("--repeat", type=int, default=1)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", default=None, help="results JSON (default benchmarks/results/<time>_<commit>.json)")
+    ap.add_argument("--compare", default=None, help="earlier results JSON to print speedups against")
+    for key in PRESETS["small"]:
+        ap.add_argument(f"--{key.replace('_', '-')}", type=int, default=None)
+    args = ap.parse_args()
+
+    params = dict(PRESETS[args.preset])
+    for key in params:
+        override = getattr(args, key)
+        if override is not None:
+            params[key] = override
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{args.preset}: {params}")
+        cases = build_cases(params, tmp, args.seed)
+        for name, setup in cases.items():
+            if args.only and not any(s in name for s in args.only):
+                continue
+            row: Dict[str, object] = {"name": name}
+            try:
+                row.update(timed(setup(), args.repeat))
+                print(f"  {name:<34} {row['seconds']:9.3f}s  {row['items_per_sec']:>14,.0f} items/sec")
+            except Exception as e:
+                row["error"] = f"{type(e).__name__}: {e}"
+                print(f"  {name:<34} ERROR {row['error']}")
+                traceback.print_exc(limit=1)
+            results.append(row)
+
+    commit = git_commit()
+    out = args.out or os.path.join("benchmarks", "results",
+                                   f"{dt.datetime.now():%Y%m%d-%H%M%S}_{commit}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w") as f:
+        json.dump({
+            "commit": commit,
+            "created": dt.datetime.now(dt.timezone.utc).isoformat(),
+            "preset": args.preset,
+            "params": params,
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "sklearn": sklearn.__version__,
+            "results": results,
+        }, f, indent=2)
+    print(f"results written to {out}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# benchmarks/synthetic.py
+import os
+from typing import Dict, List, Tuple
+import numpy as np
+import pandas as pd
+
+from core.bar_store import BarStore
+
+
+def gbm_arrays(
+    n_bars: int,
+    seed: int = 0,
+    s0: float = 100.0,
+    mu_per_bar: float = 0.0,
+    sigma_per_bar: float = 0.0008,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Seeded geometric-Brownian-motion bars as (open, high, low, close, volume) float64 arrays.
+    Volume is lognormal and rises with the size of the bar's move.
+    """
+    rng = np.random.default_rng(seed)
+    log_ret = rng.normal(mu_per_bar - 0.5 * sigma_per_bar ** 2, sigma_per_bar, n_bars)
+    close = s0 * np.exp(np.cumsum(log_ret))
+    open_ = np.empty(n_bars)
+    open_[0] = s0
+    open_[1:] = close[:-1]
+    wick = np.abs(rng.normal(0.0, sigma_per_bar / 2, (2, n_bars)))
+    high = np.maximum(open_, close) * (1.0 + wick[0])
+    low = np.minimum(open_, close) * (1.0 - wick[1])
+    shock = np.abs(log_ret) / sigma_per_bar
+    volume = (rng.lognormal(mean=10.0, sigma=0.5, size=n_bars) * (1.0 + 0.5 * shock)).round()
+    return open_, high, low, close, volume
+
+
+def synthetic_index(n_bars: int, start: str = "2024-01-02 14:30:00+00:00", freq: str = "1min") -> pd.DatetimeIndex:
+    return pd.date_range(start=start, periods=n_bars, freq=freq)
+
+
+def generate_bars(
+    n_bars: int,
+    seed: int = 0,
+    start: str = "2024-01-02 14:30:00+00:00",
+    freq: str = "1min",
+    s0: float = 100.0,
+    sigma_per_bar: float = 0.0008,
+) -> pd.DataFrame:
+    """
+    Seeded geometric-Brownian-motion OHLCV bars in the same column layout as data/*_1min.csv.
+    """
+    open_, high, low, close, volume = gbm_arrays(n_bars, seed=seed, s0=s0, sigma_per_bar=sigma_per_bar)
+    index = synthetic_index(n_bars, start=start, freq=freq)
+    return pd.DataFrame({
+        "datetime": index,
+        "close": close,
+        "high": high,
+        "low": low,
+        "open": open_,
+        "volume": volume,
+    })
+
+
+def write_synthetic_csvs(out_dir: str, n_symbols: int, n_bars: int, seed: int = 0) -> Dict[str, str]:
+    """
+    Writes one CSV per synthetic symbol (SYM000, SYM001, ...) and returns symbol -> path.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    paths: Dict[str, str] = {}
+    for k in range(n_symbols):
+        sym = f"SYM{k:03d}"
+        path = os.path.join(out_dir, f"{sym}_1min.csv")
+        generate_bars(n_bars, seed=seed + k).to_csv(path, index=False)
+        paths[sym] = path
+    return paths
+
+
+def synthetic_symbols(n_symbols: int) -> List[str]:
+    return [f"SYM{k:03d}" for k in range(n_symbols)]
+
+
+def write_synthetic_store(root: str, n_symbols: int, n_bars: int, seed: int = 0) -> BarStore:
+    """
+    Writes n_symbols x n_bars GBM bars straight into a BarStore (no CSV text), one symbol at a time,
+    so universes of hundreds of symbols and millions of bars stay within memory.
+    """
+    store = BarStore(root)
+    ts = synthetic_index(n_bars).as_unit("ns").asi8
+    for k, sym in enumerate(synthetic_symbols(n_symbols)):
+        s0 = 20.0 + 480.0 * np.random.default_rng(seed + 10_000 + k).random()
+        store.write(sym, ts, np.column_stack(gbm_arrays(n_bars, seed=seed + k, s0=s0)))
+    return store
+
+
+def synthetic_probas(index: pd.DatetimeIndex, seed: int = 0, coverage: float = 0.95) -> pd.DataFrame:
+    """Random dual probabilities shaped like artifacts/*_oos_dual.csv, for driving the backtest loop."""
+    rng = np.random.default_rng(seed)
+    keep = rng.random(len(index)) < coverage
+    n = int(keep.sum())
+    return pd.DataFrame({
+        "proba_up": rng.beta(2.0, 3.0, n),
+        "proba_dn": rng.beta(2.0, 3.0, n),
+    }, index=pd.DatetimeIndex(index[keep], name="timestamp"))
+
+
+def synthetic_returns(n_symbols: int, n_obs: int, seed: int = 0, n_factors: int = 5) -> pd.DataFrame:
+    """Correlated returns from a small factor model, for covariance / HRP benchmarks."""
+    rng = np.random.default_rng(seed)
+    loadings = rng.normal(0.0, 1.0, (n_symbols, n_factors))
+    factors = rng.normal(0.0, 0.005, (n_obs, n_factors))
+    idio = rng.normal(0.0, 0.01, (n_obs, n_symbols))
+    return pd.DataFrame(factors @ loadings.T + idio, columns=synthetic_symbols(n_symbols))
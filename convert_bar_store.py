@@ -0,0 +1,14 @@
+# convert_bar_store.py
+import os
+from core.bar_store import BarStore, csv_to_bar_store
+
+# --- Configuration ---
+SYMBOLS = ["AAPL", "MSFT"]
+DATA_DIR = "data"
+BAR_STORE_DIR = os.path.join(DATA_DIR, "bars")
+
+if __name__ == "__main__":
+    store = BarStore(BAR_STORE_DIR)
+    written = csv_to_bar_store({s: os.path.join(DATA_DIR, f"{s}_1min.csv") for s in SYMBOLS}, store)
+    for sym, n in written.items():
+        print(f"{sym}: {n} bars -> {BAR_STORE_DIR}/{sym}.bars")
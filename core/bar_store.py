@@ -0,0 +1,259 @@
+# core/bar_store.py
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from .data import OHLCV_FIELDS, load_bar_arrays
+
+# One fixed-size record per bar; timestamps are int64 ns since epoch (UTC)
+BAR_DTYPE = np.dtype([
+    ("ts", "<i8"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8"),
+])
+NS_PER_DAY = 86_400 * 1_000_000_000
+
+
+def _to_ns(t) -> int:
+    """Timestamp-like -> int64 ns since epoch. Naive values are taken as UTC."""
+    ts = pd.Timestamp(t)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize("UTC")
+    return int(ts.as_unit("ns").value)
+
+
+def _day_index(ts: np.ndarray, row_offset: int = 0) -> np.ndarray:
+    """(k, 2) int64 array of [utc_day, first_row] for each distinct day in sorted ts."""
+    if len(ts) == 0:
+        return np.empty((0, 2), dtype=np.int64)
+    days = ts // NS_PER_DAY
+    starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+    return np.column_stack([days[starts], starts + row_offset]).astype(np.int64)
+
+
+class BarStore:
+    """
+    On-disk bar store: one flat BAR_DTYPE file per symbol ({SYM}.bars) opened with np.memmap,
+    plus a small per-symbol index of day start offsets ({SYM}.days.npy) used to jump to a date
+    range without touching the rest of the file.
+    """
+    def __init__(self, root: str, tz: Optional[str] = None):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        meta_path = os.path.join(root, "store.json")
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                self.tz = json.load(f).get("tz")
+        else:
+            self.tz = tz if tz is not None else "UTC"
+            with open(meta_path, "w") as f:
+                json.dump({"tz": self.tz}, f)
+
+    def _bars_path(self, symbol: str) -> str:
+        return os.path.join(self.root, f"{symbol}.bars")
+
+    def _days_path(self, symbol: str) -> str:
+        return os.path.join(self.root, f"{symbol}.days.npy")
+
+    def symbols(self) -> List[str]:
+        return sorted(f[:-len(".bars")] for f in os.listdir(self.root) if f.endswith(".bars"))
+
+    def has_symbol(self, symbol: str) -> bool:
+        return os.path.exists(self._bars_path(symbol))
+
+    def __len__(self) -> int:
+        return len(self.symbols())
+
+    def n_bars(self, symbol: str) -> int:
+        if not self.has_symbol(symbol):
+            return 0
+        return os.path.getsize(self._bars_path(symbol)) // BAR_DTYPE.itemsize
+
+    def open(self, symbol: str) -> np.ndarray:
+        """Read-only memory map over all bars of a symbol (empty array if none)."""
+        n = self.n_bars(symbol)
+        if n == 0:
+            return np.empty(0, dtype=BAR_DTYPE)
+        return np.memmap(self._bars_path(symbol), dtype=BAR_DTYPE, mode="r", shape=(n,))
+
+    def day_index(self, symbol: str) -> np.ndarray:
+        if not os.path.exists(self._days_path(symbol)):
+            return np.empty((0, 2), dtype=np.int64)
+        return np.load(self._days_path(symbol))
+
+    def last_timestamp(self, symbol: str) -> Optional[int]:
+        mm = self.open(symbol)
+        return int(mm["ts"][-1]) if len(mm) else None
+
+    def _row_bounds(self, symbol: str, start=None, end=None) -> Tuple[int, int]:
+        """Row range [lo, hi) covering start <= ts <= end, found through the day index first."""
+        mm = self.open(symbol)
+        lo, hi = 0, len(mm)
+        if hi == 0:
+            return 0, 0
+        days = self.day_index(symbol)
+        start_ns = _to_ns(start) if start is not None else None
+        end_ns = _to_ns(end) if end is not None else None
+        # Narrow to whole days using the small index, then binary search inside the mapped range
+        if start_ns is not None and len(days):
+            k = np.searchsorted(days[:, 0], start_ns // NS_PER_DAY, side="left")
+            lo = int(days[k, 1]) if k < len(days) else hi
+        if end_ns is not None and len(days):
+            k = np.searchsorted(days[:, 0], end_ns // NS_PER_DAY, side="right")
+            hi = int(days[k, 1]) if k < len(days) else hi
+        if lo >= hi:
+            return lo, lo
+        ts = mm["ts"][lo:hi]
+        if start_ns is not None:
+            lo += int(np.searchsorted(ts, start_ns, side="left"))
+            ts = mm["ts"][lo:hi]
+        if end_ns is not None:
+            hi = lo + int(np.searchsorted(ts, end_ns, side="right"))
+        return lo, hi
+
+    def read(self, symbol: str, start=None, end=None) -> np.ndarray:
+        """Memory-mapped BAR_DTYPE records with start <= timestamp <= end (inclusive, either may be None)."""
+        lo, hi = self._row_bounds(symbol, start, end)
+        return self.open(symbol)[lo:hi]
+
+    def read_arrays(self, symbol: str, start=None, end=None) -> Tuple[np.ndarray, np.ndarray]:
+        """(int64 ns timestamps, float64 (n, 5) OHLCV) for the requested range, as ColumnarDataHandler expects."""
+        rec = self.read(symbol, start, end)
+        ohlcv = np.empty((len(rec), len(OHLCV_FIELDS)), dtype=np.float64)
+        for j, col in enumerate(OHLCV_FIELDS):
+            ohlcv[:, j] = rec[col]
+        return np.array(rec["ts"], dtype=np.int64), ohlcv
+
+    def read_frame(self, symbol: str, start=None, end=None) -> pd.DataFrame:
+        """DataFrame indexed by 'datetime' with open/high/low/close/volume, like the parsed CSVs."""
+        ts, ohlcv = self.read_arrays(symbol, start, end)
+        index = pd.DatetimeIndex(pd.to_datetime(ts, unit="ns", utc=True), name="datetime")
+        if self.tz is not None:
+            index = index.tz_convert(self.tz)
+        else:
+            index = index.tz_localize(None)
+        return pd.DataFrame(ohlcv, index=index, columns=list(OHLCV_FIELDS))
+
+    def write(self, symbol: str, ts: np.ndarray, ohlcv: np.ndarray):
+        """Replace all bars of a symbol. ts must be sorted int64 ns; ohlcv is (n, 5)."""
+        rec = self._to_records(ts, ohlcv)
+        rec.tofile(self._bars_path(symbol))
+        np.save(self._days_path(symbol), _day_index(rec["ts"]))
+
+    def append(self, symbol: str, ts: np.ndarray, ohlcv: np.ndarray) -> int:
+        """
+        Append bars strictly newer than the last stored bar; older or duplicate rows are skipped.
+        Returns the number of bars written.
+        """
+        rec = self._to_records(ts, ohlcv)
+        last = self.last_timestamp(symbol)
+        if last is not None:
+            rec = rec[rec["ts"] > last]
+        if len(rec) == 0:
+            return 0
+        n_old = self.n_bars(symbol)
+        with open(self._bars_path(symbol), "ab") as f:
+            rec.tofile(f)
+        days = self.day_index(symbol)
+        new_days = _day_index(rec["ts"], row_offset=n_old)
+        if len(days) and len(new_days) and days[-1, 0] == new_days[0, 0]:
+            new_days = new_days[1:]  # continuation of the last stored day
+        np.save(self._days_path(symbol), np.concatenate([days, new_days]))
+        return len(rec)
+
+    def merge(self, symbol: str, ts: np.ndarray, ohlcv: np.ndarray) -> int:
+        """
+        Merge bars that may overlap what is stored: the union is de-duplicated on timestamp
+        (incoming rows win) and rewritten sorted. Pure tail appends take the append() fast path.
+        Returns the number of bars stored afterwards.
+        """
+        rec = self._to_records(ts, ohlcv)
+        if len(rec) == 0:
+            return self.n_bars(symbol)
+        # Keep the last occurrence of each timestamp within the incoming batch
+        _, last_ix = np.unique(rec["ts"][::-1], return_index=True)
+        rec = rec[len(rec) - 1 - last_ix]
+        last = self.last_timestamp(symbol)
+        if last is None or rec["ts"][0] > last:
+            self.append(symbol, rec["ts"], self._ohlcv_of(rec))
+            return self.n_bars(symbol)
+        old = np.array(self.open(symbol))
+        old = old[~np.isin(old["ts"], rec["ts"])]
+        both = np.concatenate([old, rec])
+        both = both[np.argsort(both["ts"], kind="stable")]
+        self.write(symbol, both["ts"], self._ohlcv_of(both))
+        return len(both)
+
+    def to_csv(self, symbol: str, path: str):
+        """Export a symbol in the data/{SYMBOL}_1min.csv column layout."""
+        df = self.read_frame(symbol).reset_index()
+        df[["datetime", "close", "high", "low", "open", "volume"]].to_csv(path, index=False)
+
+    def append_frame(self, symbol: str, df: pd.DataFrame, datetime_col: str = "datetime") -> int:
+        """Append a DataFrame with a datetime column (or DatetimeIndex) and OHLCV columns."""
+        ts, ohlcv = frame_to_arrays(df, datetime_col)
+        return self.append(symbol, ts, ohlcv)
+
+    @staticmethod
+    def _ohlcv_of(rec: np.ndarray) -> np.ndarray:
+        return np.column_stack([rec[col] for col in OHLCV_FIELDS])
+
+    @staticmethod
+    def _to_records(ts: np.ndarray, ohlcv: np.ndarray) -> np.ndarray:
+        ts = np.asarray(ts, dtype=np.int64)
+        ohlcv = np.asarray(ohlcv, dtype=np.float64)
+        if np.any(ts[1:] < ts[:-1]):
+            order = np.argsort(ts, kind="stable")
+            ts, ohlcv = ts[order], ohlcv[order]
+        rec = np.empty(len(ts), dtype=BAR_DTYPE)
+        rec["ts"] = ts
+        for j, col in enumerate(OHLCV_FIELDS):
+            rec[col] = ohlcv[:, j]
+        return rec
+
+
+def frame_to_arrays(df: pd.DataFrame, datetime_col: str = "datetime") -> Tuple[np.ndarray, np.ndarray]:
+    if datetime_col in df.columns:
+        idx = pd.DatetimeIndex(pd.to_datetime(df[datetime_col]))
+    else:
+        idx = pd.DatetimeIndex(df.index)
+    if idx.tz is None:
+        idx = idx.tz_localize("UTC")
+    ohlcv = np.empty((len(df), len(OHLCV_FIELDS)), dtype=np.float64)
+    for j, col in enumerate(OHLCV_FIELDS):
+        ohlcv[:, j] = df[col].to_numpy(dtype=np.float64) if col in df.columns else 0.0
+    return idx.as_unit("ns").asi8.copy(), ohlcv
+
+
+def csv_to_bar_store(symbol_to_csv: Dict[str, str], store: BarStore, datetime_col: str = "datetime") -> Dict[str, int]:
+    """
+    Converts data/{SYMBOL}_1min.csv style files into the bar store (overwriting existing symbols).
+    Returns symbol -> number of bars written.
+    """
+    written = {}
+    for sym, path in symbol_to_csv.items():
+        ts, ohlcv, _ = load_bar_arrays(path, datetime_col)
+        store.write(sym, ts, ohlcv)
+        written[sym] = len(ts)
+    return written
+
+
+def load_bars(symbol: str, data_dir: str = "data", store_dir: Optional[str] = None, start=None, end=None) -> pd.DataFrame:
+    """
+    Bars for one symbol indexed by datetime: read from the bar store when it holds the symbol,
+    otherwise parsed from {data_dir}/{symbol}_1min.csv.
+    """
+    store_dir = store_dir or os.path.join(data_dir, "bars")
+    if os.path.exists(os.path.join(store_dir, f"{symbol}.bars")):
+        return BarStore(store_dir).read_frame(symbol, start, end)
+    df = pd.read_csv(os.path.join(data_dir, f"{symbol}_1min.csv"), parse_dates=["datetime"]).set_index("datetime")
+    if start is not None:
+        df = df[df.index >= pd.Timestamp(start)]
+    if end is not None:
+        df = df[df.index <= pd.Timestamp(end)]
+    return df
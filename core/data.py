@@ -1,10 +1,13 @@
 # core/data.py
 from abc import ABC, abstractmethod
 from datetime import datetime
-from typing import Dict, List, Iterator
+from typing import Dict, List, Iterator, Optional, Tuple
+import heapq
+import time
+import numpy as np
 import pandas as pd
 
-from .events import MarketEvent
+from .events import MarketEvent, MarketBatchEvent
 
 class DataHandler(ABC):
     """Abstract interface for any market data feed."""
@@ -73,14 +76,15 @@ class CSVDataHandler(DataHandler):
         for sym in self.symbols:
             row = self._next_cache[sym]
             if row is not None and row[self.datetime_col] == current_time:
-                ohlcv = {
-                    "open": float(row["open"]),
-                    "high": float(row["high"]),
-                    "low":  float(row["low"]),
-                    "close": float(row["close"]),
-                    "volume": float(row.get("volume", 0.0)),
-                }
-                me = MarketEvent(timestamp=current_time.to_pydatetime(), symbol=sym, ohlcv=ohlcv)
+                me = MarketEvent(
+                    timestamp=current_time.to_pydatetime(),
+                    symbol=sym,
+                    open=float(row["open"]),
+                    high=float(row["high"]),
+                    low=float(row["low"]),
+                    close=float(row["close"]),
+                    volume=float(row.get("volume", 0.0)),
+                )
                 self.event_queue.put(me)
 
                 # Advance iterator for this symbol
@@ -89,3 +93,253 @@ class CSVDataHandler(DataHandler):
                     self._next_cache[sym] = nxt
                 except StopIteration:
                     self._next_cache[sym] = None
+
+
+OHLCV_FIELDS = ("open", "high", "low", "close", "volume")
+
+
+def load_bar_arrays(path: str, datetime_col: str = "datetime") -> Tuple[np.ndarray, np.ndarray, Optional[object]]:
+    """
+    Reads one OHLCV CSV into contiguous arrays.
+    Returns (timestamps as int64 ns since epoch, float64 (n, 5) open/high/low/close/volume, tz).
+    Rows are sorted by timestamp; a missing volume column is filled with 0.0.
+    """
+    df = pd.read_csv(path)
+    ts = pd.DatetimeIndex(pd.to_datetime(df[datetime_col]))
+    order = np.argsort(ts.as_unit("ns").asi8, kind="stable")
+    ts = ts[order]
+    ohlcv = np.empty((len(df), len(OHLCV_FIELDS)), dtype=np.float64)
+    for j, col in enumerate(OHLCV_FIELDS):
+        if col in df.columns:
+            ohlcv[:, j] = df[col].to_numpy(dtype=np.float64)[order]
+        else:
+            ohlcv[:, j] = 0.0
+    return ts.as_unit("ns").asi8.copy(), ohlcv, ts.tz
+
+
+class ColumnarDataHandler(DataHandler):
+    """
+    Array-backed replacement for CSVDataHandler.
+    Each symbol is held as an int64 timestamp array plus a contiguous float64 (n, 5) OHLCV block,
+    and the per-symbol streams are merged with a heap keyed on each symbol's next timestamp,
+    so update_bars() costs O(k log S) for the k symbols printing at the current timestamp.
+    Emits the same MarketEvents, in the same order, as CSVDataHandler; with batch=True it instead
+    emits one MarketBatchEvent per timestamp carrying every symbol that printed.
+    """
+    def __init__(self, event_queue, symbol_to_csv: Dict[str, str], datetime_col: str = "datetime", batch: bool = False):
+        self.event_queue = event_queue
+        self.datetime_col = datetime_col
+        self.batch = batch
+        self.symbols = list(symbol_to_csv.keys())
+        self._ts: List[np.ndarray] = []
+        self._bars: List[np.ndarray] = []
+        self._tz = None
+
+        for sym in self.symbols:
+            ts, ohlcv, tz = load_bar_arrays(symbol_to_csv[sym], datetime_col)
+            self._add_symbol(ts, ohlcv, tz)
+        self._init_cursors()
+
+    @classmethod
+    def from_arrays(cls, event_queue, symbol_to_arrays: Dict[str, Tuple[np.ndarray, np.ndarray]], tz=None, batch: bool = False):
+        """
+        Builds a handler from preloaded arrays: symbol -> (int64 ns timestamps, float64 (n, 5) OHLCV).
+        Timestamps must already be sorted.
+        """
+        self = cls.__new__(cls)
+        self.event_queue = event_queue
+        self.datetime_col = "datetime"
+        self.batch = batch
+        self.symbols = list(symbol_to_arrays.keys())
+        self._ts = []
+        self._bars = []
+        self._tz = None
+        for sym in self.symbols:
+            ts, ohlcv = symbol_to_arrays[sym]
+            self._add_symbol(ts, ohlcv, tz)
+        self._init_cursors()
+        return self
+
+    @classmethod
+    def from_bar_store(cls, event_queue, store, symbols: List[str], start=None, end=None, batch: bool = False):
+        """Builds a handler over a BarStore date range without parsing any CSV text."""
+        arrays = {sym: store.read_arrays(sym, start, end) for sym in symbols}
+        return cls.from_arrays(event_queue, arrays, tz=store.tz, batch=batch)
+
+    def _add_symbol(self, ts: np.ndarray, ohlcv: np.ndarray, tz):
+        self._ts.append(np.ascontiguousarray(ts, dtype=np.int64))
+        self._bars.append(np.ascontiguousarray(ohlcv, dtype=np.float64))
+        if tz is not None:
+            self._tz = tz
+
+    def _init_cursors(self):
+        # Heap of (next_timestamp_ns, symbol_index); ties pop in symbol order like CSVDataHandler
+        self._pos = [0] * len(self.symbols)
+        self._heap = [(int(ts[0]), i) for i, ts in enumerate(self._ts) if len(ts) > 0]
+        heapq.heapify(self._heap)
+
+    def has_data(self) -> bool:
+        return bool(self._heap)
+
+    def update_bars(self):
+        """
+        Pop every symbol whose next bar carries the earliest timestamp, emit one MarketEvent per symbol
+        (or a single MarketBatchEvent in batch mode), and push each symbol back keyed on its following timestamp.
+        """
+        heap = self._heap
+        if not heap:
+            return  # No data left
+
+        current_ns = heap[0][0]
+        current_time = pd.Timestamp(current_ns, tz=self._tz).to_pydatetime()
+        if self.batch:
+            syms, rows = [], []
+        else:
+            put = self.event_queue.put
+        while heap and heap[0][0] == current_ns:
+            _, i = heapq.heappop(heap)
+            pos = self._pos[i]
+            if self.batch:
+                syms.append(self.symbols[i])
+                rows.append(self._bars[i][pos])
+            else:
+                o, h, l, c, v = self._bars[i][pos].tolist()
+                put(MarketEvent(current_time, self.symbols[i], o, h, l, c, v))
+            pos += 1
+            self._pos[i] = pos
+            ts = self._ts[i]
+            if pos < len(ts):
+                heapq.heappush(heap, (int(ts[pos]), i))
+        if self.batch:
+            cols = np.array(rows).T.copy()
+            self.event_queue.put(MarketBatchEvent(current_time, tuple(syms), cols[0], cols[1], cols[2], cols[3], cols[4]))
+
+
+def peak_rss_bytes() -> int:
+    """Peak resident set size of this process so far (0 where the platform does not report it)."""
+    try:
+        import resource
+        import sys
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    return int(peak if sys.platform == "darwin" else peak * 1024)
+
+
+class StreamingCSVDataHandler(DataHandler):
+    """
+    Bounded-memory CSV feed for universes whose history does not fit in RAM.
+    Each symbol's CSV is read in chunks of `chunk_rows` rows; only the current chunk per symbol is
+    held (as int64 timestamps and a float64 OHLCV block), and the per-symbol streams are merged
+    in timestamp order with a heap like ColumnarDataHandler. Buffered memory is therefore about
+    symbols * chunk_rows * 48 bytes regardless of dataset size.
+    Each file must already be sorted by datetime; out-of-order rows raise ValueError.
+    """
+    def __init__(self, event_queue, symbol_to_csv: Dict[str, str], datetime_col: str = "datetime", chunk_rows: int = 4096):
+        if chunk_rows < 1:
+            raise ValueError("chunk_rows must be >= 1")
+        self.event_queue = event_queue
+        self.datetime_col = datetime_col
+        self.chunk_rows = chunk_rows
+        self.symbols = list(symbol_to_csv.keys())
+        self._readers = [pd.read_csv(symbol_to_csv[s], chunksize=chunk_rows) for s in self.symbols]
+        self._ts: List[np.ndarray] = [np.empty(0, dtype=np.int64)] * len(self.symbols)
+        self._bars: List[np.ndarray] = [np.empty((0, len(OHLCV_FIELDS)))] * len(self.symbols)
+        self._pos = [0] * len(self.symbols)
+        self._last_ns = [None] * len(self.symbols)
+        self._tz = None
+
+        self.bars_emitted = 0
+        self.chunks_read = 0
+        self.peak_buffer_bytes = 0
+        self._t_start = None
+        self._t_end = None
+
+        self._heap = []
+        for i in range(len(self.symbols)):
+            if self._refill(i):
+                self._heap.append((int(self._ts[i][0]), i))
+        heapq.heapify(self._heap)
+        self._track_buffer()
+
+    def _refill(self, i: int) -> bool:
+        """Load the next chunk for symbol i; return False when its file is exhausted."""
+        reader = self._readers[i]
+        if reader is None:
+            return False
+        while True:
+            try:
+                chunk = next(reader)
+            except StopIteration:
+                reader.close()
+                self._readers[i] = None
+                self._ts[i] = np.empty(0, dtype=np.int64)
+                self._bars[i] = np.empty((0, len(OHLCV_FIELDS)))
+                return False
+            if len(chunk):
+                break
+        ts = pd.DatetimeIndex(pd.to_datetime(chunk[self.datetime_col]))
+        if self._tz is None and ts.tz is not None:
+            self._tz = ts.tz
+        ts_ns = ts.as_unit("ns").asi8.copy()
+        prev = self._last_ns[i]
+        if np.any(ts_ns[1:] < ts_ns[:-1]) or (prev is not None and ts_ns[0] < prev):
+            raise ValueError(f"{self.symbols[i]}: CSV is not sorted by {self.datetime_col}")
+        bars = np.empty((len(chunk), len(OHLCV_FIELDS)), dtype=np.float64)
+        for j, col in enumerate(OHLCV_FIELDS):
+            bars[:, j] = chunk[col].to_numpy(dtype=np.float64) if col in chunk.columns else 0.0
+        self._ts[i] = ts_ns
+        self._bars[i] = bars
+        self._pos[i] = 0
+        self._last_ns[i] = int(ts_ns[-1])
+        self.chunks_read += 1
+        return True
+
+    def _track_buffer(self):
+        used = sum(t.nbytes + b.nbytes for t, b in zip(self._ts, self._bars))
+        if used > self.peak_buffer_bytes:
+            self.peak_buffer_bytes = used
+
+    def has_data(self) -> bool:
+        return bool(self._heap)
+
+    def update_bars(self):
+        """Emit MarketEvent(s) for the earliest pending timestamp, refilling symbol buffers as they drain."""
+        heap = self._heap
+        if not heap:
+            return  # No data left
+        if self._t_start is None:
+            self._t_start = time.perf_counter()
+
+        current_ns = heap[0][0]
+        current_time = pd.Timestamp(current_ns, tz=self._tz).to_pydatetime()
+        put = self.event_queue.put
+        while heap and heap[0][0] == current_ns:
+            _, i = heapq.heappop(heap)
+            pos = self._pos[i]
+            o, h, l, c, v = self._bars[i][pos].tolist()
+            put(MarketEvent(current_time, self.symbols[i], o, h, l, c, v))
+            self.bars_emitted += 1
+            pos += 1
+            self._pos[i] = pos
+            if pos < len(self._ts[i]):
+                heapq.heappush(heap, (int(self._ts[i][pos]), i))
+            elif self._refill(i):
+                self._track_buffer()
+                heapq.heappush(heap, (int(self._ts[i][0]), i))
+        if not heap:
+            self._t_end = time.perf_counter()
+
+    def stats(self) -> Dict[str, float]:
+        """Throughput and memory figures for sizing chunk_rows."""
+        end = self._t_end if self._t_end is not None else time.perf_counter()
+        elapsed = (end - self._t_start) if self._t_start is not None else 0.0
+        return {
+            "bars_emitted": self.bars_emitted,
+            "chunks_read": self.chunks_read,
+            "elapsed_sec": elapsed,
+            "bars_per_sec": self.bars_emitted / elapsed if elapsed > 0 else float("nan"),
+            "peak_buffer_mb": self.peak_buffer_bytes / 2**20,
+            "peak_rss_mb": peak_rss_bytes() / 2**20,
+        }
@@ -0,0 +1,131 @@
+# core/dispatcher.py
+from array import array
+from time import perf_counter_ns
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+from .data import DataHandler
+
+Handler = Callable[[object], Optional[Iterable[object]]]
+
+
+class HandlerStats:
+    """Call count and per-call wall time (ns) of one subscribed handler."""
+    __slots__ = ("name", "event_type", "calls", "total_ns", "samples")
+
+    def __init__(self, name: str, event_type: type):
+        self.name = name
+        self.event_type = event_type
+        self.calls = 0
+        self.total_ns = 0
+        self.samples = array("q")
+
+    def record(self, elapsed_ns: int):
+        self.calls += 1
+        self.total_ns += elapsed_ns
+        self.samples.append(elapsed_ns)
+
+    def percentile_us(self, q: float) -> float:
+        if not self.samples:
+            return float("nan")
+        return float(np.percentile(np.frombuffer(self.samples, dtype=np.int64), q)) / 1e3
+
+
+class EventDispatcher:
+    """
+    Routes events to subscribed handlers by exact event type (one dict lookup per event).
+    A handler may return an iterable of new events, which are put on the queue.
+    With instrument=True it records per-handler call counts, cumulative and p99 time,
+    and the queue depth after each data step, for print_summary() at the end of a run.
+    """
+    def __init__(self, event_queue, instrument: bool = False):
+        self.event_queue = event_queue
+        self.instrument = instrument
+        self._handlers: Dict[type, List[Tuple[Handler, HandlerStats]]] = {}
+        self._stats: List[HandlerStats] = []
+        self._step_hooks: List[Callable[[], Optional[Iterable[object]]]] = []
+        self.queue_depth = array("l")
+        self.events_dispatched = 0
+
+    def subscribe(self, event_type: type, handler: Handler, name: Optional[str] = None):
+        """Handlers for the same type run in subscription order."""
+        stats = HandlerStats(name or getattr(handler, "__qualname__", repr(handler)), event_type)
+        self._handlers.setdefault(event_type, []).append((handler, stats))
+        self._stats.append(stats)
+
+    def add_step_hook(self, hook: Callable[[], Optional[Iterable[object]]]):
+        """
+        Called after each data step has been drained (e.g. NettingExecutionHandler.flush).
+        Events the hook returns or puts on the queue are drained before the next step.
+        """
+        self._step_hooks.append(hook)
+
+    def dispatch(self, event):
+        self.events_dispatched += 1
+        handlers = self._handlers.get(type(event))
+        if not handlers:
+            return
+        put = self.event_queue.put
+        if self.instrument:
+            for handler, stats in handlers:
+                t0 = perf_counter_ns()
+                out = handler(event)
+                stats.record(perf_counter_ns() - t0)
+                if out:
+                    for e in out:
+                        put(e)
+        else:
+            for handler, _ in handlers:
+                out = handler(event)
+                if out:
+                    for e in out:
+                        put(e)
+
+    def drain(self):
+        """Dispatch until the queue is empty."""
+        q = self.event_queue
+        while not q.empty():
+            self.dispatch(q.get())
+
+    def run(self, data: DataHandler):
+        """Standard backtest loop: step the feed, then drain everything that step caused."""
+        q = self.event_queue
+        while data.has_data():
+            data.update_bars()
+            if self.instrument:
+                self.queue_depth.append(len(q))
+            self.drain()
+            for hook in self._step_hooks:
+                out = hook()
+                if out:
+                    for e in out:
+                        q.put(e)
+                self.drain()
+
+    def summary(self) -> List[Dict[str, object]]:
+        rows = []
+        for s in self._stats:
+            rows.append({
+                "handler": s.name,
+                "event": s.event_type.__name__,
+                "calls": s.calls,
+                "total_ms": s.total_ns / 1e6,
+                "mean_us": (s.total_ns / s.calls / 1e3) if s.calls else float("nan"),
+                "p99_us": s.percentile_us(99),
+            })
+        return sorted(rows, key=lambda r: r["total_ms"], reverse=True)
+
+    def print_summary(self):
+        rows = self.summary()
+        print("\n--- Dispatcher Profile ---")
+        print(f"{'handler':<32} {'event':<16} {'calls':>9} {'total_ms':>10} {'mean_us':>9} {'p99_us':>9}")
+        for r in rows:
+            if not r["calls"]:
+                continue
+            print(f"{r['handler']:<32} {r['event']:<16} {r['calls']:>9} {r['total_ms']:>10.1f} "
+                  f"{r['mean_us']:>9.2f} {r['p99_us']:>9.2f}")
+        if len(self.queue_depth):
+            depth = np.frombuffer(self.queue_depth, dtype=self.queue_depth.typecode)
+            print(f"queue depth after each step: mean={depth.mean():.2f} max={depth.max()} steps={len(depth)}")
+        print(f"events dispatched: {self.events_dispatched}")
+        print("--------------------------")
@@ -0,0 +1,210 @@
+# core/download.py
+import json
+import os
+import threading
+import time
+import datetime as dt
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+import pandas as pd
+
+from .bar_store import BarStore, frame_to_arrays
+
+Chunk = Tuple[pd.Timestamp, pd.Timestamp]
+
+
+class BarSource(ABC):
+    """Abstract interface for a historical bar provider."""
+    @abstractmethod
+    def fetch(self, symbol: str, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        """
+        Bars with start <= datetime < end.
+        Returns columns: datetime, open, high, low, close, volume (possibly empty).
+        """
+        raise NotImplementedError
+
+
+class YFinanceSource(BarSource):
+    """Yahoo Finance intraday bars via yfinance (imported lazily)."""
+    def __init__(self, interval: str = "1m"):
+        self.interval = interval
+
+    def fetch(self, symbol: str, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        import yfinance as yf
+        data = yf.download(tickers=symbol, start=start.to_pydatetime(), end=end.to_pydatetime(),
+                           interval=self.interval, progress=False)
+        if data.empty:
+            return pd.DataFrame(columns=["datetime", "open", "high", "low", "close", "volume"])
+
+        # The column names from yfinance are a MultiIndex. Flatten them and make them lowercase.
+        if isinstance(data.columns, pd.MultiIndex):
+            data.columns = data.columns.get_level_values(0)
+        data.columns = [str(col).lower() for col in data.columns]
+        data = data.reset_index()
+        if "Datetime" in data.columns:
+            data = data.rename(columns={"Datetime": "datetime"})
+        elif "index" in data.columns:
+            data = data.rename(columns={"index": "datetime"})
+        return data
+
+
+class CSVFileSource(BarSource):
+    """
+    File-backed fake provider that serves bars from {data_dir}/{SYMBOL}_1min.csv.
+    Used to exercise the download pipeline offline.
+    """
+    def __init__(self, data_dir: str, datetime_col: str = "datetime"):
+        self.data_dir = data_dir
+        self.datetime_col = datetime_col
+        self._frames: Dict[str, pd.DataFrame] = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def _frame(self, symbol: str) -> pd.DataFrame:
+        with self._lock:
+            self.calls += 1
+            if symbol not in self._frames:
+                df = pd.read_csv(os.path.join(self.data_dir, f"{symbol}_1min.csv"))
+                df[self.datetime_col] = pd.to_datetime(df[self.datetime_col], utc=True)
+                self._frames[symbol] = df.rename(columns={self.datetime_col: "datetime"})
+            return self._frames[symbol]
+
+    def fetch(self, symbol: str, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        df = self._frame(symbol)
+        mask = (df["datetime"] >= start) & (df["datetime"] < end)
+        return df.loc[mask].copy()
+
+
+class RateLimiter:
+    """Thread-safe limiter spacing calls at least 1/max_per_sec seconds apart."""
+    def __init__(self, max_per_sec: float):
+        self.interval = 1.0 / max_per_sec if max_per_sec and max_per_sec > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if self.interval == 0.0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class DownloadManifest:
+    """
+    JSON record of completed (symbol, chunk) downloads so reruns only fetch gaps.
+    Layout: {"SYMBOL": [["start_iso", "end_iso"], ...]}; writes are atomic.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._done: Dict[str, set] = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                raw = json.load(f)
+            self._done = {sym: {tuple(c) for c in chunks} for sym, chunks in raw.items()}
+
+    @staticmethod
+    def _key(chunk: Chunk) -> Tuple[str, str]:
+        return (chunk[0].isoformat(), chunk[1].isoformat())
+
+    def is_done(self, symbol: str, chunk: Chunk) -> bool:
+        return self._key(chunk) in self._done.get(symbol, ())
+
+    def mark_done(self, symbol: str, chunks: List[Chunk]):
+        self._done.setdefault(symbol, set()).update(self._key(c) for c in chunks)
+        self.save()
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({sym: sorted(map(list, chunks)) for sym, chunks in self._done.items()}, f, indent=1)
+        os.replace(tmp, self.path)
+
+
+def plan_chunks(start, end, chunk_size: dt.timedelta = dt.timedelta(days=7)) -> List[Chunk]:
+    """
+    Splits [start, end) into chunks aligned to a fixed grid of chunk_size since the epoch,
+    so the same range always yields the same chunk keys across reruns. The first chunk may begin
+    before `start`; download_bars clips its fetch to `start`.
+    """
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    if start.tzinfo is None:
+        start = start.tz_localize("UTC")
+    if end.tzinfo is None:
+        end = end.tz_localize("UTC")
+    step = pd.Timedelta(chunk_size)
+    epoch = pd.Timestamp(0, tz="UTC")
+    cur = epoch + ((start.tz_convert("UTC") - epoch) // step) * step
+    chunks = []
+    while cur < end:
+        chunks.append((cur, cur + step))
+        cur += step
+    return chunks
+
+
+def download_bars(
+    symbols: List[str],
+    start,
+    end,
+    source: BarSource,
+    store: BarStore,
+    manifest: Optional[DownloadManifest] = None,
+    chunk_size: dt.timedelta = dt.timedelta(days=7),
+    max_workers: int = 4,
+    max_requests_per_sec: float = 2.0,
+    now=None,
+) -> Dict[str, int]:
+    """
+    Fetches missing (symbol, chunk) ranges concurrently and merges them into the bar store.
+    - Chunks already recorded in the manifest are skipped.
+    - The first chunk is fetched from `start`, not its grid point, so it never asks for bars before
+      the requested range (e.g. past the provider's history limit, which would fail on every run).
+    - Fetches run on a thread pool, throttled by a shared RateLimiter.
+    - Each symbol's chunks are merged into the store de-duplicated and sorted, then recorded
+      in the manifest. Chunks reaching past `now` are never recorded, since they can still grow.
+    Returns symbol -> number of bars in the store after merging.
+    """
+    now = pd.Timestamp(now if now is not None else dt.datetime.now(dt.timezone.utc))
+    if now.tzinfo is None:
+        now = now.tz_localize("UTC")
+    start = pd.Timestamp(start)
+    if start.tzinfo is None:
+        start = start.tz_localize("UTC")
+    chunks = plan_chunks(start, end, chunk_size)
+    todo = {sym: [c for c in chunks if manifest is None or not manifest.is_done(sym, c)] for sym in symbols}
+    limiter = RateLimiter(max_requests_per_sec)
+
+    def _fetch(sym: str, chunk: Chunk) -> pd.DataFrame:
+        limiter.wait()
+        return source.fetch(sym, max(chunk[0], start), chunk[1])
+
+    pending = {sym: len(c) for sym, c in todo.items()}
+    frames: Dict[str, List[pd.DataFrame]] = {sym: [] for sym in symbols}
+    fetched: Dict[str, List[Chunk]] = {sym: [] for sym in symbols}
+    totals: Dict[str, int] = {sym: store.n_bars(sym) for sym in symbols}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(_fetch, sym, c): (sym, c) for sym, cs in todo.items() for c in cs}
+        for fut in as_completed(futures):
+            sym, chunk = futures[fut]
+            pending[sym] -= 1
+            try:
+                df = fut.result()
+                if df is not None and len(df):
+                    frames[sym].append(df)
+                fetched[sym].append(chunk)
+            except Exception as e:
+                print(f"  {sym} {chunk[0]:%Y-%m-%d}..{chunk[1]:%Y-%m-%d} failed: {e}")
+            if pending[sym] == 0:
+                # All chunks for this symbol are in: merge once, then record what was fetched
+                if frames[sym]:
+                    ts, ohlcv = frame_to_arrays(pd.concat(frames[sym], ignore_index=True))
+                    totals[sym] = store.merge(sym, ts, ohlcv)
+                frames[sym] = []
+                if manifest is not None:
+                    manifest.mark_done(sym, [c for c in fetched[sym] if c[1] <= now])
+    return totals
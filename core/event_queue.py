@@ -1,5 +1,11 @@
 # core/event_queue.py
-from queue import Queue  # Can be swapped to PriorityQueue later if needed
+from collections import deque
+from itertools import count
+from queue import Queue, Empty
+from typing import Dict, Optional
+import heapq
+
+from .events import MarketEvent, SignalEvent, OrderEvent, FillEvent
 
 class EventQueue:
     """Central in-memory bus for Market/Signal/Order/Fill events."""
@@ -14,3 +20,80 @@ class EventQueue:
 
     def empty(self):
         return self._q.empty()
+
+    def __len__(self):
+        return self._q.qsize()
+
+
+class FastEventQueue:
+    """
+    Lock-free FIFO for single-threaded backtests: same put/get/empty contract as EventQueue
+    on top of collections.deque, without Queue's mutex and condition variable.
+    """
+    __slots__ = ("_q",)
+
+    def __init__(self):
+        self._q = deque()
+
+    def put(self, event):
+        self._q.append(event)
+
+    def get(self):
+        try:
+            return self._q.popleft()
+        except IndexError:
+            raise Empty from None
+
+    def empty(self):
+        return not self._q
+
+    def __len__(self):
+        return len(self._q)
+
+
+# Within one timestamp: market data first, then signals, orders and finally fills,
+# matching the order in which the FIFO loop in run_loop_ml.py processes them.
+DEFAULT_TYPE_RANK: Dict[type, int] = {
+    MarketEvent: 0,
+    SignalEvent: 1,
+    OrderEvent: 2,
+    FillEvent: 3,
+}
+
+
+class PriorityEventQueue:
+    """
+    Timestamp-ordered queue: events pop by (timestamp, event-type rank, insertion sequence),
+    so orders and fills can be scheduled for future bars and ties resolve deterministically.
+    Single-threaded like FastEventQueue. Drivers that schedule ahead should drain with
+    `while eq.due(now)` so future-dated events wait for their bar.
+    """
+    __slots__ = ("_heap", "_seq", "_rank")
+
+    def __init__(self, type_rank: Optional[Dict[type, int]] = None):
+        self._heap = []
+        self._seq = count()
+        self._rank = dict(DEFAULT_TYPE_RANK if type_rank is None else type_rank)
+
+    def put(self, event):
+        rank = self._rank.get(type(event), len(self._rank))
+        heapq.heappush(self._heap, (event.timestamp, rank, next(self._seq), event))
+
+    def get(self):
+        try:
+            return heapq.heappop(self._heap)[3]
+        except IndexError:
+            raise Empty from None
+
+    def empty(self):
+        return not self._heap
+
+    def due(self, now) -> bool:
+        """True if the earliest queued event is timestamped at or before `now`."""
+        return bool(self._heap) and self._heap[0][0] <= now
+
+    def peek_timestamp(self):
+        return self._heap[0][0] if self._heap else None
+
+    def __len__(self):
+        return len(self._heap)
@@ -1,20 +1,53 @@
 # core/events.py
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
+import numpy as np
 
 class Event:
     """Base class for all events."""
-    pass
+    __slots__ = ()
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class MarketEvent(Event):
-    """New market data is available."""
+    """New market data is available: one bar for one symbol."""
     timestamp: datetime
     symbol: str
-    ohlcv: Dict[str, Any]  # e.g., {"open":..., "high":..., "low":..., "close":..., "volume":...}
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float = 0.0
 
-@dataclass
+    @property
+    def ohlcv(self) -> Dict[str, Any]:
+        """Dict view kept for older callers; prefer the fields, this allocates on every access."""
+        return {"open": self.open, "high": self.high, "low": self.low, "close": self.close, "volume": self.volume}
+
+@dataclass(frozen=True, slots=True, eq=False)
+class MarketBatchEvent(Event):
+    """
+    All bars for one timestamp: symbols[i] printed open[i], high[i], ... at `timestamp`.
+    Consumers handle the whole cross-section at once instead of one MarketEvent per symbol.
+    """
+    timestamp: datetime
+    symbols: Tuple[str, ...]
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def events(self):
+        """Expands the batch into per-symbol MarketEvents (for consumers without batch support)."""
+        cols = zip(self.symbols, self.open.tolist(), self.high.tolist(), self.low.tolist(),
+                   self.close.tolist(), self.volume.tolist())
+        return [MarketEvent(self.timestamp, s, o, h, l, c, v) for s, o, h, l, c, v in cols]
+
+@dataclass(frozen=True, slots=True)
 class SignalEvent(Event):
     """Strategy signal: LONG/SHORT/EXIT, with optional strength."""
     timestamp: datetime
@@ -22,9 +55,14 @@ class SignalEvent(Event):
     direction: str  # "LONG" | "SHORT" | "EXIT"
     strength: float = 1.0
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class OrderEvent(Event):
-    """Order to be executed: MARKET/LIMIT/STOP with size."""
+    """
+    Order to be executed: MARKET/LIMIT/STOP with size.
+    LIMIT/STOP orders rest until triggered; expiry=None means good-till-cancel.
+    order_id (unique among resting orders) lets the caller cancel a resting order; without one the
+    execution handler assigns an id (see SimulatedExecutionHandler.last_order_id).
+    """
     timestamp: datetime
     symbol: str
     order_type: str  # "MARKET" | "LIMIT" | "STOP"
@@ -32,8 +70,10 @@ class OrderEvent(Event):
     direction: str   # "BUY" | "SELL"
     limit_price: Optional[float] = None
     stop_price: Optional[float] = None
+    expiry: Optional[datetime] = None
+    order_id: Optional[int] = None
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class FillEvent(Event):
     """Result of order execution: price, quantity, fees, slippage."""
     timestamp: datetime
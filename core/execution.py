@@ -1,15 +1,44 @@
 # core/execution.py
-from typing import Dict
-from .events import MarketEvent, OrderEvent, FillEvent
+from datetime import datetime
+from itertools import count
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import heapq
+from .events import MarketEvent, MarketBatchEvent, OrderEvent, FillEvent
 from .event_queue import EventQueue
 from .commission import CommissionModel
 from .slippage import SlippageModel
 
+
+class _OrderBook:
+    """
+    Resting orders for one symbol. Each heap holds (price key, sequence, order_id) with the order
+    closest to triggering on top: buy limits by highest limit, sell limits by lowest limit,
+    buy stops by lowest stop, sell stops by highest stop. Cancelled and expired orders are
+    removed lazily when they reach the top.
+    """
+    __slots__ = ("buy_limit", "sell_limit", "buy_stop", "sell_stop", "expiry")
+
+    def __init__(self):
+        self.buy_limit: List[Tuple[float, int, int]] = []
+        self.sell_limit: List[Tuple[float, int, int]] = []
+        self.buy_stop: List[Tuple[float, int, int]] = []
+        self.sell_stop: List[Tuple[float, int, int]] = []
+        self.expiry: List[Tuple[datetime, int, int]] = []
+
+
 class SimulatedExecutionHandler:
     """
     A simulated execution handler for backtesting.
     It consumes OrderEvents and produces FillEvents, modeling
     commission and slippage.
+
+    MARKET orders fill at the latest bar's open. LIMIT and STOP orders rest in a per-symbol
+    book and are checked against each later bar of that symbol: a buy limit fills when the
+    low reaches the limit (at the better of open and limit), a sell limit when the high does,
+    a buy stop when the high reaches the stop and a sell stop when the low does (at the worse
+    of open and stop, then slippage, since a triggered stop trades as a market order).
+    Orders whose expiry is before the bar's timestamp are dropped first. Work per bar is
+    proportional to the orders that trigger or expire, not to the number resting.
     """
     def __init__(
         self,
@@ -20,39 +49,227 @@ class SimulatedExecutionHandler:
         self.event_queue = event_queue
         self.commission_model = commission_model
         self.slippage_model = slippage_model
-        # Cache of the most recent market event per symbol
-        self._latest_market_events: Dict[str, MarketEvent] = {}
+        # Most recent bar per symbol as (timestamp, open, high, low, close, volume)
+        self._latest_bars: Dict[str, Tuple[datetime, float, float, float, float, float]] = {}
+        self._books: Dict[str, _OrderBook] = {}
+        # order_id -> (sequence, order); heap entries whose sequence no longer matches are stale
+        self._resting: Dict[int, Tuple[int, OrderEvent]] = {}
+        self._seq = count()
+        # Orders sent without an order_id get negative ids, so they never collide with the caller's
+        self._next_id = count(-1, -1)
+        # Id of the most recently rested order, for callers that let the handler assign it
+        self.last_order_id: Optional[int] = None
+        self.expired_count = 0
+        self.cancelled_count = 0
 
     def on_market(self, event: MarketEvent):
-        """Updates the latest market data for a symbol."""
-        self._latest_market_events[event.symbol] = event
+        """Updates the latest market data for a symbol and matches its resting orders."""
+        self._latest_bars[event.symbol] = (event.timestamp, event.open, event.high, event.low, event.close, event.volume)
+        if event.symbol in self._books:
+            self._match(event.symbol, event.timestamp, event.open, event.high, event.low)
+        # After matching: orders triggered inside this bar must not see its volume/close
+        self.slippage_model.on_market(event)
+
+    def on_market_batch(self, event: MarketBatchEvent):
+        """Updates the latest market data for every symbol in a per-timestamp batch."""
+        ts = event.timestamp
+        cols = zip(event.symbols, event.open.tolist(), event.high.tolist(), event.low.tolist(),
+                   event.close.tolist(), event.volume.tolist())
+        latest = self._latest_bars
+        books = self._books
+        for s, o, h, l, c, v in cols:
+            latest[s] = (ts, o, h, l, c, v)
+            if s in books:
+                self._match(s, ts, o, h, l)
+        self.slippage_model.on_market_batch(event)
 
     def on_order(self, event: OrderEvent):
         """Simulates the execution of an order."""
+        if event.order_type in ("LIMIT", "STOP"):
+            self._rest(event)
+            return
+
         sym = event.symbol
-        if sym not in self._latest_market_events:
+        if sym not in self._latest_bars:
             print(f"WARN: No market data for {sym} to execute order.")
             return
 
-        latest_data = self._latest_market_events[sym]
-        
+        bar_time, bar_open = self._latest_bars[sym][:2]
+
         # Assumption: MARKET orders fill at the next bar's open price.
         # This is a common and reasonably realistic assumption.
-        base_fill_price = float(latest_data.ohlcv["open"])
+        self._fill(event, bar_time, float(bar_open), apply_slippage=True)
+
+    def cancel(self, order_id: int) -> bool:
+        """Cancels a resting order; returns False if it already filled, expired or never rested."""
+        if self._resting.pop(order_id, None) is None:
+            return False
+        self.cancelled_count += 1
+        return True
+
+    def open_orders(self, symbol: Optional[str] = None) -> Dict[int, OrderEvent]:
+        """Resting orders by id, optionally for one symbol."""
+        return {oid: o for oid, (_, o) in self._resting.items() if symbol is None or o.symbol == symbol}
+
+    def _rest(self, order: OrderEvent) -> Optional[int]:
+        """Rests a LIMIT/STOP order and returns its id (also kept in last_order_id)."""
+        is_limit = order.order_type == "LIMIT"
+        price = order.limit_price if is_limit else order.stop_price
+        if price is None:
+            print(f"WARN: {order.order_type} order for {order.symbol} has no {'limit' if is_limit else 'stop'} price.")
+            return None
+        if order.order_id is None:
+            oid = next(self._next_id)
+            while oid in self._resting:
+                oid = next(self._next_id)
+        elif order.order_id in self._resting:
+            raise ValueError(f"order_id {order.order_id} is already resting")
+        else:
+            oid = order.order_id
+        seq = next(self._seq)
+        book = self._books.get(order.symbol)
+        if book is None:
+            book = self._books[order.symbol] = _OrderBook()
+        buy = order.direction == "BUY"
+        price = float(price)
+        if is_limit:
+            heapq.heappush(book.buy_limit if buy else book.sell_limit, (-price if buy else price, seq, oid))
+        else:
+            heapq.heappush(book.buy_stop if buy else book.sell_stop, (price if buy else -price, seq, oid))
+        if order.expiry is not None:
+            heapq.heappush(book.expiry, (order.expiry, seq, oid))
+        self._resting[oid] = (seq, order)
+        self.last_order_id = oid
+        return oid
+
+    def _match(self, sym: str, ts: datetime, o: float, h: float, l: float):
+        book = self._books[sym]
+        resting = self._resting
+        heap = book.expiry
+        while heap and heap[0][0] < ts:
+            _, seq, oid = heapq.heappop(heap)
+            entry = resting.get(oid)
+            if entry is not None and entry[0] == seq:
+                del resting[oid]
+                self.expired_count += 1
 
+        # Keys are negated prices for buy limits and sell stops, so every heap triggers on key <= threshold
+        self._trigger(book.buy_limit, -l, -1, ts, o, apply_slippage=False)
+        self._trigger(book.sell_limit, h, 1, ts, o, apply_slippage=False)
+        self._trigger(book.buy_stop, h, 1, ts, o, apply_slippage=True)
+        self._trigger(book.sell_stop, -l, -1, ts, o, apply_slippage=True)
+
+    def _trigger(self, heap, threshold: float, sign: int, ts: datetime, o: float, apply_slippage: bool):
+        """Pops and fills every live order with key <= threshold, at the price or a better/gapped open."""
+        resting = self._resting
+        while heap:
+            key, seq, oid = heap[0]
+            entry = resting.get(oid)
+            if entry is not None and entry[0] == seq:
+                if key > threshold:
+                    return
+                del resting[oid]
+                # sign * max(sign * open, key): min(open, price) for negated keys, max(open, price) otherwise
+                self._fill(entry[1], ts, sign * max(sign * o, key), apply_slippage)
+            heapq.heappop(heap)
+
+    def _fill(self, order: OrderEvent, timestamp: datetime, base_fill_price: float, apply_slippage: bool) -> FillEvent:
         # 1. Apply slippage model
-        final_fill_price = self.slippage_model.calculate(event, base_fill_price)
+        if apply_slippage:
+            final_fill_price = self.slippage_model.calculate(order, base_fill_price)
+        else:
+            final_fill_price = base_fill_price
 
         # 2. Apply commission model
-        commission = self.commission_model.calculate(event.quantity, final_fill_price)
+        commission = self.commission_model.calculate(order.quantity, final_fill_price)
+
+        # Slippage cost in currency, positive when the fill is worse than the reference price
+        slip_per_unit = final_fill_price - base_fill_price if order.direction == "BUY" else base_fill_price - final_fill_price
 
         # 3. Create and queue the FillEvent
         fill = FillEvent(
-            timestamp=latest_data.timestamp,
-            symbol=sym,
-            quantity=event.quantity,
-            direction=event.direction,
+            timestamp=timestamp,
+            symbol=order.symbol,
+            quantity=order.quantity,
+            direction=order.direction,
             fill_price=final_fill_price,
-            commission=commission
+            commission=commission,
+            slippage=slip_per_unit * order.quantity,
         )
-        self.event_queue.put(fill)
\ No newline at end of file
+        self.event_queue.put(fill)
+        return fill
+
+
+class Allocation(NamedTuple):
+    """Share of a netted fill given back to one originating order."""
+    order: OrderEvent
+    quantity: int
+    price: float
+    commission: float
+
+
+class NettingExecutionHandler(SimulatedExecutionHandler):
+    """
+    Collects the MARKET orders of one timestamp and, on flush(), nets them per symbol into a
+    single parent order that is filled once (one FillEvent, one slippage and commission charge
+    on the net quantity). The opposing quantity crosses internally at the bar's open.
+
+    Each originating order is then allocated its full quantity. Minority-side orders get the open
+    with no costs. Majority-side orders share one blended price and the parent commission pro rata.
+    Allocated cash flows therefore sum to the parent fill. LIMIT/STOP orders rest as in the base class.
+    Drivers call flush() once every order for the timestamp is in (EventDispatcher.add_step_hook).
+    keep_allocations=True records every Allocation in `allocations` (an audit trail that grows
+    with the run, so it is off by default).
+    """
+    def __init__(self, event_queue: EventQueue, commission_model: CommissionModel, slippage_model: SlippageModel,
+                 keep_allocations: bool = False):
+        super().__init__(event_queue, commission_model, slippage_model)
+        self.keep_allocations = keep_allocations
+        self.allocations: List[Allocation] = []
+        self._pending: Dict[str, List[OrderEvent]] = {}
+        self.orders_received = 0
+        self.fills_emitted = 0
+
+    def on_order(self, event: OrderEvent):
+        if event.order_type in ("LIMIT", "STOP"):
+            self._rest(event)
+            return
+        self.orders_received += 1
+        self._pending.setdefault(event.symbol, []).append(event)
+
+    def flush(self):
+        """Nets and fills every pending MARKET order at the latest bar of its symbol."""
+        pending, self._pending = self._pending, {}
+        for sym, orders in pending.items():
+            if sym not in self._latest_bars:
+                print(f"WARN: No market data for {sym} to execute order.")
+                continue
+            bar_time, bar_open = self._latest_bars[sym][:2]
+            base = float(bar_open)
+            if len(orders) == 1:
+                order = orders[0]
+                fill = self._fill(order, bar_time, base, apply_slippage=True)
+                self.fills_emitted += 1
+                if self.keep_allocations:
+                    self.allocations.append(Allocation(order, order.quantity, fill.fill_price, fill.commission))
+                continue
+
+            buy_qty = sum(o.quantity for o in orders if o.direction == "BUY")
+            sell_qty = sum(o.quantity for o in orders if o.direction == "SELL")
+            net = buy_qty - sell_qty
+            fill = None
+            if net:
+                parent = OrderEvent(orders[-1].timestamp, sym, "MARKET", abs(net), "BUY" if net > 0 else "SELL")
+                fill = self._fill(parent, bar_time, base, apply_slippage=True)
+                self.fills_emitted += 1
+            if not self.keep_allocations:
+                continue
+            major = "BUY" if net > 0 else "SELL"
+            major_qty = buy_qty if net > 0 else sell_qty
+            crossed = min(buy_qty, sell_qty)
+            for o in orders:
+                if fill is None or o.direction != major:
+                    self.allocations.append(Allocation(o, o.quantity, base, 0.0))
+                else:
+                    price = (crossed * base + abs(net) * fill.fill_price) / major_qty
+                    self.allocations.append(Allocation(o, o.quantity, price, fill.commission * o.quantity / major_qty))
@@ -0,0 +1,240 @@
+# core/feature_cache.py
+import hashlib
+import json
+import os
+import shutil
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+from .feature_engine import REGISTRY, FeatureRegistry, make_features_fast
+from .labeling import get_triple_barrier_labels_fast
+
+# Bump when a cached computation changes, so old entries stop matching
+CACHE_VERSION = 1
+# Least history recomputed before an appended feature tail; plans reaching further back recompute
+# their own lookback, plans with an undeclared lookback recompute everything
+FEATURE_LOOKBACK = 256
+
+
+def params_id(params: Dict[str, Any]) -> str:
+    blob = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha1(blob.encode()).hexdigest()[:16]
+
+
+def _index_ns(index: pd.DatetimeIndex) -> np.ndarray:
+    return np.asarray(index.as_unit("ns").asi8, dtype=np.int64)
+
+
+def _index_from_ns(ns: np.ndarray, tz: Optional[str], unit: str = "ns") -> pd.DatetimeIndex:
+    idx = pd.DatetimeIndex(pd.to_datetime(ns, unit="ns", utc=True))
+    idx = idx.tz_convert(tz) if tz else idx.tz_localize(None)
+    return idx.as_unit(unit)
+
+
+def bars_fingerprint(df: pd.DataFrame, n_rows: Optional[int] = None) -> str:
+    """Hash of the first n_rows bars (timestamps and every numeric column)."""
+    part = df if n_rows is None else df.iloc[:n_rows]
+    h = hashlib.blake2b(digest_size=16)
+    h.update(np.ascontiguousarray(_index_ns(part.index)).tobytes())
+    for col in sorted(part.columns):
+        h.update(col.encode())
+        h.update(np.ascontiguousarray(part[col].to_numpy(dtype=np.float64)).tobytes())
+    return h.hexdigest()
+
+
+class FeatureCache:
+    """
+    On-disk cache of feature matrices and triple-barrier label frames, one entry per
+    (symbol, kind, parameters) under `root`. An entry is a directory of .npy columns plus meta.json
+    recording the row count and a fingerprint of the bars it was computed from. A lookup:
+    - returns the stored frame when the bars are unchanged (hit);
+    - computes only the new rows when the stored bars are a prefix of the new ones (extend),
+      recomputing the overlap that depends on them: the plan's lookback (at least FEATURE_LOOKBACK)
+      rows of history for features,
+      the last `tmax` labels whose vertical barrier was cut off by the end of the data;
+    - recomputes everything otherwise (miss).
+    Entries are written atomically. After each write the least recently used entries are evicted
+    until the cache fits in `max_bytes`.
+    """
+    def __init__(self, root: str = os.path.join("artifacts", "cache"), max_bytes: int = 2 * 2 ** 30):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+        self.hits = 0
+        self.extends = 0
+        self.misses = 0
+
+    # --- public lookups ---
+
+    def features(self, df: pd.DataFrame, symbol: str, price_col: str = "close", vol_col: str = "volume",
+                 columns: Optional[Sequence[str]] = None,
+                 compute: Callable[..., pd.DataFrame] = make_features_fast,
+                 registry: FeatureRegistry = REGISTRY) -> pd.DataFrame:
+        """
+        `columns` selects a subset of the registry's features (make_features_fast only). Entries are
+        keyed on the resolved column list and the registry's fingerprint, so registering a feature
+        invalidates them instead of extending a frame that lacks its column.
+        """
+        plan = registry.plan(columns)
+        resolved = plan.columns
+        # A custom compute is assumed to use windows no longer than the built-in features
+        lookback = plan.lookback if compute is make_features_fast else FEATURE_LOOKBACK
+        params = {"kind": "features", "fn": getattr(compute, "__name__", str(compute)),
+                  "columns": resolved, "registry": registry.fingerprint(),
+                  "price_col": price_col, "vol_col": vol_col, "version": CACHE_VERSION}
+        extra = {} if columns is None else {"columns": columns}
+        if registry is not REGISTRY:
+            extra["registry"] = registry
+
+        def full(bars):
+            return compute(bars, price_col=price_col, vol_col=vol_col, **extra)
+
+        def tail(bars, n_cached):
+            if lookback is None:
+                return 0, full(bars)
+            start = max(0, n_cached - max(lookback, FEATURE_LOOKBACK))
+            return n_cached, full(bars.iloc[start:]).iloc[n_cached - start:]
+
+        expect = resolved if compute is make_features_fast else None
+        return self._lookup(symbol, params, df, full, tail, expect)
+
+    def labels(self, df: pd.DataFrame, symbol: str, profit_take: float, stop_loss: float, tmax: int,
+               price_col: str = "close",
+               compute: Callable[..., pd.DataFrame] = get_triple_barrier_labels_fast) -> pd.DataFrame:
+        params = {"kind": "labels", "fn": getattr(compute, "__name__", str(compute)), "profit_take": profit_take,
+                  "stop_loss": stop_loss, "tmax": tmax, "price_col": price_col, "version": CACHE_VERSION}
+
+        def full(bars):
+            return compute(bars[price_col], bars.index, profit_take, stop_loss, tmax)
+
+        def tail(bars, n_cached):
+            # Labels of the last tmax cached events looked past the end of the old data
+            start = max(0, n_cached - tmax)
+            return start, full(bars.iloc[start:])
+
+        return self._lookup(symbol, params, df, full, tail)
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+        os.makedirs(self.root, exist_ok=True)
+
+    def stats(self) -> Dict[str, int]:
+        entries = self._entries()
+        return {"hits": self.hits, "extends": self.extends, "misses": self.misses,
+                "entries": len(entries), "bytes": sum(e["bytes"] for e in entries)}
+
+    # --- storage ---
+
+    def _dir(self, symbol: str, key: str) -> str:
+        return os.path.join(self.root, f"{symbol}__{key}")
+
+    def _lookup(self, symbol: str, params: Dict[str, Any], df: pd.DataFrame,
+                full: Callable[[pd.DataFrame], pd.DataFrame],
+                tail: Callable[[pd.DataFrame, int], Tuple[int, pd.DataFrame]],
+                columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """`columns`, when given, must match the stored entry's columns for it to be reused."""
+        path = self._dir(symbol, params_id(params))
+        meta = self._read_meta(path)
+        n = len(df)
+        if (meta is not None and meta["n_bars"] <= n
+                and (columns is None or [c for c, _ in meta["columns"]] == list(columns))
+                and bars_fingerprint(df, meta["n_bars"]) == meta["fingerprint"]):
+            cached = self._read_frame(path, meta)
+            if meta["n_bars"] == n:
+                self.hits += 1
+                self._touch(path, meta)
+                return cached
+            start, new = tail(df, meta["n_bars"])
+            if new is not None and len(new):
+                cut = df.index[start]
+                cached = pd.concat([cached[cached.index < cut], new[new.index >= cut]])
+            self.extends += 1
+            result = cached
+        else:
+            self.misses += 1
+            result = full(df)
+        if result is None:
+            return result
+        self._write(path, result, {"symbol": symbol, "params": params, "n_bars": n,
+                                   "fingerprint": bars_fingerprint(df)})
+        self._evict(keep=path)
+        return result
+
+    @staticmethod
+    def _read_meta(path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(os.path.join(path, "meta.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _read_frame(path: str, meta: Dict[str, Any]) -> pd.DataFrame:
+        index = _index_from_ns(np.load(os.path.join(path, "index.npy")), meta["tz"], meta["unit"])
+        data = {}
+        for j, (col, kind) in enumerate(meta["columns"]):
+            arr = np.load(os.path.join(path, f"c{j}.npy"))
+            # kind is "values" or the unit of a datetime column
+            data[col] = arr if kind == "values" else _index_from_ns(arr, meta["tz"], kind)
+        frame = pd.DataFrame(data, index=index)
+        frame.index.name = meta["index_name"]
+        return frame
+
+    def _write(self, path: str, frame: pd.DataFrame, meta: Dict[str, Any]):
+        tmp = f"{path}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        tz = frame.index.tz
+        np.save(os.path.join(tmp, "index.npy"), _index_ns(frame.index))
+        columns = []
+        for j, col in enumerate(frame.columns):
+            s = frame[col]
+            if isinstance(s.dtype, pd.DatetimeTZDtype) or pd.api.types.is_datetime64_dtype(s.dtype):
+                idx = pd.DatetimeIndex(s)
+                np.save(os.path.join(tmp, f"c{j}.npy"), _index_ns(idx))
+                columns.append((col, idx.unit))
+            else:
+                np.save(os.path.join(tmp, f"c{j}.npy"), s.to_numpy())
+                columns.append((col, "values"))
+        meta = dict(meta, tz=str(tz) if tz is not None else None, unit=frame.index.unit,
+                    index_name=frame.index.name, columns=columns,
+                    bytes=sum(os.path.getsize(os.path.join(tmp, f)) for f in os.listdir(tmp)),
+                    last_used=time.time())
+        with open(os.path.join(tmp, "meta.json"), "w") as f:
+            json.dump(meta, f)
+        if os.path.exists(path):
+            old = f"{path}.old-{os.getpid()}"
+            os.replace(path, old)
+            os.replace(tmp, path)
+            shutil.rmtree(old, ignore_errors=True)
+        else:
+            os.replace(tmp, path)
+
+    def _touch(self, path: str, meta: Dict[str, Any]):
+        meta["last_used"] = time.time()
+        tmp = os.path.join(path, "meta.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(path, "meta.json"))
+
+    def _entries(self):
+        out = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            meta = self._read_meta(path) if os.path.isdir(path) else None
+            if meta is not None:
+                out.append({"path": path, "bytes": meta["bytes"], "last_used": meta["last_used"]})
+        return out
+
+    def _evict(self, keep: Optional[str] = None):
+        entries = sorted(self._entries(), key=lambda e: e["last_used"])
+        total = sum(e["bytes"] for e in entries)
+        for e in entries:
+            if total <= self.max_bytes:
+                break
+            if e["path"] == keep:
+                continue
+            shutil.rmtree(e["path"], ignore_errors=True)
+            total -= e["bytes"]
@@ -1,9 +1,9 @@
 # core/hrp_sizer.py
 import numpy as np
 import pandas as pd
-from scipy.cluster.hierarchy import linkage, dendrogram
+from scipy.cluster.hierarchy import linkage, dendrogram, leaves_list
 from scipy.spatial.distance import squareform
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 
 class HRPSizer:
     """
@@ -17,18 +17,20 @@ class HRPSizer:
         return squareform(dist)
 
     def _get_quasi_diag(self, link: np.ndarray) -> List[int]:
-        # Sort items based on hierarchical clustering
+        # Sort items based on hierarchical clustering: start from the root's two children and
+        # replace every cluster id (>= number of items) by its children until only leaves remain
         link = link.astype(int)
-        sort_ix = pd.Series([link[0, 0], link[0, 1]])
-        for i in range(1, link.shape[0]):
-            a, b = link[i, 0], link[i, 1]
-            if a in sort_ix.index:
-                pos = sort_ix.index.get_loc(a)
-                sort_ix = pd.concat([sort_ix.iloc[:pos+1], pd.Series([b]), sort_ix.iloc[pos+1:]])
-            else:
-                pos = sort_ix.index.get_loc(b)
-                sort_ix = pd.concat([sort_ix.iloc[:pos], pd.Series([a]), sort_ix.iloc[:pos:]])
-        return sort_ix.tolist()
+        num_items = link.shape[0] + 1
+        sort_ix = [link[-1, 0], link[-1, 1]]
+        while max(sort_ix) >= num_items:
+            expanded = []
+            for k in sort_ix:
+                if k >= num_items:
+                    expanded.extend((link[k - num_items, 0], link[k - num_items, 1]))
+                else:
+                    expanded.append(k)
+            sort_ix = expanded
+        return [int(k) for k in sort_ix]
 
     def _get_cluster_var(self, cov: pd.DataFrame, cluster_items: List[int]) -> float:
         # Compute variance of a cluster
@@ -87,4 +89,119 @@ class HRPSizer:
         # Apply sides and normalize
         final_weights = {sym: hrp_weights.get(sym, 0.0) * sides[sym] for sym in active_symbols}
         
-        return final_weights
\ No newline at end of file
+        return final_weights
+
+
+class FastHRPSizer:
+    """
+    HRPSizer on NumPy arrays end to end, for large universes.
+    - Seriation is scipy's leaves_list (the same leaf order as the quasi-diagonalization).
+    - Recursive bisection runs level by level: cluster variances of the inverse-variance
+      portfolio come from 2-D prefix sums of cov_ij / (var_i var_j). Each cluster is O(1)
+      and a level is a handful of vector ops.
+    - The previous linkage order is reused while the symbol set is unchanged and no
+      correlation has moved by more than `corr_tol` since it was computed.
+    """
+    def __init__(self, corr_tol: float = 0.02, method: str = "single"):
+        self.corr_tol = corr_tol
+        self.method = method
+        self._cache: Optional[Tuple[Tuple[str, ...], np.ndarray, np.ndarray]] = None
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @staticmethod
+    def _cov_corr(returns: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        x = returns.to_numpy(dtype=np.float64)
+        if np.isnan(x).any():
+            # Pairwise-complete estimates, as pandas computes them
+            return returns.cov().to_numpy(), returns.corr().to_numpy()
+        x = x - x.mean(axis=0)
+        cov = (x.T @ x) / (len(x) - 1)  # X'X runs as a symmetric rank-k update
+        std = np.sqrt(np.diag(cov))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = cov / np.outer(std, std)
+        np.fill_diagonal(corr, 1.0)
+        return cov, corr
+
+    def _order(self, symbols: Tuple[str, ...], corr: np.ndarray) -> np.ndarray:
+        cached = self._cache
+        if cached is not None and cached[0] == symbols and np.nanmax(np.abs(corr - cached[1])) <= self.corr_tol:
+            self.cache_hits += 1
+            return cached[2]
+        self.cache_misses += 1
+        n = corr.shape[0]
+        iu = np.triu_indices(n, k=1)
+        dist = np.sqrt(np.clip((1.0 - corr[iu]) / 2.0, 0.0, None))
+        order = leaves_list(linkage(dist, self.method))
+        self._cache = (symbols, corr, order)
+        return order
+
+    @staticmethod
+    def bisection_weights(cov: np.ndarray) -> np.ndarray:
+        """HRP weights for assets already in seriation order (recursive bisection by halves)."""
+        n = cov.shape[0]
+        ivar = 1.0 / np.diag(cov)
+        # Cluster [a, b): var = sum(M[a:b, a:b]) / sum(ivar[a:b])^2 with M = ivar_i * cov_ij * ivar_j
+        m = np.zeros((n + 1, n + 1))
+        inner = m[1:, 1:]
+        np.multiply(cov, ivar[:, None], out=inner)
+        inner *= ivar[None, :]
+        np.cumsum(inner, axis=0, out=inner)
+        np.cumsum(inner, axis=1, out=inner)
+        iv = np.r_[0.0, np.cumsum(ivar)]
+
+        def cluster_var(a, b):
+            block = m[b, b] - m[a, b] - m[b, a] + m[a, a]
+            return block / (iv[b] - iv[a]) ** 2
+
+        w = np.ones(n)
+        # Ranges of the current level cover [0, n) in order; singletons carry through with factor 1
+        starts, ends = np.array([0]), np.array([n])
+        while True:
+            split = ends - starts > 1
+            if not split.any():
+                return w
+            mid = starts + (ends - starts) // 2
+            alpha = np.ones(len(starts))
+            v1, v2 = cluster_var(starts[split], mid[split]), cluster_var(mid[split], ends[split])
+            alpha[split] = 1.0 - v1 / (v1 + v2)
+
+            parent = np.repeat(np.arange(len(starts)), np.where(split, 2, 1))
+            first = np.r_[True, parent[1:] != parent[:-1]]
+            split_p = split[parent]
+            starts, ends = (np.where(first, starts[parent], mid[parent]),
+                            np.where(first & split_p, mid[parent], ends[parent]))
+            factors = np.where(split_p, np.where(first, alpha[parent], 1.0 - alpha[parent]), 1.0)
+            w *= np.repeat(factors, ends - starts)
+
+    def get_target_weights(
+        self,
+        sides: Dict[str, int],
+        returns_window: pd.DataFrame
+    ) -> Dict[str, float]:
+        """Same contract and weights as HRPSizer.get_target_weights."""
+        active_symbols = list(sides.keys())
+        if not active_symbols:
+            return {}
+        if len(active_symbols) == 1:
+            return {active_symbols[0]: 1.0 * sides[active_symbols[0]]}
+
+        cov, corr = self._cov_corr(returns_window[active_symbols])
+        weights = self.weights_from_cov(cov, tuple(active_symbols), corr)
+        return {sym: float(weights[i]) * sides[sym] for i, sym in enumerate(active_symbols)}
+
+    def weights_from_cov(self, cov: np.ndarray, symbols: Tuple[str, ...],
+                         corr: Optional[np.ndarray] = None) -> np.ndarray:
+        """Long-only HRP weights (summing to 1) for a covariance matrix whose rows follow `symbols`."""
+        if len(symbols) == 1:
+            return np.ones(1)
+        if corr is None:
+            std = np.sqrt(np.diag(cov))
+            with np.errstate(divide="ignore", invalid="ignore"):
+                corr = cov / np.outer(std, std)
+            np.fill_diagonal(corr, 1.0)
+        order = self._order(symbols, corr)
+        w_sorted = self.bisection_weights(cov.take(order, axis=0).take(order, axis=1))
+        weights = np.empty(len(order))
+        weights[order] = w_sorted
+        return weights
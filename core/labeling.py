@@ -1,4 +1,5 @@
 
+from typing import Dict, Optional, Tuple
 import pandas as pd
 import numpy as np
 
@@ -78,3 +79,192 @@ def get_triple_barrier_labels(
         return None
 
     return pd.DataFrame(results).set_index('t_event')
+
+
+def _touch_tables(p: np.ndarray, n_levels: int):
+    """
+    Sparse tables of running max and min: level k holds the max/min of p[j : j + 2**k].
+    NaN never touches a barrier, so it is -inf in the max table and +inf in the min table.
+    """
+    hi = [np.where(np.isnan(p), -np.inf, p)]
+    lo = [np.where(np.isnan(p), np.inf, p)]
+    for k in range(1, n_levels):
+        half = 1 << (k - 1)
+        h, l = hi[-1].copy(), lo[-1].copy()
+        np.maximum(h[:-half], hi[-1][half:], out=h[:-half])
+        np.minimum(l[:-half], lo[-1][half:], out=l[:-half])
+        hi.append(h)
+        lo.append(l)
+    return hi, lo
+
+
+def _first_touch(table, start: np.ndarray, end: np.ndarray, skip) -> np.ndarray:
+    """
+    First j in [start, end] whose value is not skipped, by binary lifting: from the widest level
+    down, jump over each block that lies inside the path and is skipped entirely. end + 1 if none.
+    """
+    pos = start.copy()
+    last = len(table[0]) - 1
+    for k in range(len(table) - 1, -1, -1):
+        step = 1 << k
+        jump = (pos + (step - 1) <= end) & skip(table[k][np.minimum(pos, last)])
+        pos += step * jump
+    return pos
+
+
+def triple_barrier_arrays(
+    prices: np.ndarray,
+    starts: np.ndarray,
+    profit_take_pct: float,
+    stop_loss_pct: float,
+    time_limit_periods: int,
+    chunk: int = 1 << 16,
+):
+    """
+    Vectorized triple-barrier outcome for events at positions `starts` of a price array.
+    Each event's path is prices[start : start + time_limit_periods + 1] (cut at the end of the
+    data), and its first upper and lower touches are found for all events at once. That costs
+    O(log time_limit_periods) array passes per chunk of events, instead of a scan per event.
+
+    Returns:
+        (label, final_pos, ret) arrays, with the same rules as get_triple_barrier_labels: the
+        earlier touch wins, a tie counts as profit take, and without a touch the event ends at the
+        vertical barrier with label 0.
+    """
+    label, final, ret = triple_barrier_grid_arrays(
+        prices, starts, [(profit_take_pct, stop_loss_pct, time_limit_periods)], chunk=chunk)
+    return label[0], final[0], ret[0]
+
+
+def get_triple_barrier_labels_fast(
+    prices: pd.Series,
+    events: pd.DatetimeIndex,
+    profit_take_pct: float,
+    stop_loss_pct: float,
+    time_limit_periods: int
+) -> pd.DataFrame:
+    """
+    Drop-in for get_triple_barrier_labels built on triple_barrier_arrays; returns the same
+    'label'/'t_final'/'ret' frame indexed by 't_event'. The prices index must be unique and sorted.
+    """
+    events = events.intersection(prices.index)
+    if not len(events):
+        return None
+    starts = prices.index.get_indexer(events)
+    label, final, ret = triple_barrier_arrays(
+        prices.to_numpy(), starts, profit_take_pct, stop_loss_pct, time_limit_periods)
+    out = pd.DataFrame({"t_final": prices.index[final], "label": label, "ret": ret},
+                       index=prices.index[starts])
+    out.index.name = "t_event"
+    return out
+
+
+def triple_barrier_grid_arrays(
+    prices: np.ndarray,
+    starts: np.ndarray,
+    configs,
+    vol: Optional[np.ndarray] = None,
+    chunk: int = 1 << 16,
+):
+    """
+    Triple-barrier outcomes for a grid of (profit_take_pct, stop_loss_pct, time_limit_periods)
+    configs in one pass. Per chunk of events, the max/min tables are built once, up to the longest
+    time limit. The first touch is searched once per distinct barrier level over that horizon.
+    A config's labels then follow from comparing those touch times with its own vertical barrier,
+    so adding time limits to the grid is almost free.
+    With `vol` (one value per event), barriers are p0 * (1 + pt * vol) and p0 * (1 - sl * vol), so
+    pt and sl become multiples of e.g. an rv_* feature; events with NaN vol never touch.
+
+    Returns:
+        (label, final_pos, ret) arrays of shape (n_configs, n_events). Without vol each row equals
+        triple_barrier_arrays for that config.
+    """
+    configs = [(float(pt), float(sl), int(tmax)) for pt, sl, tmax in configs]
+    p = np.asarray(prices)
+    if not np.issubdtype(p.dtype, np.floating):
+        p = p.astype(np.float64)
+    starts = np.asarray(starts, dtype=np.int64)
+    n = len(p)
+    horizon = max((c[2] for c in configs), default=0)
+    label = np.zeros((len(configs), len(starts)), dtype=np.int64)
+    final = np.empty((len(configs), len(starts)), dtype=np.int64)
+    n_levels = max(1, int(horizon + 1).bit_length())
+    for c0 in range(0, len(starts), chunk):
+        s = starts[c0:c0 + chunk]
+        if not len(s):
+            continue
+        # Tables cover only the prices this chunk's paths can reach
+        lo_pos, hi_pos = int(s.min()), min(int(s.max()) + horizon, n - 1)
+        seg = p[lo_pos:hi_pos + 1]
+        hi, lo = _touch_tables(seg, n_levels)
+        start = s - lo_pos
+        end = np.minimum(start + horizon, hi_pos - lo_pos)
+        p0 = seg[start]
+        v = None if vol is None else np.asarray(vol, dtype=np.float64)[c0:c0 + chunk]
+        never = np.iinfo(np.int64).max
+
+        def touches(table, levels, barrier, skip, touched):
+            # First touch per distinct level over the full horizon (`never` if none)
+            out = {}
+            for x in levels:
+                b = barrier(x)
+                t = _first_touch(table, start, end, lambda m: skip(m, b))
+                ok = (t <= end) & touched(table[0][np.minimum(t, len(seg) - 1)], b)
+                out[x] = np.where(ok, t, never)
+            return out
+
+        ups = touches(hi, {c[0] for c in configs},
+                      lambda pt: p0 * (1 + pt) if v is None else p0 * (1 + pt * v),
+                      lambda m, b: m < b, lambda m, b: m >= b)
+        dns = touches(lo, {c[1] for c in configs},
+                      lambda sl: p0 * (1 - sl) if v is None else p0 * (1 - sl * v),
+                      lambda m, b: m > b, lambda m, b: m <= b)
+        # The earlier touch of each (pt, sl) pair decides every time limit: it counts if it comes
+        # before the config's vertical barrier; a tie counts as profit take
+        first = {}
+        for pt, sl, _ in configs:
+            if (pt, sl) not in first:
+                t_up, t_dn = ups[pt], dns[sl]
+                t = np.minimum(t_up, t_dn)
+                first[pt, sl] = t, np.where(t_up <= t_dn, 1, -1)
+        for g, (pt, sl, tmax) in enumerate(configs):
+            last = np.minimum(start + tmax, hi_pos - lo_pos)
+            t, side = first[pt, sl]
+            hit = t <= last
+            label[g, c0:c0 + chunk] = np.where(hit, side, 0)
+            final[g, c0:c0 + chunk] = np.where(hit, t, last) + lo_pos
+    ret = p[final] / p[starts] - 1
+    return label, final, ret
+
+
+def get_triple_barrier_label_grid(
+    prices: pd.Series,
+    events: pd.DatetimeIndex,
+    configs,
+    vol: Optional[pd.Series] = None,
+) -> Dict[Tuple[float, float, int], pd.DataFrame]:
+    """
+    Labels for every (profit_take_pct, stop_loss_pct, time_limit_periods) in `configs` from one
+    pass over the price paths (see triple_barrier_grid_arrays).
+
+    Args:
+        prices: Series of prices indexed by datetime (unique and sorted).
+        events: Timestamps to label.
+        configs: Iterable of (pt, sl, tmax), e.g. itertools.product(pts, sls, tmaxs).
+        vol: Optional per-bar volatility (e.g. make_features_fast(df)["rv_60"]) scaling the
+            barriers; pt and sl are then multiples of it.
+
+    Returns:
+        A dict config -> frame in the get_triple_barrier_labels layout; without vol each frame
+        equals get_triple_barrier_labels for that config.
+    """
+    configs = [(float(pt), float(sl), int(tmax)) for pt, sl, tmax in configs]
+    events = events.intersection(prices.index)
+    if not len(events):
+        return {c: None for c in configs}
+    starts = prices.index.get_indexer(events)
+    v = None if vol is None else vol.reindex(prices.index[starts]).to_numpy(dtype=np.float64)
+    label, final, ret = triple_barrier_grid_arrays(prices.to_numpy(), starts, configs, vol=v)
+    t_event = pd.Index(prices.index[starts], name="t_event")
+    return {c: pd.DataFrame({"t_final": prices.index[final[g]], "label": label[g], "ret": ret[g]}, index=t_event)
+            for g, c in enumerate(configs)}
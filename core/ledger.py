@@ -0,0 +1,195 @@
+# core/ledger.py
+from array import array
+from collections import deque
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+
+from .events import FillEvent
+
+_FILL_COLUMNS = ("timestamp_ns", "symbol_id", "side", "quantity", "price", "commission", "slippage")
+
+
+class TradeLedger:
+    """
+    Records every FillEvent into append-only columnar buffers (array.array, ~7 appends per fill),
+    so it can stay subscribed for million-fill runs. Round trips are reconstructed on demand by
+    FIFO lot matching per symbol; stats() summarises hit rate, win/loss, holding period and
+    commission/slippage drag. save()/load() round-trip the raw fills through a .npz file.
+    """
+    def __init__(self):
+        self.symbols: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self._ts = array("q")
+        self._sym = array("i")
+        self._side = array("b")
+        self._qty = array("q")
+        self._price = array("d")
+        self._commission = array("d")
+        self._slippage = array("d")
+        self.tz: Optional[str] = None
+        self._last_time = None
+        self._last_ns = 0
+
+    def on_fill(self, evt: FillEvent):
+        ts = evt.timestamp
+        if ts is not self._last_time:
+            # Fills from one bar share the timestamp object; convert once per bar
+            stamp = pd.Timestamp(ts)
+            if not self._ts and stamp.tz is not None:
+                self.tz = str(stamp.tz)
+            self._last_time = ts
+            self._last_ns = stamp.value
+        sym_id = self._ids.get(evt.symbol)
+        if sym_id is None:
+            sym_id = self._ids[evt.symbol] = len(self.symbols)
+            self.symbols.append(evt.symbol)
+        self._ts.append(self._last_ns)
+        self._sym.append(sym_id)
+        self._side.append(1 if evt.direction == "BUY" else -1)
+        self._qty.append(int(evt.quantity))
+        self._price.append(float(evt.fill_price))
+        self._commission.append(float(evt.commission))
+        self._slippage.append(float(evt.slippage))
+
+    def __len__(self) -> int:
+        return len(self._ts)
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Zero-copy NumPy views of the fill columns (valid until the next on_fill)."""
+        bufs = (self._ts, self._sym, self._side, self._qty, self._price, self._commission, self._slippage)
+        dtypes = (np.int64, np.int32, np.int8, np.int64, np.float64, np.float64, np.float64)
+        return {name: np.frombuffer(buf, dtype=dt) for name, buf, dt in zip(_FILL_COLUMNS, bufs, dtypes)}
+
+    def _timestamps(self, ns: np.ndarray) -> pd.DatetimeIndex:
+        idx = pd.to_datetime(ns, utc=self.tz is not None)
+        return idx.tz_convert(self.tz) if self.tz is not None else idx
+
+    def fills(self) -> pd.DataFrame:
+        c = self.columns()
+        return pd.DataFrame({
+            "timestamp": self._timestamps(c["timestamp_ns"]),
+            "symbol": np.asarray(self.symbols, dtype=object)[c["symbol_id"]],
+            "direction": np.where(c["side"] > 0, "BUY", "SELL"),
+            "quantity": c["quantity"].copy(),
+            "fill_price": c["price"].copy(),
+            "commission": c["commission"].copy(),
+            "slippage": c["slippage"].copy(),
+        })
+
+    def round_trips(self) -> pd.DataFrame:
+        """
+        FIFO round trips: each closing fill consumes the oldest open lots of the opposite side,
+        and every (entry lot, exit fill) pair becomes one row. A fill that flips the position
+        closes the old lots and opens a new lot with the remainder. Commission and slippage
+        are allocated per unit from both fills; lots still open at the end are not reported.
+        """
+        c = self.columns()
+        out = {k: [] for k in ("symbol_id", "side", "quantity", "entry_ns", "exit_ns", "entry_price",
+                               "exit_price", "commission", "slippage")}
+        books: Dict[int, deque] = {}
+        cols = zip(c["timestamp_ns"].tolist(), c["symbol_id"].tolist(), c["side"].tolist(), c["quantity"].tolist(),
+                   c["price"].tolist(), c["commission"].tolist(), c["slippage"].tolist())
+        for ts, sym, side, qty, price, comm, slip in cols:
+            if qty <= 0:
+                continue
+            comm_u, slip_u = comm / qty, slip / qty
+            book = books.setdefault(sym, deque())
+            # Lots are [side, remaining qty, ts, price, commission/unit, slippage/unit]
+            while qty and book and book[0][0] != side:
+                lot = book[0]
+                take = min(qty, lot[1])
+                out["symbol_id"].append(sym)
+                out["side"].append(lot[0])
+                out["quantity"].append(take)
+                out["entry_ns"].append(lot[2])
+                out["exit_ns"].append(ts)
+                out["entry_price"].append(lot[3])
+                out["exit_price"].append(price)
+                out["commission"].append(take * (lot[4] + comm_u))
+                out["slippage"].append(take * (lot[5] + slip_u))
+                lot[1] -= take
+                qty -= take
+                if lot[1] == 0:
+                    book.popleft()
+            if qty:
+                book.append([side, qty, ts, price, comm_u, slip_u])
+
+        side = np.asarray(out["side"], dtype=np.int8)
+        qty = np.asarray(out["quantity"], dtype=np.int64)
+        entry = np.asarray(out["entry_price"], dtype=np.float64)
+        exit_ = np.asarray(out["exit_price"], dtype=np.float64)
+        commission = np.asarray(out["commission"], dtype=np.float64)
+        pnl = side * qty * (exit_ - entry)
+        entry_time = self._timestamps(np.asarray(out["entry_ns"], dtype=np.int64))
+        exit_time = self._timestamps(np.asarray(out["exit_ns"], dtype=np.int64))
+        return pd.DataFrame({
+            "symbol": np.asarray(self.symbols, dtype=object)[np.asarray(out["symbol_id"], dtype=np.intp)],
+            "side": np.where(side > 0, "LONG", "SHORT"),
+            "quantity": qty,
+            "entry_time": entry_time,
+            "exit_time": exit_time,
+            "holding": exit_time - entry_time,
+            "entry_price": entry,
+            "exit_price": exit_,
+            "gross_pnl": pnl,
+            "commission": commission,
+            "slippage": np.asarray(out["slippage"], dtype=np.float64),
+            "net_pnl": pnl - commission,
+            "return": np.divide(side * (exit_ - entry), entry, out=np.zeros_like(entry), where=entry != 0),
+        })
+
+    def stats(self, trades: Optional[pd.DataFrame] = None) -> Dict[str, object]:
+        """
+        Aggregate trade statistics. PnL figures are net of commission; slippage is already in the
+        fill prices and is reported separately as a cost. Drag is in bps of traded notional.
+        """
+        if trades is None:
+            trades = self.round_trips()
+        c = self.columns()
+        notional = float(np.sum(c["quantity"] * np.abs(c["price"])))
+        commission = float(c["commission"].sum())
+        slippage = float(c["slippage"].sum())
+        net = trades["net_pnl"].to_numpy()
+        wins, losses = net[net > 0], net[net < 0]
+        return {
+            "fills": len(self),
+            "round_trips": len(trades),
+            "hit_rate": float(len(wins) / len(net)) if len(net) else float("nan"),
+            "avg_win": float(wins.mean()) if len(wins) else float("nan"),
+            "avg_loss": float(losses.mean()) if len(losses) else float("nan"),
+            "profit_factor": float(wins.sum() / -losses.sum()) if len(losses) else float("inf"),
+            "net_pnl": float(net.sum()),
+            "avg_holding": trades["holding"].mean() if len(trades) else pd.NaT,
+            "median_holding": trades["holding"].median() if len(trades) else pd.NaT,
+            "traded_notional": notional,
+            "commission": commission,
+            "slippage": slippage,
+            "commission_bps": 1e4 * commission / notional if notional else float("nan"),
+            "slippage_bps": 1e4 * slippage / notional if notional else float("nan"),
+        }
+
+    def print_stats(self):
+        print("\n--- Trade Ledger ---")
+        for key, value in self.stats().items():
+            if isinstance(value, float):
+                print(f"{key:<20}: {value:.4f}")
+            else:
+                print(f"{key:<20}: {value}")
+        print("--------------------")
+
+    def save(self, path: str):
+        """Writes the raw fill columns plus the symbol table to a .npz file."""
+        np.savez(path, symbols=np.asarray(self.symbols, dtype=str), tz=np.asarray(self.tz or ""), **self.columns())
+
+    @classmethod
+    def load(cls, path: str) -> "TradeLedger":
+        self = cls()
+        with np.load(path) as z:
+            self.symbols = z["symbols"].tolist()
+            self._ids = {s: i for i, s in enumerate(self.symbols)}
+            self.tz = str(z["tz"]) or None
+            for name, buf in zip(_FILL_COLUMNS, (self._ts, self._sym, self._side, self._qty, self._price,
+                                                 self._commission, self._slippage)):
+                buf.frombytes(np.ascontiguousarray(z[name], dtype=np.dtype(buf.typecode)).tobytes())
+        return self
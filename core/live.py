@@ -0,0 +1,290 @@
+# core/live.py
+import asyncio
+import json
+import time
+from array import array
+from time import perf_counter_ns
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from .data import ColumnarDataHandler, DataHandler
+from .event_queue import FastEventQueue
+from .events import MarketBatchEvent, OrderEvent, FillEvent
+
+
+class ReplayServer:
+    """
+    Local stand-in for a live feed: replays bars over TCP as newline-delimited JSON,
+    one message per timestamp carrying every symbol that printed.
+    speed=1.0 replays in real time, speed=60.0 one minute of bars per second, speed=None as fast
+    as the client reads. Wall-clock gaps are capped at max_gap_sec so nights and weekends don't stall.
+    Every connection gets its own replay from the first bar.
+    """
+    def __init__(self, make_data: Callable[[object], DataHandler], speed: Optional[float] = 1.0,
+                 max_gap_sec: float = 1.0, host: str = "127.0.0.1", port: int = 0):
+        self._make_data = make_data
+        self.speed = speed
+        self.max_gap_sec = max_gap_sec
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @classmethod
+    def from_csvs(cls, symbol_to_csv: Dict[str, str], datetime_col: str = "datetime", **kwargs):
+        return cls(lambda q: ColumnarDataHandler(q, symbol_to_csv, datetime_col, batch=True), **kwargs)
+
+    @classmethod
+    def from_bar_store(cls, store, symbols: List[str], start=None, end=None, **kwargs):
+        return cls(lambda q: ColumnarDataHandler.from_bar_store(q, store, symbols, start, end, batch=True), **kwargs)
+
+    async def start(self) -> Tuple[str, int]:
+        """Starts listening; returns the bound (host, port)."""
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.host, self.port = self._server.sockets[0].getsockname()[:2]
+        return self.host, self.port
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        loop = asyncio.get_running_loop()
+        q = FastEventQueue()
+        data = self._make_data(q)
+        tz_sent = False
+        prev_ns = None
+        target = loop.time()
+        try:
+            while data.has_data():
+                data.update_bars()
+                while not q.empty():
+                    evt = q.get()
+                    ts = pd.Timestamp(evt.timestamp)
+                    ns = int(ts.value)
+                    if not tz_sent:
+                        writer.write((json.dumps({"tz": str(ts.tz) if ts.tz is not None else None}) + "\n").encode())
+                        tz_sent = True
+                    if self.speed and prev_ns is not None:
+                        target += min((ns - prev_ns) / 1e9 / self.speed, self.max_gap_sec)
+                        delay = target - loop.time()
+                        if delay > 0:
+                            await asyncio.sleep(delay)
+                    prev_ns = ns
+                    msg = {
+                        "t": ns,
+                        "sent": time.time_ns(),
+                        "s": list(evt.symbols),
+                        "o": evt.open.tolist(),
+                        "h": evt.high.tolist(),
+                        "l": evt.low.tolist(),
+                        "c": evt.close.tolist(),
+                        "v": evt.volume.tolist(),
+                    }
+                    writer.write((json.dumps(msg) + "\n").encode())
+                    await writer.drain()
+            writer.write(b'{"eof": true}\n')
+            await writer.drain()
+        except (ConnectionResetError, BrokenPipeError):
+            pass
+        finally:
+            writer.close()
+
+
+class ReplayFeed:
+    """Client side of ReplayServer: decodes each message into a MarketBatchEvent."""
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.feed_delay_ns = array("q")  # server send -> client decode, wall clock
+
+    async def stream(self):
+        """Yields (MarketBatchEvent, perf_counter_ns at arrival) until the server signals end of data."""
+        reader, writer = await asyncio.open_connection(self.host, self.port, limit=1 << 24)
+        tz = None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                recv_ns = perf_counter_ns()
+                msg = json.loads(line)
+                if "tz" in msg:
+                    tz = msg["tz"]
+                    continue
+                if msg.get("eof"):
+                    return
+                self.feed_delay_ns.append(time.time_ns() - msg["sent"])
+                evt = MarketBatchEvent(
+                    pd.Timestamp(msg["t"], tz=tz).to_pydatetime(), tuple(msg["s"]),
+                    np.array(msg["o"]), np.array(msg["h"]), np.array(msg["l"]),
+                    np.array(msg["c"]), np.array(msg["v"]),
+                )
+                yield evt, recv_ns
+        finally:
+            writer.close()
+
+
+def _percentiles_us(samples: array) -> Dict[str, float]:
+    if not samples:
+        return {"count": 0, "p50_us": float("nan"), "p99_us": float("nan"), "max_us": float("nan")}
+    x = np.frombuffer(samples, dtype=np.int64) / 1e3
+    return {"count": int(len(x)), "p50_us": float(np.percentile(x, 50)),
+            "p99_us": float(np.percentile(x, 99)), "max_us": float(x.max())}
+
+
+class LiveRuntime:
+    """
+    Asyncio paper-trading runtime: feed -> strategy -> execution -> portfolio, one task per stage,
+    connected by bounded asyncio queues so a slow stage pushes back on the feed instead of
+    building an unbounded backlog.
+
+    Each stage forwards the market batch downstream ahead of the orders/fills it caused, so the
+    portfolio sees the same event order as the synchronous batch loop in run_loop_ml.py.
+    The execution handler must be constructed with a FastEventQueue; the runtime drains it after
+    every order.
+
+    Latency is measured from the moment a bar arrives off the socket: bar-to-order when the order
+    is handed to the execution stage, bar-to-fill when the fill is booked. With max_lag_ms set,
+    batches that waited longer than that before the strategy saw them are marked but not traded
+    (counted in `stale_skipped`), which keeps reaction times bounded when a burst of symbols
+    ticks at once. inference_in_thread=True runs strategy evaluation off the event loop so
+    socket reads continue while the model scores a batch.
+    """
+    def __init__(self, feed: ReplayFeed, strategy, sizer, execution, portfolio,
+                 max_queue: int = 1024, max_lag_ms: Optional[float] = None,
+                 inference_in_thread: bool = False):
+        self.feed = feed
+        self.strategy = strategy
+        self.sizer = sizer
+        self.execution = execution
+        self.portfolio = portfolio
+        self.max_queue = max_queue
+        self.max_lag_ns = None if max_lag_ms is None else int(max_lag_ms * 1e6)
+        self.inference_in_thread = inference_in_thread
+        self.bar_to_order_ns = array("q")
+        self.bar_to_fill_ns = array("q")
+        self.batches = 0
+        self.stale_skipped = 0
+        self.elapsed_sec = 0.0
+        self._peak_depth: Dict[str, int] = {}
+
+    async def _put(self, name: str, q: asyncio.Queue, item):
+        await q.put(item)
+        depth = q.qsize()
+        if depth > self._peak_depth.get(name, 0):
+            self._peak_depth[name] = depth
+
+    async def _feed_task(self, market_q: asyncio.Queue):
+        async for evt, recv_ns in self.feed.stream():
+            await self._put("market", market_q, (evt, recv_ns))
+        await market_q.put(None)
+
+    async def _strategy_task(self, market_q: asyncio.Queue, exec_q: asyncio.Queue):
+        while True:
+            item = await market_q.get()
+            if item is None:
+                await exec_q.put(None)
+                return
+            evt, recv_ns = item
+            self.batches += 1
+            await self._put("execution", exec_q, item)
+            if self.max_lag_ns is not None and perf_counter_ns() - recv_ns > self.max_lag_ns:
+                self.stale_skipped += 1
+                continue
+            if self.inference_in_thread:
+                signals = await asyncio.to_thread(self.strategy.on_market_batch, evt)
+            else:
+                signals = self.strategy.on_market_batch(evt)
+            if not signals:
+                continue
+            for order in self.sizer.on_signals(signals):
+                self.bar_to_order_ns.append(perf_counter_ns() - recv_ns)
+                await self._put("execution", exec_q, (order, recv_ns))
+
+    async def _execution_task(self, exec_q: asyncio.Queue, portfolio_q: asyncio.Queue):
+        fills = self.execution.event_queue
+        # Netting handlers fill a timestamp's orders together, before the next bar replaces their prices
+        flush = getattr(self.execution, "flush", None)
+        last_recv_ns = 0
+        while True:
+            item = await exec_q.get()
+            if item is None or not isinstance(item[0], OrderEvent):
+                if flush is not None:
+                    flush()
+                    while not fills.empty():
+                        await self._put("portfolio", portfolio_q, (fills.get(), last_recv_ns))
+            if item is None:
+                await portfolio_q.put(None)
+                return
+            evt, recv_ns = item
+            last_recv_ns = recv_ns
+            if isinstance(evt, OrderEvent):
+                self.execution.on_order(evt)
+                while not fills.empty():
+                    await self._put("portfolio", portfolio_q, (fills.get(), recv_ns))
+            else:
+                self.execution.on_market_batch(evt)
+                await self._put("portfolio", portfolio_q, item)
+
+    async def _portfolio_task(self, portfolio_q: asyncio.Queue):
+        while True:
+            item = await portfolio_q.get()
+            if item is None:
+                return
+            evt, recv_ns = item
+            if isinstance(evt, FillEvent):
+                self.portfolio.on_fill(evt)
+                self.bar_to_fill_ns.append(perf_counter_ns() - recv_ns)
+            else:
+                self.portfolio.on_market_batch(evt)
+
+    async def run(self):
+        market_q: asyncio.Queue = asyncio.Queue(self.max_queue)
+        exec_q: asyncio.Queue = asyncio.Queue(self.max_queue)
+        portfolio_q: asyncio.Queue = asyncio.Queue(self.max_queue)
+        t0 = time.perf_counter()
+        await asyncio.gather(
+            self._feed_task(market_q),
+            self._strategy_task(market_q, exec_q),
+            self._execution_task(exec_q, portfolio_q),
+            self._portfolio_task(portfolio_q),
+        )
+        self.elapsed_sec = time.perf_counter() - t0
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "batches": self.batches,
+            "batches_per_sec": self.batches / self.elapsed_sec if self.elapsed_sec > 0 else float("nan"),
+            "stale_skipped": self.stale_skipped,
+            "elapsed_sec": self.elapsed_sec,
+            "feed_delay": _percentiles_us(self.feed.feed_delay_ns),
+            "bar_to_order": _percentiles_us(self.bar_to_order_ns),
+            "bar_to_fill": _percentiles_us(self.bar_to_fill_ns),
+            "peak_queue_depth": dict(self._peak_depth),
+        }
+
+    def print_stats(self):
+        s = self.stats()
+        print("\n--- Live Runtime ---")
+        print(f"batches: {s['batches']} ({s['batches_per_sec']:,.0f}/s), stale skipped: {s['stale_skipped']}, "
+              f"elapsed: {s['elapsed_sec']:.2f}s")
+        for key in ("feed_delay", "bar_to_order", "bar_to_fill"):
+            p = s[key]
+            print(f"{key:<14} n={p['count']:<8} p50={p['p50_us']:9.1f}us p99={p['p99_us']:9.1f}us "
+                  f"max={p['max_us']:9.1f}us")
+        print(f"peak queue depth: {s['peak_queue_depth']}")
+        print("--------------------")
+
+
+async def run_paper(server: ReplayServer, strategy, sizer, execution, portfolio, **runtime_kwargs) -> LiveRuntime:
+    """Starts the replay server, trades its feed to completion and shuts the server down."""
+    host, port = await server.start()
+    try:
+        runtime = LiveRuntime(ReplayFeed(host, port), strategy, sizer, execution, portfolio, **runtime_kwargs)
+        await runtime.run()
+    finally:
+        await server.close()
+    return runtime
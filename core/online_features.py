@@ -0,0 +1,292 @@
+# core/online_features.py
+import math
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+from .events import MarketEvent, MarketBatchEvent
+from .feature_engine import EPS, FEATURE_COLUMNS
+
+_NAN = math.nan
+
+
+class _RollingSeries:
+    """
+    Ring buffer of the last max(windows) + 1 values of one series, with running sums (and sums of
+    squares) per window. Values are stored relative to a centre that moves to the latest value
+    every buffer length; the sums are then rebuilt from the buffer, so rounding never accumulates
+    for longer than one buffer and cancellation in the variance stays local.
+    """
+    __slots__ = ("windows", "squares", "size", "buf", "n", "pos", "ref", "s1", "s2", "nans", "run", "last")
+
+    def __init__(self, windows: Sequence[int], squares: bool):
+        self.windows = tuple(windows)
+        self.squares = squares
+        self.size = max(self.windows) + 1
+        self.buf = [_NAN] * self.size
+        self.n = 0
+        self.pos = 0
+        self.ref = 0.0
+        self.s1 = [0.0] * len(self.windows)
+        self.s2 = [0.0] * len(self.windows)
+        self.nans = [0] * len(self.windows)
+        self.run = 0
+        self.last = _NAN
+
+    def push(self, x: float):
+        self.run = self.run + 1 if x == self.last else 1
+        self.last = x
+        buf, size, n = self.buf, self.size, self.n
+        pos = self.pos
+        buf[pos] = x
+        self.n = n = n + 1
+        self.pos = (pos + 1) % size
+        if n % size == 0:
+            self._rebuild()
+            return
+        ref = self.ref
+        ok = x == x
+        d = x - ref
+        for k, w in enumerate(self.windows):
+            if ok:
+                self.s1[k] += d
+                if self.squares:
+                    self.s2[k] += d * d
+            else:
+                self.nans[k] += 1
+            if n > w:
+                old = buf[pos - w]  # negative indices wrap around the ring
+                if old == old:
+                    e = old - ref
+                    self.s1[k] -= e
+                    if self.squares:
+                        self.s2[k] -= e * e
+                else:
+                    self.nans[k] -= 1
+
+    def _rebuild(self):
+        if self.last == self.last:
+            self.ref = self.last
+        ref, buf, pos, n = self.ref, self.buf, self.pos, self.n
+        for k, w in enumerate(self.windows):
+            s1 = s2 = 0.0
+            nans = 0
+            for i in range(1, min(w, n) + 1):
+                v = buf[pos - i]
+                if v == v:
+                    d = v - ref
+                    s1 += d
+                    s2 += d * d
+                else:
+                    nans += 1
+            self.s1[k], self.s2[k], self.nans[k] = s1, s2, nans
+
+    def lag(self, w: int) -> float:
+        """Value w bars back (NaN before it exists)."""
+        return self.buf[self.pos - 1 - w] if self.n > w else _NAN
+
+    def sum(self, k: int) -> float:
+        w = self.windows[k]
+        if self.n < w or self.nans[k]:
+            return _NAN
+        if self.run >= w:
+            return w * self.last
+        return self.s1[k] + w * self.ref
+
+    def mean(self, k: int) -> float:
+        w = self.windows[k]
+        if self.n < w or self.nans[k]:
+            return _NAN
+        if self.run >= w:
+            return self.last
+        return self.ref + self.s1[k] / w
+
+    def std(self, k: int) -> float:
+        w = self.windows[k]
+        if self.n < w or self.nans[k] or w < 2:
+            return _NAN
+        if self.run >= w:
+            return 0.0
+        s1 = self.s1[k]
+        var = (self.s2[k] - s1 * s1 / w) / (w - 1)
+        return math.sqrt(var) if var > 0.0 else 0.0
+
+
+def _div(a: float, b: float) -> float:
+    """a / b with NumPy semantics for a zero denominator."""
+    if b:
+        return a / b
+    if a != a or a == 0.0:
+        return _NAN
+    return math.copysign(math.inf, a) * math.copysign(1.0, b)
+
+
+def _log(x: float) -> float:
+    if x > 0.0:
+        return math.log(x)
+    return -math.inf if x == 0.0 else _NAN
+
+
+def _sqrt0(s: float) -> float:
+    return math.sqrt(s) if s > 0.0 else (0.0 if s == s else _NAN)
+
+
+class FeatureState:
+    """
+    Streaming counterpart of make_features for one symbol: update() takes one bar and returns its
+    feature row in O(number of windows) time, holding at most max(window) + 1 values per input
+    series. Rows match make_features on the same history, including NaN warm-up and gaps.
+    With `columns` (a subset of FEATURE_COLUMNS, in any order) only the series and windows those
+    columns use are kept and updated, so a pruned model pays only for its own features.
+    """
+    def __init__(self, columns: Optional[Sequence[str]] = None):
+        self.columns = list(FEATURE_COLUMNS if columns is None else columns)
+        unknown = [c for c in self.columns if c not in FEATURE_COLUMNS]
+        if unknown:
+            raise KeyError(f"no streaming implementation for columns: {unknown}")
+        # series -> windows it must track (the price series also serves mom_* lags)
+        need: Dict[str, set] = {}
+        for c in self.columns:
+            for series, w in self._uses(c):
+                need.setdefault(series, set()).add(w)
+        squares = {"px": True, "hl": True, "vol": True, "rv": False, "pv": False, "gain": False, "loss": False}
+        self._series: Dict[str, _RollingSeries] = {
+            name: _RollingSeries(sorted(ws), squares[name]) for name, ws in need.items()}
+        self._k = {(name, w): k for name, st in self._series.items() for k, w in enumerate(st.windows)}
+        self._getters = [self._getter(c) for c in self.columns]
+        self._push_px = self._series.get("px")
+        self._push = [(name, st) for name, st in self._series.items() if name != "px"]
+        self._prev_close = _NAN
+        self._prev_log = _NAN
+        self._c = self._v = self._ret = self._log_ret = _NAN
+        self.bars = 0
+
+    @staticmethod
+    def _uses(col: str) -> List[Tuple[str, int]]:
+        """(series, window) pairs a column reads."""
+        name, _, rest = col.rpartition("_")
+        if col in ("ret_1", "log_ret_1"):
+            return []
+        if col.startswith("sma_diff_"):
+            s, l = (int(x) for x in col[len("sma_diff_"):].split("_"))
+            return [("px", s), ("px", l)]
+        w = int(rest)
+        if name == "rv":
+            return [("rv", w)]
+        if name in ("range_mean", "range_std"):
+            return [("hl", w)]
+        if name in ("mom", "zscore"):
+            return [("px", w)]
+        if name == "vol_z":
+            return [("vol", w)]
+        if name == "val_traded":
+            return [("pv", w)]
+        if name == "rsi":
+            return [("gain", w), ("loss", w)]
+        raise KeyError(col)
+
+    def _getter(self, col: str) -> Callable[[], float]:
+        if col == "ret_1":
+            return lambda: self._ret
+        if col == "log_ret_1":
+            return lambda: self._log_ret
+        S, K = self._series, self._k
+        if col.startswith("sma_diff_"):
+            s, l = (int(x) for x in col[len("sma_diff_"):].split("_"))
+            px, ks, kl = S["px"], K["px", s], K["px", l]
+
+            def sma_diff():
+                sma_l = px.mean(kl)
+                return _div(px.mean(ks) - sma_l, sma_l + EPS)
+            return sma_diff
+        name, _, rest = col.rpartition("_")
+        w = int(rest)
+        if name == "rv":
+            st, k = S["rv"], K["rv", w]
+            return lambda: _sqrt0(st.sum(k))
+        if name == "range_mean":
+            st, k = S["hl"], K["hl", w]
+            return lambda: st.mean(k)
+        if name == "range_std":
+            st, k = S["hl"], K["hl", w]
+            return lambda: st.std(k)
+        if name == "mom":
+            st = S["px"]
+            return lambda: _div(self._c, st.lag(w)) - 1.0
+        if name == "zscore":
+            st, k = S["px"], K["px", w]
+            return lambda: _div(self._c - st.mean(k), st.std(k) + EPS)
+        if name == "vol_z":
+            st, k = S["vol"], K["vol", w]
+            return lambda: _div(self._v - st.mean(k), st.std(k) + EPS)
+        if name == "val_traded":
+            st, k = S["pv"], K["pv", w]
+            return lambda: st.mean(k)
+        gain, loss, k = S["gain"], S["loss"], K["gain", w]
+        return lambda: 100.0 - _div(100.0, 1.0 + _div(gain.mean(k), loss.mean(k) + EPS))
+
+    def update(self, high: float, low: float, close: float, volume: float) -> List[float]:
+        c, v = float(close), float(volume)
+        prev = self._prev_close
+        log_c = _log(c)
+        self._ret = _div(c, prev) - 1.0
+        self._log_ret = log_c - self._prev_log
+        self._prev_close, self._prev_log = c, log_c
+        self._c, self._v = c, v
+        self.bars += 1
+
+        if self._push_px is not None:
+            self._push_px.push(c)
+        if self._push:
+            delta = c - prev
+            for name, st in self._push:
+                if name == "rv":
+                    st.push(self._log_ret * self._log_ret)
+                elif name == "hl":
+                    st.push(float(high) - float(low))
+                elif name == "vol":
+                    st.push(v)
+                elif name == "pv":
+                    st.push(c * v)
+                elif name == "gain":
+                    # Series.clip keeps NaN
+                    st.push(delta if delta > 0.0 else (0.0 if delta == delta else _NAN))
+                else:
+                    st.push(-delta if delta < 0.0 else (0.0 if delta == delta else _NAN))
+        return [g() for g in self._getters]
+
+
+class OnlineFeatures:
+    """
+    One FeatureState per symbol, fed from market events. update_event returns the symbol's feature
+    row; update_batch returns the batch's symbols and a (n_symbols, n_columns) array.
+    on_market / on_market_batch are the dispatcher handlers: they return None (a handler's return
+    value is queued as events) and leave the result in last_rows[symbol] / last_batch.
+    """
+    def __init__(self, symbols: Optional[Sequence[str]] = None, columns: Optional[Sequence[str]] = None):
+        self.columns = list(FEATURE_COLUMNS if columns is None else columns)
+        self.states: Dict[str, FeatureState] = {s: FeatureState(self.columns) for s in (symbols or ())}
+        self.last_rows: Dict[str, List[float]] = {}
+        self.last_batch: Optional[Tuple[Tuple[str, ...], np.ndarray]] = None
+
+    def state(self, symbol: str) -> FeatureState:
+        st = self.states.get(symbol)
+        if st is None:
+            st = self.states[symbol] = FeatureState(self.columns)
+        return st
+
+    def update(self, symbol: str, high: float, low: float, close: float, volume: float) -> List[float]:
+        return self.state(symbol).update(high, low, close, volume)
+
+    def update_event(self, event: MarketEvent) -> List[float]:
+        return self.state(event.symbol).update(event.high, event.low, event.close, event.volume)
+
+    def update_batch(self, event: MarketBatchEvent) -> Tuple[Tuple[str, ...], np.ndarray]:
+        rows = [self.state(s).update(h, l, c, v) for s, h, l, c, v in zip(
+            event.symbols, event.high.tolist(), event.low.tolist(), event.close.tolist(), event.volume.tolist())]
+        return event.symbols, np.array(rows, dtype=np.float64).reshape(len(rows), len(self.columns))
+
+    def on_market(self, event: MarketEvent):
+        self.last_rows[event.symbol] = self.update_event(event)
+
+    def on_market_batch(self, event: MarketBatchEvent):
+        self.last_batch = self.update_batch(event)
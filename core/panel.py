@@ -0,0 +1,249 @@
+# core/panel.py
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+from .data import OHLCV_FIELDS
+from .feature_engine import FEATURE_COLUMNS, compute_features
+from .labeling import get_triple_barrier_labels_fast
+
+_NAT = np.iinfo(np.int64).min
+
+
+class BarPanel:
+    """
+    (timestamp x symbol) bars on one shared index: `values` is a float64 (5, n_symbols, n_bars)
+    array in OHLCV_FIELDS order, NaN where a symbol has no bar. Each symbol's series is contiguous,
+    which is the layout the per-symbol feature and label passes read.
+    """
+    def __init__(self, index: pd.DatetimeIndex, symbols: Sequence[str], values: np.ndarray):
+        if values.shape != (len(OHLCV_FIELDS), len(symbols), len(index)):
+            raise ValueError(f"values has shape {values.shape}, expected {(len(OHLCV_FIELDS), len(symbols), len(index))}")
+        self.index = index
+        self.symbols = list(symbols)
+        self.values = values
+
+    @classmethod
+    def from_frames(cls, frames: Dict[str, pd.DataFrame]) -> "BarPanel":
+        """Aligns per-symbol bar frames (as returned by load_bars) on the union of their timestamps."""
+        index = frames[next(iter(frames))].index
+        for df in frames.values():
+            if not df.index.equals(index):
+                index = index.union(df.index)
+        values = np.full((len(OHLCV_FIELDS), len(frames), len(index)), np.nan)
+        for s, df in enumerate(frames.values()):
+            rows = slice(None) if df.index.equals(index) else index.get_indexer(df.index)
+            for f, field in enumerate(OHLCV_FIELDS):
+                values[f, s, rows] = df[field].to_numpy(dtype=np.float64)
+        return cls(index, list(frames), values)
+
+    @classmethod
+    def from_bar_store(cls, store, symbols: Sequence[str], start=None, end=None) -> "BarPanel":
+        return cls.from_frames({s: store.read_frame(s, start, end) for s in symbols})
+
+    def field(self, name: str) -> pd.DataFrame:
+        """One field as a (timestamp x symbol) frame."""
+        return pd.DataFrame(self.values[OHLCV_FIELDS.index(name)].T, index=self.index, columns=self.symbols)
+
+    def frame(self, symbol: str) -> pd.DataFrame:
+        """The symbol's own bars (rows where it printed), like load_bars."""
+        s = self.symbols.index(symbol)
+        valid = ~np.isnan(self.values[OHLCV_FIELDS.index("close"), s])
+        return pd.DataFrame(self.values[:, s, valid].T, index=self.index[valid], columns=list(OHLCV_FIELDS))
+
+
+class PanelFeatures:
+    """
+    Feature panel: `values` is (n_symbols, n_columns, n_bars), NaN where a symbol has no bar
+    (`valid` is False there). Cross-sectional columns added with add_cross_sectional() live in
+    `extra` as (timestamp x symbol) frames and are appended to every per-symbol frame.
+    """
+    def __init__(self, index: pd.DatetimeIndex, symbols: Sequence[str], columns: Sequence[str], values: np.ndarray,
+                 valid: np.ndarray):
+        self.index = index
+        self.symbols = list(symbols)
+        self.columns = list(columns)
+        self.values = values
+        self.valid = valid
+        self.extra: Dict[str, pd.DataFrame] = {}
+
+    def column(self, name: str) -> pd.DataFrame:
+        """One feature as a (timestamp x symbol) frame."""
+        if name in self.extra:
+            return self.extra[name]
+        return pd.DataFrame(self.values[:, self.columns.index(name)].T, index=self.index, columns=self.symbols)
+
+    def frame(self, symbol: str, valid_only: bool = True) -> pd.DataFrame:
+        """The symbol's feature matrix, by default on its own bars only (as make_features_fast returns it)."""
+        s = self.symbols.index(symbol)
+        out = pd.DataFrame(self.values[s].T, index=self.index, columns=self.columns)
+        for name, df in self.extra.items():
+            out[name] = df[symbol].to_numpy()
+        return out[self.valid[s]] if valid_only else out
+
+    def add_cross_sectional(self, panel: BarPanel, rank_of: Sequence[str] = ("mom_30",),
+                            corr_windows: Sequence[int] = (60,)) -> List[str]:
+        """
+        Adds, per timestamp, each symbol's percentile rank of the `rank_of` features across symbols
+        (xs_rank_<col>), and its rolling correlation with the equal-weight cross-sectional return
+        (xs_corr_<w>). Returns the new column names.
+        """
+        names = []
+        for col in rank_of:
+            name = f"xs_rank_{col}"
+            self.extra[name] = rank_cross_section(self.column(col))
+            names.append(name)
+        returns = panel.field("close").pct_change(fill_method=None)
+        for w in corr_windows:
+            name = f"xs_corr_{w}"
+            self.extra[name] = rolling_market_corr(returns, w)
+            names.append(name)
+        return names
+
+
+def rank_cross_section(values: pd.DataFrame) -> pd.DataFrame:
+    """Percentile rank (0, 1] of each symbol across the row; NaN where the symbol has no value."""
+    return values.rank(axis=1, pct=True)
+
+
+def rolling_market_corr(returns: pd.DataFrame, window: int) -> pd.DataFrame:
+    """
+    Rolling correlation of each symbol's returns with the equal-weight mean return of the symbols
+    trading at each timestamp; NaN until the symbol has `window` consecutive returns.
+    """
+    market = returns.mean(axis=1)
+    return returns.rolling(window).corr(market)
+
+
+class _Shared:
+    """Named shared-memory arrays: created by the parent, attached by name in workers."""
+    def __init__(self, spec: Optional[Dict[str, Tuple[str, Tuple[int, ...], str]]] = None):
+        self.spec = dict(spec or {})
+        self._shm = {k: shared_memory.SharedMemory(name=v[0]) for k, v in self.spec.items()}
+        self.arrays = {k: np.ndarray(shape, dtype=np.dtype(dt), buffer=self._shm[k].buf)
+                       for k, (_, shape, dt) in self.spec.items()}
+
+    @classmethod
+    def allocate(cls, shapes: Dict[str, Tuple[Tuple[int, ...], object]]) -> "_Shared":
+        self = cls()
+        for k, (shape, dtype) in shapes.items():
+            dtype = np.dtype(dtype)
+            shm = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * dtype.itemsize))
+            self._shm[k] = shm
+            self.spec[k] = (shm.name, tuple(shape), dtype.str)
+            self.arrays[k] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        return self
+
+    def close(self, unlink: bool = False):
+        self.arrays = {}
+        for shm in self._shm.values():
+            shm.close()
+            if unlink:
+                shm.unlink()
+        self._shm = {}
+
+
+def _fill_symbols(a: Dict[str, np.ndarray], symbols: List[int], tz, columns: List[str], label_args,
+                  label_fn: Callable):
+    bars, ts = a["bars"], a["ts"]
+    hi, lo, cl, vo = (OHLCV_FIELDS.index(f) for f in ("high", "low", "close", "volume"))
+    for s in symbols:
+        close = bars[cl, s]
+        valid = ~np.isnan(close)
+        out = a["features"][s].T  # (n_bars, n_columns) view, each column contiguous
+        rows = np.flatnonzero(valid)
+        if len(rows) == len(valid):
+            compute_features(bars[hi, s], bars[lo, s], close, bars[vo, s], out=out, columns=columns)
+        else:
+            out[~valid] = np.nan
+            out[rows] = compute_features(bars[hi, s, rows], bars[lo, s, rows], close[rows], bars[vo, s, rows],
+                                         columns=columns)
+        if label_args is None:
+            continue
+        a["label"][s] = np.nan
+        a["t_final"][s] = _NAT
+        a["ret"][s] = np.nan
+        # Labels run on pandas objects that own their data, never on views of the shared buffers
+        index = _index_from_ns(ts[rows], tz)
+        lab = label_fn(pd.Series(close[rows], index=index, copy=True), index, *label_args)
+        if lab is None or not len(lab):
+            continue
+        at = np.searchsorted(ts, pd.DatetimeIndex(lab.index).as_unit("ns").asi8)
+        a["label"][s, at] = lab["label"].to_numpy(dtype=np.float64)
+        a["t_final"][s, at] = pd.DatetimeIndex(lab["t_final"]).as_unit("ns").asi8
+        a["ret"][s, at] = lab["ret"].to_numpy(dtype=np.float64)
+
+
+def _panel_task(spec, symbols: List[int], tz, columns: List[str], label_args, label_fn: Callable):
+    """Worker: features (and labels) for a block of symbol indices, written into the shared arrays."""
+    shared = _Shared(spec)
+    try:
+        _fill_symbols(shared.arrays, symbols, tz, columns, label_args, label_fn)
+    finally:
+        shared.close()
+
+
+def _index_from_ns(ns: np.ndarray, tz: Optional[str]) -> pd.DatetimeIndex:
+    idx = pd.DatetimeIndex(pd.to_datetime(np.array(ns, dtype=np.int64), unit="ns", utc=True))
+    return idx.tz_convert(tz) if tz else idx.tz_localize(None)
+
+
+def _label_frames(a: Dict[str, np.ndarray], panel: BarPanel, tz: Optional[str]) -> Dict[str, pd.DataFrame]:
+    frames = {}
+    for s, sym in enumerate(panel.symbols):
+        at = np.flatnonzero(~np.isnan(a["label"][s]))
+        frames[sym] = pd.DataFrame({
+            "t_final": _index_from_ns(a["t_final"][s, at], tz).as_unit(panel.index.unit),
+            "label": a["label"][s, at].astype(np.int64),
+            "ret": a["ret"][s, at],
+        }, index=pd.Index(panel.index[at], name="t_event"))
+    return frames
+
+
+def compute_panel(
+    panel: BarPanel,
+    columns: Optional[Sequence[str]] = None,
+    labels: Optional[Tuple[float, float, int]] = None,
+    n_workers: int = 1,
+    dtype=np.float64,
+    label_fn: Callable = get_triple_barrier_labels_fast,
+) -> Tuple[PanelFeatures, Optional[Dict[str, pd.DataFrame]]]:
+    """
+    Features (FEATURE_COLUMNS, or `columns`) for every symbol of the panel and, when `labels` is
+    (profit_take, stop_loss, tmax), triple-barrier labels at every bar of every symbol.
+    Symbols are spread over a process pool in blocks. Bars go to the workers, and features and labels
+    come back, through shared memory, so nothing larger than a block's symbol indices is pickled.
+    Each symbol is computed on its own bars only, so results equal the per-symbol make_features_fast /
+    get_triple_barrier_labels output for the same frame.
+    Returns the PanelFeatures and, with labels, a dict symbol -> label frame (None otherwise).
+    """
+    columns = list(FEATURE_COLUMNS if columns is None else columns)
+    n_sym, n_bars = len(panel.symbols), len(panel.index)
+    shapes = {"bars": (panel.values.shape, np.float64), "ts": ((n_bars,), np.int64),
+              "features": ((n_sym, len(columns), n_bars), dtype)}
+    if labels is not None:
+        shapes.update({"label": ((n_sym, n_bars), np.float64), "t_final": ((n_sym, n_bars), np.int64),
+                       "ret": ((n_sym, n_bars), np.float64)})
+    shared = _Shared.allocate(shapes)
+    try:
+        shared.arrays["bars"][...] = panel.values
+        shared.arrays["ts"][...] = panel.index.as_unit("ns").asi8
+        tz = str(panel.index.tz) if panel.index.tz is not None else None
+        label_args = tuple(labels) if labels is not None else None
+        n_blocks = max(1, min(n_sym, n_workers * 4))
+        blocks = [b.tolist() for b in np.array_split(np.arange(n_sym), n_blocks) if len(b)]
+        if n_workers > 1:
+            with ProcessPoolExecutor(max_workers=n_workers) as pool:
+                list(pool.map(_panel_task, *zip(*[(shared.spec, b, tz, columns, label_args, label_fn) for b in blocks])))
+        else:
+            for b in blocks:
+                _fill_symbols(shared.arrays, b, tz, columns, label_args, label_fn)
+        # Copy out before the segments are unlinked
+        valid = ~np.isnan(panel.values[OHLCV_FIELDS.index("close")])
+        features = PanelFeatures(panel.index, panel.symbols, columns, shared.arrays["features"].copy(), valid)
+        label_frames = _label_frames(shared.arrays, panel, tz) if labels is not None else None
+        return features, label_frames
+    finally:
+        shared.close(unlink=True)
@@ -1,9 +1,56 @@
 # core/portfolio.py
 from dataclasses import dataclass
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Tuple
 from datetime import datetime
+import numpy as np
+import pandas as pd
+
+from .events import MarketEvent, MarketBatchEvent, FillEvent
+
+
+def apply_fill(quantity: int, avg_price: float, realized_pnl: float,
+               direction: str, qty: int, price: float, commission: float) -> Tuple[int, float, float]:
+    """
+    Position arithmetic shared by Position and ArrayPortfolio.
+    Returns the new (quantity, avg_price, realized_pnl) after one fill.
+    """
+    signed_qty = qty if direction == "BUY" else -qty
+
+    # If adding to same side or opening new, update VWAP
+    if quantity == 0 or (quantity > 0 and signed_qty > 0) or (quantity < 0 and signed_qty < 0):
+        new_qty = quantity + signed_qty
+        if new_qty == 0:
+            # Fully flattened; realize nothing extra here
+            pass
+        else:
+            # VWAP update for same-side adds
+            avg_price = (abs(quantity) * avg_price + abs(signed_qty) * price) / abs(new_qty)
+        quantity = new_qty
+    else:
+        # Reducing or flipping side: realize PnL on the reduced portion
+        if quantity > 0 and signed_qty < 0:
+            close_qty = min(quantity, -signed_qty)
+            realized_pnl += close_qty * (price - avg_price)
+            quantity -= close_qty
+            signed_qty += close_qty  # remaining (negative) to apply
+            if quantity == 0:
+                avg_price = 0.0
+        elif quantity < 0 and signed_qty > 0:
+            close_qty = min(-quantity, signed_qty)
+            realized_pnl += close_qty * (avg_price - price)
+            quantity += close_qty
+            signed_qty -= close_qty  # remaining (positive) to apply
+            if quantity == 0:
+                avg_price = 0.0
+        # If still remaining signed_qty after closing, it opens on the other side
+        if signed_qty != 0:
+            avg_price = price
+            quantity += signed_qty
+
+    # Subtract commission from realized PnL
+    realized_pnl -= commission
+    return quantity, avg_price, realized_pnl
 
-from .events import MarketEvent, FillEvent
 
 @dataclass
 class Position:
@@ -17,41 +64,9 @@ class Position:
         Update position with a new fill. Buys increase qty, sells decrease qty.
         Realize PnL when crossing or reducing position on the opposite side.
         """
-        signed_qty = qty if direction == "BUY" else -qty
-
-        # If adding to same side or opening new, update VWAP
-        if self.quantity == 0 or (self.quantity > 0 and signed_qty > 0) or (self.quantity < 0 and signed_qty < 0):
-            new_qty = self.quantity + signed_qty
-            if new_qty == 0:
-                # Fully flattened; realize nothing extra here
-                pass
-            else:
-                # VWAP update for same-side adds
-                self.avg_price = (abs(self.quantity) * self.avg_price + abs(signed_qty) * price) / abs(new_qty)
-            self.quantity = new_qty
-        else:
-            # Reducing or flipping side: realize PnL on the reduced portion
-            if self.quantity > 0 and signed_qty < 0:
-                close_qty = min(self.quantity, -signed_qty)
-                self.realized_pnl += close_qty * (price - self.avg_price)
-                self.quantity -= close_qty
-                signed_qty += close_qty  # remaining (negative) to apply
-                if self.quantity == 0:
-                    self.avg_price = 0.0
-            elif self.quantity < 0 and signed_qty > 0:
-                close_qty = min(-self.quantity, signed_qty)
-                self.realized_pnl += close_qty * (self.avg_price - price)
-                self.quantity += close_qty
-                signed_qty -= close_qty  # remaining (positive) to apply
-                if self.quantity == 0:
-                    self.avg_price = 0.0
-            # If still remaining signed_qty after closing, it opens on the other side
-            if signed_qty != 0:
-                self.avg_price = price
-                self.quantity += signed_qty
-
-        # Subtract commission from realized PnL
-        self.realized_pnl -= commission
+        self.quantity, self.avg_price, self.realized_pnl = apply_fill(
+            self.quantity, self.avg_price, self.realized_pnl, direction, qty, price, commission
+        )
 
     def market_value(self, last_price: float) -> float:
         return float(self.quantity) * float(last_price)
@@ -96,21 +111,28 @@ class Portfolio:
         """
         Mark-to-market portfolio using the latest tradeable price.
         """
-        sym = evt.symbol
-        px = float(evt.ohlcv["close"])
-        self.last_prices[sym] = px
+        self.last_prices[evt.symbol] = float(evt.close)
+        self._record_equity(evt.timestamp)
+
+    def on_market_batch(self, evt: MarketBatchEvent):
+        """
+        Mark-to-market once for a whole timestamp; same equity row as feeding its MarketEvents one by one.
+        """
+        self.last_prices.update(zip(evt.symbols, evt.close.tolist()))
+        self._record_equity(evt.timestamp)
 
+    def _record_equity(self, timestamp):
         # Compute snapshot at this timestamp
         holdings = sum(pos.market_value(self.last_prices.get(s, 0.0)) for s, pos in self.positions.items())
         equity = self.cash + holdings
         
         # If the last entry in the equity curve has the same timestamp, update it. Otherwise, append a new entry.
-        if self.equity_curve and self.equity_curve[-1]["timestamp"] == evt.timestamp:
+        if self.equity_curve and self.equity_curve[-1]["timestamp"] == timestamp:
             self.equity_curve[-1]["holdings"] = holdings
             self.equity_curve[-1]["equity"] = equity
         else:
             self.equity_curve.append({
-                "timestamp": evt.timestamp,
+                "timestamp": timestamp,
                 "cash": self.cash,
                 "holdings": holdings,
                 "equity": equity,
@@ -121,3 +143,183 @@ class Portfolio:
             holdings = sum(self.positions[s].market_value(self.last_prices.get(s, 0.0)) for s in self.positions)
             return self.cash + holdings
         return float(self.equity_curve[-1]["equity"])
+
+
+class ArrayPortfolio:
+    """
+    Array-backed Portfolio with the same event interface and the same numbers.
+
+    Quantities, average prices, realized PnL and last prices live in NumPy arrays indexed by
+    symbol id. Holdings are maintained incrementally (price delta x quantity on a mark,
+    quantity delta x last price on a fill), so a mark costs O(1) per symbol instead of a sum
+    over every position; every `resync_every` rows the running total is recomputed exactly
+    to stop float drift. The equity curve is written into preallocated columnar buffers
+    that double when full.
+    """
+    def __init__(self, initial_cash: float = 100_000.0, symbols: Optional[List[str]] = None,
+                 capacity: int = 4096, resync_every: int = 1024):
+        self.initial_cash = float(initial_cash)
+        self.cash = float(initial_cash)
+        self.fill_count = 0
+        self.resync_every = resync_every
+
+        self._ids: Dict[str, int] = {}
+        self._symbols: List[str] = []
+        n = max(len(symbols or ()), 16)
+        self._qty = np.zeros(n, dtype=np.int64)
+        self._avg = np.zeros(n, dtype=np.float64)
+        self._realized = np.zeros(n, dtype=np.float64)
+        self._last = np.zeros(n, dtype=np.float64)
+        self._has_pos = np.zeros(n, dtype=bool)  # symbols that ever traded, like Portfolio.positions
+        for sym in symbols or ():
+            self._add_symbol(sym)
+        self._holdings = 0.0
+        self._batch_syms: Optional[Tuple[str, ...]] = None
+        self._batch_idx = np.empty(0, dtype=np.intp)
+
+        capacity = max(int(capacity), 1)
+        self._eq_ts = np.empty(capacity, dtype=np.int64)
+        self._eq_cash = np.empty(capacity, dtype=np.float64)
+        self._eq_holdings = np.empty(capacity, dtype=np.float64)
+        self._eq_equity = np.empty(capacity, dtype=np.float64)
+        self._n = 0
+        self._last_ts = None
+        self._tz = None
+
+    def _add_symbol(self, symbol: str) -> int:
+        i = len(self._symbols)
+        if i == len(self._qty):
+            for name in ("_qty", "_avg", "_realized", "_last", "_has_pos"):
+                old = getattr(self, name)
+                new = np.zeros(2 * len(old), dtype=old.dtype)
+                new[:i] = old
+                setattr(self, name, new)
+        self._ids[symbol] = i
+        self._symbols.append(symbol)
+        return i
+
+    def _index(self, symbols: Tuple[str, ...]) -> np.ndarray:
+        # Batches usually repeat the same symbol tuple, so cache its index array
+        if symbols is not self._batch_syms and symbols != self._batch_syms:
+            ids = self._ids
+            self._batch_idx = np.fromiter(
+                (ids[s] if s in ids else self._add_symbol(s) for s in symbols), dtype=np.intp, count=len(symbols)
+            )
+            self._batch_syms = symbols
+        return self._batch_idx
+
+    def on_fill(self, evt: FillEvent):
+        """
+        Update cash and positions based on an executed fill.
+        """
+        self.fill_count += 1
+        i = self._ids.get(evt.symbol)
+        if i is None:
+            i = self._add_symbol(evt.symbol)
+        qty = int(evt.quantity)
+        price = float(evt.fill_price)
+        commission = float(evt.commission)
+        gross = price * qty
+        if evt.direction == "BUY":
+            self.cash -= gross
+        elif evt.direction == "SELL":
+            self.cash += gross
+        self.cash -= commission
+
+        old_qty = int(self._qty[i])
+        new_qty, avg, realized = apply_fill(old_qty, float(self._avg[i]), float(self._realized[i]),
+                                            evt.direction, qty, price, commission)
+        self._qty[i] = new_qty
+        self._avg[i] = avg
+        self._realized[i] = realized
+        self._has_pos[i] = True
+        self._holdings += (new_qty - old_qty) * float(self._last[i])
+
+    def on_market(self, evt: MarketEvent):
+        """
+        Mark-to-market portfolio using the latest tradeable price.
+        """
+        i = self._ids.get(evt.symbol)
+        if i is None:
+            i = self._add_symbol(evt.symbol)
+        price = float(evt.close)
+        qty = int(self._qty[i])
+        if qty:
+            self._holdings += qty * (price - float(self._last[i]))
+        self._last[i] = price
+        self._record_equity(evt.timestamp)
+
+    def on_market_batch(self, evt: MarketBatchEvent):
+        """
+        Mark-to-market once for a whole timestamp; same equity row as feeding its MarketEvents one by one.
+        """
+        idx = self._index(evt.symbols)
+        close = np.asarray(evt.close, dtype=np.float64)
+        self._holdings += float(np.dot(self._qty[idx], close - self._last[idx]))
+        self._last[idx] = close
+        self._record_equity(evt.timestamp)
+
+    def _resync(self):
+        n = len(self._symbols)
+        self._holdings = float(np.dot(self._qty[:n], self._last[:n]))
+
+    def _record_equity(self, timestamp):
+        n = self._n
+        if n and (timestamp is self._last_ts or timestamp == self._last_ts):
+            holdings = self._holdings
+            self._eq_holdings[n - 1] = holdings
+            self._eq_equity[n - 1] = self.cash + holdings
+            return
+
+        if n == len(self._eq_ts):
+            for name in ("_eq_ts", "_eq_cash", "_eq_holdings", "_eq_equity"):
+                old = getattr(self, name)
+                new = np.empty(2 * len(old), dtype=old.dtype)
+                new[:n] = old
+                setattr(self, name, new)
+        if self.resync_every and n % self.resync_every == 0:
+            self._resync()
+        ts = pd.Timestamp(timestamp)
+        if n == 0:
+            self._tz = ts.tz
+        holdings = self._holdings
+        self._eq_ts[n] = ts.value
+        self._eq_cash[n] = self.cash
+        self._eq_holdings[n] = holdings
+        self._eq_equity[n] = self.cash + holdings
+        self._n = n + 1
+        self._last_ts = timestamp
+
+    @property
+    def equity_curve(self) -> pd.DataFrame:
+        """Columns timestamp, cash, holdings, equity (a copy of the filled part of the buffers)."""
+        n = self._n
+        ts = pd.to_datetime(self._eq_ts[:n], utc=self._tz is not None)
+        if self._tz is not None:
+            ts = ts.tz_convert(self._tz)
+        return pd.DataFrame({
+            "timestamp": ts,
+            "cash": self._eq_cash[:n].copy(),
+            "holdings": self._eq_holdings[:n].copy(),
+            "equity": self._eq_equity[:n].copy(),
+        })
+
+    @property
+    def positions(self) -> Dict[str, Position]:
+        """Snapshot of every symbol that has traded, as Position objects."""
+        return {
+            s: Position(s, int(self._qty[i]), float(self._avg[i]), float(self._realized[i]))
+            for s, i in self._ids.items() if self._has_pos[i]
+        }
+
+    @property
+    def last_prices(self) -> Dict[str, float]:
+        """Latest close per known symbol (0.0 if it has not been marked yet)."""
+        n = len(self._symbols)
+        return dict(zip(self._symbols, self._last[:n].tolist()))
+
+    def current_equity(self) -> float:
+        if not self._n:
+            n = len(self._symbols)
+            return self.cash + float(np.dot(self._qty[:n], self._last[:n]))
+        return float(self._eq_equity[self._n - 1])
@@ -0,0 +1,245 @@
+# core/rebalance.py
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+
+from .events import MarketEvent, MarketBatchEvent, OrderEvent
+from .hrp_sizer import FastHRPSizer
+
+
+class OnlineCovariance:
+    """
+    Covariance of a stream of return vectors kept as running first and second moments.
+    update() only copies the row into a buffer. Pending rows are folded into the moments with one
+    matrix product when cov() is read, or when the buffer fills. Work per bar is therefore O(N^2)
+    amortised and runs in BLAS, instead of re-estimating from the whole window at every rebalance.
+    - halflife: exponentially weighted mean and covariance, same recursion as
+      DataFrame.ewm(halflife, adjust=False).cov(bias=True);
+    - window: sample covariance of the last `window` observations. Leaving rows are subtracted,
+      and the moments are recomputed from the buffer once per window so rounding cannot drift.
+    """
+    def __init__(self, n_assets: int, halflife: Optional[float] = None, window: Optional[int] = None,
+                 max_pending: int = 256):
+        if (halflife is None) == (window is None):
+            raise ValueError("pass exactly one of halflife or window")
+        self.n_assets = n_assets
+        self.halflife = halflife
+        self.window = window
+        self.n = 0
+        self._folded = 0
+        self._s1 = np.zeros(n_assets)
+        self._s2 = np.zeros((n_assets, n_assets))
+        if halflife is not None:
+            self.alpha = 1.0 - 0.5 ** (1.0 / halflife)
+            self._buf = np.empty((max_pending, n_assets))
+        else:
+            # Two windows of history, so rows leaving the window are still there when folded
+            self._buf = np.empty((2 * window, n_assets))
+
+    def update(self, x: np.ndarray):
+        if self.halflife is not None:
+            if self.n - self._folded == len(self._buf):
+                self._fold()
+            self._buf[self.n - self._folded] = x
+        else:
+            if self.n - self._folded == self.window:
+                self._fold()
+            self._buf[self.n % len(self._buf)] = x
+        self.n += 1
+
+    def _fold(self):
+        lo, hi = self._folded, self.n
+        if lo == hi:
+            return
+        size = len(self._buf)
+        if self.halflife is not None:
+            x = self._buf[:hi - lo]
+            decay = 1.0 - self.alpha
+            w = self.alpha * decay ** np.arange(hi - lo - 1, -1, -1.0)
+            if lo == 0:
+                w[0] = decay ** (hi - 1)  # the first observation seeds the mean with weight 1
+            keep = decay ** (hi - lo) if lo else 0.0
+            self._s1 = keep * self._s1 + w @ x
+            self._s2 = keep * self._s2 + (x.T * w) @ x
+        else:
+            W = self.window
+            if hi // W > lo // W or hi - lo >= W:
+                # Crossed a window boundary: exact recompute from the rows in the window
+                x = self._buf[np.arange(max(0, hi - W), hi) % size]
+                self._s1 = x.sum(axis=0)
+                self._s2 = x.T @ x
+            else:
+                new = self._buf[np.arange(lo, hi) % size]
+                self._s1 = self._s1 + new.sum(axis=0)
+                self._s2 = self._s2 + new.T @ new
+                if hi > W:
+                    old = self._buf[np.arange(max(0, lo - W), hi - W) % size]
+                    self._s1 -= old.sum(axis=0)
+                    self._s2 -= old.T @ old
+        self._folded = hi
+
+    def cov(self) -> np.ndarray:
+        self._fold()
+        if self.halflife is not None:
+            if self.n == 0:
+                return np.full((self.n_assets, self.n_assets), np.nan)
+            return self._s2 - np.outer(self._s1, self._s1)
+        m = min(self.n, self.window)
+        if m < 2:
+            return np.full((self.n_assets, self.n_assets), np.nan)
+        return (self._s2 - np.outer(self._s1, self._s1) / m) / (m - 1)
+
+
+class HRPRebalancer:
+    """
+    Event-driven HRP rebalancing. Every bar it updates an OnlineCovariance with the
+    close-to-close returns of `symbols` (0 for a symbol without a new bar). Every
+    `rebalance_every` bars, once `min_obs` returns have been seen, it computes FastHRPSizer
+    weights from that covariance. It then emits MARKET OrderEvents that move current holdings
+    to weight * gross_leverage * capital / price.
+
+    Capital is `portfolio.current_equity()` when a portfolio is given (positions are read from it
+    too), otherwise the fixed `capital` with positions tracked from the orders sent.
+    Subscribe on_market_batch to batched feeds. For per-symbol feeds, subscribe on_market and
+    register on_step with EventDispatcher.add_step_hook so each timestamp is closed once.
+    """
+    def __init__(self, symbols: Sequence[str], rebalance_every: int = 390, halflife: Optional[float] = 390.0,
+                 window: Optional[int] = None, min_obs: int = 390, gross_leverage: float = 1.0,
+                 capital: float = 100_000.0, portfolio=None, sides: Optional[Dict[str, int]] = None,
+                 sizer: Optional[FastHRPSizer] = None, min_trade_qty: int = 1):
+        self.symbols = list(symbols)
+        self._ids = {s: i for i, s in enumerate(self.symbols)}
+        self.cov = OnlineCovariance(len(self.symbols), halflife=None if window else halflife, window=window)
+        self.rebalance_every = rebalance_every
+        self.min_obs = min_obs
+        self.gross_leverage = gross_leverage
+        self.capital = capital
+        self.portfolio = portfolio
+        self.sides = np.array([(sides or {}).get(s, 1) for s in self.symbols], dtype=np.float64)
+        self.sizer = sizer or FastHRPSizer()
+        self.min_trade_qty = min_trade_qty
+
+        n = len(self.symbols)
+        self._prices = np.full(n, np.nan)
+        self._prev = np.full(n, np.nan)
+        self._held = np.zeros(n, dtype=np.int64)
+        self._timestamp = None
+        self._dirty = False
+        self.steps = 0
+        self.weight_history: Dict[object, np.ndarray] = {}
+
+    def on_market(self, event: MarketEvent):
+        i = self._ids.get(event.symbol)
+        if i is not None:
+            self._prices[i] = event.close
+            self._timestamp = event.timestamp
+            self._dirty = True
+
+    def on_market_batch(self, event: MarketBatchEvent) -> List[OrderEvent]:
+        ids = self._ids
+        for sym, c in zip(event.symbols, event.close.tolist()):
+            i = ids.get(sym)
+            if i is not None:
+                self._prices[i] = c
+        self._timestamp = event.timestamp
+        self._dirty = True
+        return self.on_step()
+
+    def on_step(self) -> List[OrderEvent]:
+        """Closes the current timestamp: one covariance update, and orders if a rebalance is due."""
+        if not self._dirty:
+            return []
+        self._dirty = False
+        prices, prev = self._prices, self._prev
+        if not np.isnan(prev).all():
+            with np.errstate(invalid="ignore", divide="ignore"):
+                r = prices / prev - 1.0
+            self.cov.update(np.where(np.isfinite(r), r, 0.0))
+        self._prev = prices.copy()
+        self.steps += 1
+        if self.cov.n < self.min_obs or self.steps % self.rebalance_every != 0 or np.isnan(prices).any():
+            return []
+        return self._rebalance()
+
+    def target_weights(self) -> np.ndarray:
+        return self.sizer.weights_from_cov(self.cov.cov(), tuple(self.symbols)) * self.sides
+
+    def _rebalance(self) -> List[OrderEvent]:
+        w = self.target_weights()
+        self.weight_history[self._timestamp] = w
+        if self.portfolio is not None:
+            capital = self.portfolio.current_equity()
+            positions = self.portfolio.positions
+            held = np.array([positions[s].quantity if s in positions else 0 for s in self.symbols], dtype=np.int64)
+        else:
+            capital = self.capital
+            held = self._held
+        target = np.round(w * self.gross_leverage * capital / self._prices).astype(np.int64)
+        delta = target - held
+        orders = []
+        for i in np.flatnonzero(np.abs(delta) >= self.min_trade_qty).tolist():
+            q = int(delta[i])
+            orders.append(OrderEvent(self._timestamp, self.symbols[i], "MARKET", abs(q), "BUY" if q > 0 else "SELL"))
+        if self.portfolio is None:
+            self._held = held + np.where(np.abs(delta) >= self.min_trade_qty, delta, 0)
+        return orders
+
+
+def _weights_for_block(returns: np.ndarray, rows: List[int], start: int, symbols, halflife, window):
+    """Worker: replays the returns from `start` and records HRP weights at each row in `rows`."""
+    cov = OnlineCovariance(returns.shape[1], halflife=halflife, window=window)
+    sizer = FastHRPSizer()
+    out = []
+    want = iter(rows)
+    nxt = next(want, None)
+    for t in range(start, rows[-1] + 1):
+        cov.update(returns[t - start])
+        if t == nxt:
+            out.append(sizer.weights_from_cov(cov.cov(), symbols))
+            nxt = next(want, None)
+    return out
+
+
+def hrp_weight_history(
+    returns: pd.DataFrame,
+    rebalance_every: int = 390,
+    halflife: Optional[float] = 390.0,
+    window: Optional[int] = None,
+    min_obs: int = 390,
+    n_workers: int = 1,
+    burn_in: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Research/batch mode: HRP weights at every rebalance row of a returns frame, spread over a
+    process pool in contiguous blocks of rebalance dates. Rebalances fall on the same rows as
+    HRPRebalancer (every `rebalance_every`-th return once `min_obs` have been seen).
+    In window mode each block starts `window` rows before its first date, so its weights are
+    exact. In EWM mode each block replays from the first row unless `burn_in` (rows, e.g.
+    20 halflives) truncates the history; older observations then carry weight below 2**-20.
+    """
+    if window:
+        halflife = None
+    x = np.ascontiguousarray(returns.to_numpy(dtype=np.float64))
+    x = np.where(np.isfinite(x), x, 0.0)
+    symbols = tuple(returns.columns)
+    # Row t holds the (t+1)-th return; the online engine checks its schedule on step t+2 (bar t+1 after the first)
+    rows = [t for t in range(len(x)) if t + 1 >= min_obs and (t + 2) % rebalance_every == 0]
+    if not rows:
+        return pd.DataFrame(columns=list(symbols), dtype=float)
+
+    n_blocks = max(1, min(len(rows), n_workers * 4))
+    blocks = [b.tolist() for b in np.array_split(np.array(rows), n_blocks) if len(b)]
+    lookback = window if window else burn_in
+
+    def start_of(block):
+        return 0 if lookback is None else max(0, block[0] - lookback + 1)
+
+    args = [(x[start_of(b):b[-1] + 1], b, start_of(b), symbols, halflife, window) for b in blocks]
+    if n_workers > 1:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            results = list(pool.map(_weights_for_block, *zip(*args)))
+    else:
+        results = [_weights_for_block(*a) for a in args]
+    weights = np.vstack([w for block in results for w in block])
+    return pd.DataFrame(weights, index=returns.index[rows], columns=list(symbols))
@@ -1,6 +1,10 @@
 # core/slippage.py
 from abc import ABC, abstractmethod
-from .events import OrderEvent
+from typing import Dict, List
+import math
+import numpy as np
+from scipy.signal import lfilter
+from .events import OrderEvent, MarketEvent, MarketBatchEvent
 
 class SlippageModel(ABC):
     """Abstract interface for slippage models."""
@@ -9,11 +13,31 @@ class SlippageModel(ABC):
         """Returns the new price after applying slippage."""
         raise NotImplementedError
 
+    def on_market(self, event: MarketEvent):
+        """Called by the execution handler after each bar; stateful models update here."""
+        pass
+
+    def on_market_batch(self, event: MarketBatchEvent):
+        """Batch counterpart of on_market; falls back to per-symbol updates for models that override on_market."""
+        if type(self).on_market is not SlippageModel.on_market:
+            for e in event.events():
+                self.on_market(e)
+
+    def cost_array(self, panel, quantity: int) -> np.ndarray:
+        """
+        Vectorized variant: (T, S) fractional cost for a `quantity` trade at each bar of a BarPanel,
+        applied as open * (1 + cost) for buys and open * (1 - cost) for sells.
+        """
+        raise NotImplementedError(f"{type(self).__name__} has no vectorized variant")
+
 class NoSlippage(SlippageModel):
     """Ideal model with zero slippage."""
     def calculate(self, order: OrderEvent, fill_price: float) -> float:
         return fill_price
 
+    def cost_array(self, panel, quantity: int) -> np.ndarray:
+        return np.zeros(panel.close.shape)
+
 class FixedBasisPointsSlippage(SlippageModel):
     """Applies a fixed basis point slippage cost to the fill price."""
     def __init__(self, basis_points: float = 5.0): # 5 bps
@@ -24,4 +48,85 @@ class FixedBasisPointsSlippage(SlippageModel):
             return fill_price * (1.0 + self.bps) # Buys at a slightly higher price
         elif order.direction == "SELL":
             return fill_price * (1.0 - self.bps) # Sells at a slightly lower price
-        return fill_price
\ No newline at end of file
+        return fill_price
+
+    def cost_array(self, panel, quantity: int) -> np.ndarray:
+        return np.full(panel.close.shape, self.bps)
+
+class SquareRootImpactSlippage(SlippageModel):
+    """
+    Square-root market impact: cost = base_bps + eta * sigma * sqrt(quantity / volume), capped at max_bps,
+    where sigma is the per-bar volatility of log returns and volume the average bar volume, both
+    exponentially weighted with `halflife` bars (the ratio is the same at any bar frequency).
+    State is four numbers per symbol updated in O(1) per bar; the impact term is zero until a
+    symbol has `min_periods` bars or while its average volume is zero.
+    """
+    def __init__(self, eta: float = 1.0, halflife: float = 30.0, base_bps: float = 1.0,
+                 max_bps: float = 500.0, min_periods: int = 20):
+        self.eta = eta
+        self.alpha = 1.0 - 0.5 ** (1.0 / halflife)
+        self.base = base_bps / 10000.0
+        self.max_cost = max_bps / 10000.0
+        self.min_periods = min_periods
+        # symbol -> [bars seen, last close, EWM squared log return, EWM volume]
+        self._state: Dict[str, List[float]] = {}
+
+    def on_market(self, event: MarketEvent):
+        self._update(event.symbol, event.close, event.volume)
+
+    def on_market_batch(self, event: MarketBatchEvent):
+        for sym, c, v in zip(event.symbols, event.close.tolist(), event.volume.tolist()):
+            self._update(sym, c, v)
+
+    def _update(self, sym: str, close: float, volume: float):
+        st = self._state.get(sym)
+        if st is None:
+            self._state[sym] = [1, close, 0.0, volume]
+            return
+        a = self.alpha
+        prev = st[1]
+        r = math.log(close / prev) if prev > 0 and close > 0 else 0.0
+        st[2] = r * r if st[0] == 1 else a * (r * r) + (1.0 - a) * st[2]
+        st[3] = a * volume + (1.0 - a) * st[3]
+        st[0] += 1
+        st[1] = close
+
+    def cost(self, symbol: str, quantity: float) -> float:
+        """Fractional cost of trading `quantity` of `symbol` given the bars seen so far."""
+        st = self._state.get(symbol)
+        if st is None or st[0] < self.min_periods or st[3] <= 0:
+            return min(self.base, self.max_cost)
+        return min(self.base + self.eta * math.sqrt(st[2]) * math.sqrt(abs(quantity) / st[3]), self.max_cost)
+
+    def calculate(self, order: OrderEvent, fill_price: float) -> float:
+        c = self.cost(order.symbol, order.quantity)
+        if order.direction == "BUY":
+            return fill_price * (1.0 + c)
+        elif order.direction == "SELL":
+            return fill_price * (1.0 - c)
+        return fill_price
+
+    def cost_array(self, panel, quantity: int) -> np.ndarray:
+        """Same recursion per symbol over the bars it printed, evaluated after each bar like the event loop."""
+        a = self.alpha
+        out = np.full(panel.close.shape, np.nan)
+        for j in range(panel.close.shape[1]):
+            rows = np.flatnonzero(panel.has_bar[:, j])
+            if len(rows) == 0:
+                continue
+            close = panel.close[rows, j]
+            volume = panel.volume[rows, j]
+            prev = close[:-1]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                r = np.where((prev > 0) & (close[1:] > 0), np.log(close[1:] / prev), 0.0)
+            var = np.zeros(len(rows))
+            if len(r):
+                r2 = r * r
+                var[1:] = lfilter([a], [1.0, -(1.0 - a)], r2, zi=[(1.0 - a) * r2[0]])[0]
+            vol = lfilter([a], [1.0, -(1.0 - a)], volume, zi=[(1.0 - a) * volume[0]])[0]
+            n_seen = np.arange(1, len(rows) + 1)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                impact = self.eta * np.sqrt(var) * np.sqrt(abs(quantity) / vol)
+            impact = np.where((n_seen >= self.min_periods) & (vol > 0), impact, 0.0)
+            out[rows, j] = np.minimum(self.base + impact, self.max_cost)
+        return out
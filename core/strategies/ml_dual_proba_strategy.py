@@ -1,7 +1,7 @@
 # core/strategies/ml_dual_proba_strategy.py
-from typing import Dict, List
+from typing import Dict, List, Tuple
 import pandas as pd
-from ..events import MarketEvent, SignalEvent
+from ..events import MarketEvent, MarketBatchEvent, SignalEvent
 
 class MLDualProbaStrategy:
     def __init__(self, symbol_to_df: Dict[str, pd.DataFrame], thr_up: Dict[str, float], thr_dn: Dict[str, float]):
@@ -11,14 +11,28 @@ class MLDualProbaStrategy:
         self.pfeeds = symbol_to_df
         self.tu = thr_up
         self.td = thr_dn
+        # timestamp -> (proba_up, proba_dn) per symbol, so each bar costs one dict lookup
+        self._lookup: Dict[str, Dict[pd.Timestamp, Tuple[float, float]]] = {}
+        for sym, df in symbol_to_df.items():
+            df = df[~df.index.duplicated(keep="first")]
+            self._lookup[sym] = dict(zip(df.index, zip(df["proba_up"].astype(float).tolist(),
+                                                       df["proba_dn"].astype(float).tolist())))
 
     def on_market(self, event: MarketEvent) -> List[SignalEvent]:
-        sym = event.symbol
-        df = self.pfeeds.get(sym)
-        if df is None or event.timestamp not in df.index:
+        return self._signal(event.timestamp, event.symbol)
+
+    def on_market_batch(self, event: MarketBatchEvent) -> List[SignalEvent]:
+        """Signals for every symbol in a per-timestamp batch, in batch order."""
+        sigs: List[SignalEvent] = []
+        for sym in event.symbols:
+            sigs.extend(self._signal(event.timestamp, sym))
+        return sigs
+
+    def _signal(self, timestamp, sym: str) -> List[SignalEvent]:
+        probas = self._lookup.get(sym)
+        if probas is None or timestamp not in probas:
             return []
-        pu = float(df.loc[event.timestamp, "proba_up"])
-        pdn = float(df.loc[event.timestamp, "proba_dn"])
+        pu, pdn = probas[timestamp]
         tu = float(self.tu.get(sym, 0.6))
         td = float(self.td.get(sym, 0.6))
 
@@ -33,5 +47,5 @@ class MLDualProbaStrategy:
             best_signal = max(cand, key=lambda x: x[1])
             direction = best_signal[0]
             strength = pu if direction == "LONG" else pdn
-            sigs.append(SignalEvent(timestamp=event.timestamp, symbol=sym, direction=direction, strength=strength))
+            sigs.append(SignalEvent(timestamp=timestamp, symbol=sym, direction=direction, strength=strength))
         return sigs
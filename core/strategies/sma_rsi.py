@@ -59,7 +59,7 @@ class SmaRsiStrategy(Strategy):
 
     def on_market(self, event: MarketEvent) -> List[SignalEvent]:
         sym = event.symbol
-        close = float(event.ohlcv["close"])
+        close = float(event.close)
         self.closes[sym].append(close)
 
         arr = np.array(self.closes[sym], dtype=float)
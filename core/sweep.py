@@ -0,0 +1,218 @@
+# core/sweep.py
+import hashlib
+import itertools
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Dict, Iterable, List, Optional
+import numpy as np
+import pandas as pd
+
+from .metrics import summarize_performance
+from .vectorized import BarPanel, run_vectorized_backtest
+
+_PANEL_FIELDS = ("open", "high", "low", "close", "volume", "proba_up", "proba_dn")
+_KPI_COLUMNS = ("annualized_return", "sharpe", "sortino", "max_drawdown",
+                "max_drawdown_start", "max_drawdown_end", "calmar")
+
+
+def attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """Attach to an existing block; the creating process stays responsible for unlinking it."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13: pool workers share the parent's resource tracker
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedPanel:
+    """
+    BarPanel plus dual probabilities copied once into a single shared-memory block.
+    Workers rebuild zero-copy NumPy views from `spec` instead of reloading CSVs.
+    """
+    def __init__(self, panel: BarPanel, proba_up: np.ndarray, proba_dn: np.ndarray):
+        arrays = {f: getattr(panel, f) for f in _PANEL_FIELDS[:5]}
+        arrays["proba_up"] = proba_up
+        arrays["proba_dn"] = proba_dn
+        shape = panel.close.shape
+        nbytes = sum(np.asarray(arrays[f], dtype=np.float64).nbytes for f in _PANEL_FIELDS)
+        self._shm = shared_memory.SharedMemory(create=True, size=max(nbytes, 1))
+        offset = 0
+        for f in _PANEL_FIELDS:
+            view = np.ndarray(shape, dtype=np.float64, buffer=self._shm.buf, offset=offset)
+            view[:] = arrays[f]
+            offset += view.nbytes
+        self.spec = {
+            "name": self._shm.name,
+            "shape": shape,
+            "symbols": list(panel.symbols),
+            "timestamps_ns": panel.timestamps.as_unit("ns").asi8.copy(),
+            "tz": str(panel.timestamps.tz) if panel.timestamps.tz is not None else None,
+        }
+
+    def close(self):
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def views_from_spec(spec: Dict[str, Any], shm: shared_memory.SharedMemory):
+    """(BarPanel, proba_up, proba_dn) as read-only views over an attached block."""
+    views = {}
+    offset = 0
+    for f in _PANEL_FIELDS:
+        v = np.ndarray(spec["shape"], dtype=np.float64, buffer=shm.buf, offset=offset)
+        v.flags.writeable = False
+        views[f] = v
+        offset += v.nbytes
+    timestamps = pd.DatetimeIndex(pd.to_datetime(spec["timestamps_ns"], unit="ns", utc=True))
+    timestamps = timestamps.tz_convert(spec["tz"]) if spec["tz"] else timestamps.tz_localize(None)
+    panel = BarPanel(timestamps=timestamps, symbols=spec["symbols"],
+                     **{f: views[f] for f in _PANEL_FIELDS[:5]})
+    return panel, views["proba_up"], views["proba_dn"]
+
+
+def config_grid(**axes: Iterable) -> List[Dict[str, Any]]:
+    """Cartesian product of parameter axes, e.g. config_grid(thr_up=[0.5, 0.6], quantity=[10, 20])."""
+    keys = list(axes.keys())
+    return [dict(zip(keys, values)) for values in itertools.product(*(list(axes[k]) for k in keys))]
+
+
+def inputs_id(panel: BarPanel, proba_up: np.ndarray, proba_dn: np.ndarray,
+              thr_up: Optional[Dict[str, float]], thr_dn: Optional[Dict[str, float]],
+              initial_cash: float, periods_per_year: int) -> str:
+    """Fingerprint of everything a sweep row depends on besides its config: bars, probabilities, base thresholds."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(panel.timestamps.as_unit("ns").asi8.tobytes())
+    h.update(json.dumps([list(panel.symbols), thr_up or {}, thr_dn or {}, initial_cash, periods_per_year],
+                        sort_keys=True, default=str).encode())
+    for a in [getattr(panel, f) for f in _PANEL_FIELDS[:5]] + [proba_up, proba_dn]:
+        h.update(np.ascontiguousarray(a, dtype=np.float64).tobytes())
+    return h.hexdigest()
+
+
+def config_id(config: Dict[str, Any], inputs: str = "") -> str:
+    """
+    Stable id of a configuration on given inputs (see inputs_id), used to resume interrupted sweeps;
+    rows computed from other bars, probabilities or base thresholds get different ids.
+    """
+    blob = json.dumps(config, sort_keys=True, default=str)
+    return hashlib.sha1((inputs + blob).encode()).hexdigest()[:16]
+
+
+# Per-worker state set by _init_worker
+_WORKER: Dict[str, Any] = {}
+
+
+def _init_worker(spec, base_thr_up, base_thr_dn, initial_cash, periods_per_year, inputs):
+    shm = attach_shared_memory(spec["name"])
+    panel, up, dn = views_from_spec(spec, shm)
+    _WORKER.update(shm=shm, panel=panel, up=up, dn=dn, thr_up=base_thr_up, thr_dn=base_thr_dn,
+                   initial_cash=initial_cash, periods_per_year=periods_per_year, inputs=inputs)
+
+
+def _thresholds(value, base: Dict[str, float], symbols: List[str]) -> Dict[str, float]:
+    if value is None:
+        return base
+    if isinstance(value, dict):
+        return {s: float(value.get(s, base.get(s, 0.6))) for s in symbols}
+    return {s: float(value) for s in symbols}
+
+
+def _run_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    w = _WORKER
+    panel = w["panel"]
+    res = run_vectorized_backtest(
+        panel, w["up"], w["dn"],
+        thr_up=_thresholds(config.get("thr_up"), w["thr_up"], panel.symbols),
+        thr_dn=_thresholds(config.get("thr_dn"), w["thr_dn"], panel.symbols),
+        quantity=int(config.get("quantity", 10)),
+        slippage_bps=float(config.get("slippage_bps", 5.0)),
+        commission_pct=float(config.get("commission_pct", 0.001)),
+        initial_cash=w["initial_cash"],
+    )
+    row = {"config_id": config_id(config, w["inputs"]), **config, "fill_count": res.fill_count,
+           "final_equity": float(res.equity_curve["equity"].iloc[-1]) if len(res.equity_curve) else float("nan")}
+    row.update({k: float("nan") for k in _KPI_COLUMNS})
+    if res.fill_count > 0:
+        row.update(summarize_performance(res.equity_curve, rf_rate=0.0, periods_per_year=w["periods_per_year"]))
+    return row
+
+
+def run_sweep(
+    panel: BarPanel,
+    proba_up: np.ndarray,
+    proba_dn: np.ndarray,
+    configs: List[Dict[str, Any]],
+    out_csv: str,
+    thr_up: Optional[Dict[str, float]] = None,
+    thr_dn: Optional[Dict[str, float]] = None,
+    n_workers: Optional[int] = None,
+    initial_cash: float = 100_000.0,
+    periods_per_year: int = 252 * 390,
+    chunksize: int = 8,
+    flush_every: int = 50,
+    progress_every: float = 5.0,
+) -> pd.DataFrame:
+    """
+    Runs every configuration through the vectorized engine on a process pool and collects the
+    summarize_performance KPIs into one table. Market data and probabilities are shared with the
+    workers through shared memory. Finished rows are appended to out_csv as they arrive; on rerun,
+    configurations whose config_id is already in out_csv are skipped. The id covers the bars,
+    probabilities and base thresholds too, so after retraining or a data refresh every config runs
+    again, and only rows for the current inputs are returned.
+    Config keys: thr_up, thr_dn (scalar for all symbols, dict per symbol, or None for the base
+    thresholds), quantity, slippage_bps, commission_pct.
+    """
+    inputs = inputs_id(panel, proba_up, proba_dn, thr_up, thr_dn, initial_cash, periods_per_year)
+    ids = {config_id(c, inputs) for c in configs}
+    done = set()
+    if os.path.exists(out_csv):
+        done = set(pd.read_csv(out_csv, usecols=["config_id"], dtype={"config_id": str})["config_id"])
+    todo = [c for c in configs if config_id(c, inputs) not in done]
+    total = len(todo)
+    print(f"Sweep: {len(configs)} configs, {len(configs) - total} already done, {total} to run")
+
+    if total:
+        buf: List[Dict[str, Any]] = []
+
+        def _flush():
+            if buf:
+                df = pd.DataFrame(buf)
+                if os.path.exists(out_csv):
+                    # Keep the column layout of the rows already on disk
+                    header = pd.read_csv(out_csv, nrows=0).columns
+                    df.reindex(columns=header).to_csv(out_csv, mode="a", header=False, index=False)
+                else:
+                    df.to_csv(out_csv, index=False)
+                buf.clear()
+
+        with SharedPanel(panel, proba_up, proba_dn) as shared:
+            initargs = (shared.spec, thr_up or {}, thr_dn or {}, initial_cash, periods_per_year, inputs)
+            t0 = last = time.perf_counter()
+            with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker, initargs=initargs) as pool:
+                try:
+                    for k, row in enumerate(pool.map(_run_config, todo, chunksize=chunksize), start=1):
+                        buf.append(row)
+                        if len(buf) >= flush_every:
+                            _flush()
+                        now = time.perf_counter()
+                        if now - last >= progress_every or k == total:
+                            rate = k / (now - t0)
+                            eta = (total - k) / rate if rate > 0 else math.inf
+                            print(f"  {k}/{total} configs  {rate:,.1f}/s  eta {eta:,.0f}s")
+                            last = now
+                finally:
+                    _flush()
+
+    if not os.path.exists(out_csv):
+        return pd.DataFrame()
+    results = pd.read_csv(out_csv, dtype={"config_id": str})
+    return results[results["config_id"].isin(ids)].reset_index(drop=True)
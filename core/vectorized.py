@@ -0,0 +1,150 @@
+# core/vectorized.py
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+
+@dataclass
+class BarPanel:
+    """
+    Bars for several symbols aligned on the union of their timestamps.
+    Arrays are (T, S); NaN marks a symbol without a bar at that timestamp.
+    """
+    timestamps: pd.DatetimeIndex
+    symbols: List[str]
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    @property
+    def has_bar(self) -> np.ndarray:
+        return ~np.isnan(self.close)
+
+
+def align_panel(frames: Dict[str, pd.DataFrame]) -> BarPanel:
+    """Aligns per-symbol OHLCV frames (indexed by datetime) onto one sorted timestamp union."""
+    symbols = list(frames.keys())
+    index = None
+    for df in frames.values():
+        index = df.index if index is None else index.union(df.index)
+    index = pd.DatetimeIndex(index).sort_values()
+    cols = {}
+    for col in ("open", "high", "low", "close", "volume"):
+        arr = np.full((len(index), len(symbols)), np.nan)
+        for j, sym in enumerate(symbols):
+            df = frames[sym]
+            if col in df.columns:
+                arr[:, j] = df[col].astype(float).reindex(index).to_numpy()
+            elif col == "volume":
+                arr[:, j] = np.where(df["close"].reindex(index).notna(), 0.0, np.nan)
+        cols[col] = arr
+    return BarPanel(timestamps=index, symbols=symbols, **cols)
+
+
+def align_probas(pfeeds: Dict[str, pd.DataFrame], panel: BarPanel) -> Tuple[np.ndarray, np.ndarray]:
+    """(T, S) proba_up / proba_dn on the panel's timestamps, NaN where no prediction exists."""
+    up = np.full(panel.close.shape, np.nan)
+    dn = np.full(panel.close.shape, np.nan)
+    for j, sym in enumerate(panel.symbols):
+        df = pfeeds.get(sym)
+        if df is None:
+            continue
+        df = df[~df.index.duplicated(keep="first")]
+        up[:, j] = df["proba_up"].astype(float).reindex(panel.timestamps).to_numpy()
+        dn[:, j] = df["proba_dn"].astype(float).reindex(panel.timestamps).to_numpy()
+    return up, dn
+
+
+def dual_proba_signals(
+    proba_up: np.ndarray,
+    proba_dn: np.ndarray,
+    thr_up: np.ndarray,
+    thr_dn: np.ndarray,
+    has_bar: np.ndarray,
+) -> np.ndarray:
+    """
+    Whole-array MLDualProbaStrategy: +1 LONG, -1 SHORT, 0 none.
+    When both sides clear their thresholds the larger margin wins, LONG on ties.
+    """
+    with np.errstate(invalid="ignore"):
+        m_up = proba_up - thr_up
+        m_dn = proba_dn - thr_dn
+        long_ok = m_up >= 0
+        short_ok = m_dn >= 0
+    sig = np.zeros(proba_up.shape, dtype=np.int64)
+    sig[short_ok] = -1
+    sig[long_ok & (~short_ok | (m_up >= m_dn))] = 1
+    sig[~has_bar] = 0
+    return sig
+
+
+@dataclass
+class VectorizedBacktestResult:
+    equity_curve: pd.DataFrame   # timestamp, cash, holdings, equity (one row per timestamp)
+    signals: np.ndarray          # (T, S) +1/-1/0
+    fill_prices: np.ndarray      # (T, S), NaN where nothing filled
+    commissions: np.ndarray      # (T, S)
+    positions: np.ndarray        # (T, S) position after the fills of each timestamp
+    cash: np.ndarray             # (T,) cash after the fills of each timestamp
+    fill_count: int
+
+
+def run_vectorized_backtest(
+    panel: BarPanel,
+    proba_up: np.ndarray,
+    proba_dn: np.ndarray,
+    thr_up: Dict[str, float],
+    thr_dn: Dict[str, float],
+    quantity: int = 10,
+    slippage_bps: float = 5.0,
+    commission_pct: float = 0.001,
+    initial_cash: float = 100_000.0,
+    slippage_cost: Optional[np.ndarray] = None,
+) -> VectorizedBacktestResult:
+    """
+    Whole-array equivalent of the event loop in run_loop_ml.py
+    (MLDualProbaStrategy -> FixedSizeOrderSizer -> SimulatedExecutionHandler -> Portfolio):
+    - a signal at bar t trades `quantity` at that bar's open, moved by slippage_bps against the trade,
+      paying commission_pct of the traded value; a (T, S) `slippage_cost` array of fractional costs
+      (e.g. SlippageModel.cost_array) replaces the flat slippage_bps;
+    - the equity row for t is marked at the closes of t (carried forward for symbols without a bar)
+      using cash and positions from before t's fills, exactly as Portfolio.on_market records it.
+    """
+    tu = np.array([float(thr_up.get(s, 0.6)) for s in panel.symbols])
+    td = np.array([float(thr_dn.get(s, 0.6)) for s in panel.symbols])
+    sig = dual_proba_signals(proba_up, proba_dn, tu, td, panel.has_bar)
+
+    traded = sig != 0
+    bps = slippage_bps / 10000.0 if slippage_cost is None else slippage_cost
+    fill_px = np.where(traded, panel.open * (1.0 + bps * sig), np.nan)
+    signed_qty = sig * int(quantity)
+    gross = np.where(traded, signed_qty * fill_px, 0.0)
+    comm = np.where(traded, np.abs(quantity * fill_px) * commission_pct, 0.0)
+
+    cash_after = initial_cash - np.cumsum(gross.sum(axis=1) + comm.sum(axis=1))
+    pos_after = np.cumsum(signed_qty, axis=0)
+
+    # State seen by the mark-to-market at t is the state after t-1's fills
+    cash_before = np.r_[initial_cash, cash_after[:-1]]
+    pos_before = np.vstack([np.zeros((1, pos_after.shape[1]), dtype=pos_after.dtype), pos_after[:-1]])
+    last_close = pd.DataFrame(panel.close).ffill().fillna(0.0).to_numpy()
+    holdings = (pos_before * last_close).sum(axis=1)
+
+    equity_curve = pd.DataFrame({
+        "timestamp": [t.to_pydatetime() for t in panel.timestamps],
+        "cash": cash_before,
+        "holdings": holdings,
+        "equity": cash_before + holdings,
+    })
+    return VectorizedBacktestResult(
+        equity_curve=equity_curve,
+        signals=sig,
+        fill_prices=fill_px,
+        commissions=comm,
+        positions=pos_after,
+        cash=cash_after,
+        fill_count=int(traded.sum()),
+    )
@@ -1,17 +1,25 @@
-import yfinance as yf
-import pandas as pd
 import os
 import datetime as dt
+from core.bar_store import BarStore
+from core.data import load_bar_arrays
+from core.download import YFinanceSource, DownloadManifest, download_bars
 
 # --- Configuration ---
 SYMBOLS = ["AAPL", "MSFT"]
 DATA_DIR = "data"
 INTERVAL = "60m"
+BAR_STORE_DIR = os.path.join(DATA_DIR, "bars")
+MANIFEST_PATH = os.path.join(BAR_STORE_DIR, "manifest.json")
+MAX_WORKERS = 4
+MAX_REQUESTS_PER_SEC = 2.0
 
-def download_data_in_chunks(start_date, end_date):
+def download_data_in_chunks(start_date, end_date, source=None):
     """
-    Downloads historical 1-minute data for the specified symbols.
-    The Yahoo Finance API limits this to the most recent 30 days.
+    Downloads historical intraday data for the specified symbols in 7-day chunks.
+    Chunks are fetched concurrently (rate limited), merged de-duplicated and sorted into the bar store,
+    and recorded in a manifest so reruns only fetch missing ranges.
+    data/{SYMBOL}_1min.csv is re-exported from the store so it never contains duplicate rows; a CSV
+    whose symbol is not in the store yet seeds it first, so its history is kept.
     """
     print("--- Starting Data Download ---")
     os.makedirs(DATA_DIR, exist_ok=True)
@@ -22,54 +30,33 @@ def download_data_in_chunks(start_date, end_date):
         print(f"Warning: 1m data is only available for the last 30 days. Adjusting start date from {start_date.strftime('%Y-%m-%d')} to {thirty_days_ago.strftime('%Y-%m-%d')}.")
         start_date = thirty_days_ago
 
-    # Define the chunk size to respect the API limit
-    chunk_size = dt.timedelta(days=7)
-
+    store = BarStore(BAR_STORE_DIR)
+    # The store is not versioned: seed it from existing CSVs before the export overwrites them.
+    # merge() de-duplicates rows that earlier appending runs wrote twice.
     for symbol in SYMBOLS:
-        print(f"Downloading {symbol} data...")
-        current_start = start_date
-        
-        # Loop to download data in 7-day chunks
-        while current_start < end_date:
-            current_end = min(current_start + chunk_size, end_date)
-            print(f"  Fetching data from {current_start.strftime('%Y-%m-%d')} to {current_end.strftime('%Y-%m-%d')}...")
-
-            try:
-                # Download data from Yahoo Finance
-                data = yf.download(tickers=symbol, start=current_start, end=current_end, interval=INTERVAL)
-
-                if data.empty:
-                    print(f"  No data downloaded for {symbol} for this period.")
-                    current_start += chunk_size
-                    continue
-
-                # The column names from yfinance are a MultiIndex. We need to flatten them and make them lowercase.
-                if isinstance(data.columns, pd.MultiIndex):
-                    data.columns = data.columns.get_level_values(0)
-                data.columns = [str(col).lower() for col in data.columns]
-                
-                # The 'datetime' column is in the index. We need to make it a regular column.
-                data.reset_index(inplace=True)
-                
-                # Rename the datetime column to 'datetime' (lowercase)
-                if 'Datetime' in data.columns:
-                    data.rename(columns={'Datetime': 'datetime'}, inplace=True)
-                elif 'index' in data.columns:
-                    data.rename(columns={'index': 'datetime'}, inplace=True)
-                
-                # Append to existing CSV or create a new one
-                file_path = os.path.join(DATA_DIR, f"{symbol}_1min.csv")
-                if os.path.exists(file_path):
-                    data.to_csv(file_path, mode='a', header=False, index=False)
-                    print(f"  Appended {symbol} data to {file_path}")
-                else:
-                    data.to_csv(file_path, index=False)
-                    print(f"  Saved {symbol} data to {file_path}")
+        file_path = os.path.join(DATA_DIR, f"{symbol}_1min.csv")
+        if not store.has_symbol(symbol) and os.path.exists(file_path):
+            ts, ohlcv, _ = load_bar_arrays(file_path)
+            n = store.merge(symbol, ts, ohlcv)
+            print(f"  {symbol}: seeded {BAR_STORE_DIR}/{symbol}.bars with {n} bars from {file_path}")
+    manifest = DownloadManifest(MANIFEST_PATH)
+    totals = download_bars(
+        SYMBOLS, start_date, end_date,
+        source=source or YFinanceSource(interval=INTERVAL),
+        store=store,
+        manifest=manifest,
+        chunk_size=dt.timedelta(days=7),
+        max_workers=MAX_WORKERS,
+        max_requests_per_sec=MAX_REQUESTS_PER_SEC,
+    )
 
-            except Exception as e:
-                print(f"An error occurred while downloading data for {symbol}: {e}")
-                
-            current_start += chunk_size
+    for symbol, n in totals.items():
+        if n == 0:
+            print(f"  No data downloaded for {symbol}.")
+            continue
+        file_path = os.path.join(DATA_DIR, f"{symbol}_1min.csv")
+        store.to_csv(symbol, file_path)
+        print(f"  {symbol}: {n} bars in {BAR_STORE_DIR}/{symbol}.bars, exported to {file_path}")
 
     print("--- Data Download Complete ---")
 
@@ -77,4 +64,4 @@ if __name__ == "__main__":
     # Specify the full date range you want to download (e.g., 90 days)
     end_date = dt.datetime.now()
     start_date = end_date - dt.timedelta(days=90)
-    download_data_in_chunks(start_date, end_date)
\ No newline at end of file
+    download_data_in_chunks(start_date, end_date)
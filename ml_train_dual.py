@@ -2,8 +2,9 @@
 import os
 import numpy as np
 import pandas as pd
-from core.features import make_features
-from core.labeling import get_triple_barrier_labels
+from core.feature_engine import make_features_fast
+from core.labeling import get_triple_barrier_labels_fast
+from core.feature_cache import FeatureCache
 from core.model_selection import CombinatorialPurgedCV
 from core.models import train_random_forest_cpcv
 from core.calibration import fit_isotonic, apply_calibrator, fit_platt, apply_platt
@@ -13,13 +14,22 @@ def train_dual_side(
     profit_take=0.01, stop_loss=0.01, tmax=240,
     cost_per_trade=0.0015,
     out_dir="artifacts", symbol="AAPL",
-    calibration="isotonic"  # "isotonic" | "platt"
+    calibration="isotonic",  # "isotonic" | "platt"
+    cache: FeatureCache = None,  # reuse features/labels computed for the same bars and parameters
+    feature_columns=None,  # e.g. the top of shap_global_folds' ranking; None trains on every feature
+    features: pd.DataFrame = None, labels: pd.DataFrame = None  # precomputed, e.g. by core.panel.compute_panel
 ):
-    X = make_features(df)
-    labels = get_triple_barrier_labels(
-        prices=df["close"], events=df.index,
-        profit_take_pct=profit_take, stop_loss_pct=stop_loss, time_limit_periods=tmax
-    )
+    if features is not None and labels is not None:
+        X = features if feature_columns is None else features[list(feature_columns)]
+    elif cache is not None:
+        X = cache.features(df, symbol, columns=feature_columns)
+        labels = cache.labels(df, symbol, profit_take, stop_loss, tmax)
+    else:
+        X = make_features_fast(df, columns=feature_columns)
+        labels = get_triple_barrier_labels_fast(
+            prices=df["close"], events=df.index,
+            profit_take_pct=profit_take, stop_loss_pct=stop_loss, time_limit_periods=tmax
+        )
     Z = X.join(labels[["label","t_final","ret"]], how="inner").dropna()
     Xz = Z[X.columns]
     y_up = (Z["label"] == 1).astype(int)
@@ -0,0 +1,92 @@
+# run_hrp_rebalance.py
+import argparse
+import pandas as pd
+from core.event_queue import FastEventQueue
+from core.execution import SimulatedExecutionHandler
+from core.commission import FixedPercentageCommission
+from core.slippage import FixedBasisPointsSlippage
+from core.events import MarketEvent, MarketBatchEvent, OrderEvent, FillEvent
+from core.dispatcher import EventDispatcher
+from core.portfolio import Portfolio
+from core.metrics import summarize_performance
+from core.bar_store import load_bars
+from core.rebalance import HRPRebalancer, hrp_weight_history
+from run_loop_ml import SYMBOLS, DATA_DIR, make_data_handler
+
+
+def run_hrp_backtest(symbols, rebalance_every=390, halflife=390.0, window=None, min_obs=390,
+                     gross_leverage=1.0, slippage_bps=5.0, commission_pct=0.001, initial_cash=100_000.0,
+                     data_dir=DATA_DIR, batch=True):
+    """
+    Event-driven HRP allocation: rebalances to FastHRPSizer weights every `rebalance_every` bars from an
+    incrementally updated covariance. Returns (equity curve DataFrame, number of fills, rebalancer).
+    """
+    eq = FastEventQueue()
+    data = make_data_handler(eq, symbols, data_dir, batch=batch)
+    exec_handler = SimulatedExecutionHandler(
+        event_queue=eq,
+        commission_model=FixedPercentageCommission(commission_pct),
+        slippage_model=FixedBasisPointsSlippage(slippage_bps),
+    )
+    portfolio = Portfolio(initial_cash=initial_cash)
+    rebalancer = HRPRebalancer(symbols, rebalance_every=rebalance_every, halflife=halflife, window=window,
+                               min_obs=min_obs, gross_leverage=gross_leverage, portfolio=portfolio)
+
+    dispatcher = EventDispatcher(eq)
+    dispatcher.subscribe(MarketEvent, portfolio.on_market, "Portfolio.on_market")
+    dispatcher.subscribe(MarketEvent, exec_handler.on_market, "Execution.on_market")
+    dispatcher.subscribe(MarketEvent, rebalancer.on_market, "Rebalancer.on_market")
+    dispatcher.subscribe(MarketBatchEvent, portfolio.on_market_batch, "Portfolio.on_market_batch")
+    dispatcher.subscribe(MarketBatchEvent, exec_handler.on_market_batch, "Execution.on_market_batch")
+    dispatcher.subscribe(MarketBatchEvent, rebalancer.on_market_batch, "Rebalancer.on_market_batch")
+    dispatcher.subscribe(OrderEvent, exec_handler.on_order, "Execution.on_order")
+    dispatcher.subscribe(FillEvent, portfolio.on_fill, "Portfolio.on_fill")
+    # Per-symbol feeds: close each timestamp once every symbol's bar is in (no-op after a batch)
+    dispatcher.add_step_hook(rebalancer.on_step)
+    dispatcher.run(data)
+    return pd.DataFrame(portfolio.equity_curve), portfolio.fill_count, rebalancer
+
+
+def close_returns(symbols, data_dir=DATA_DIR) -> pd.DataFrame:
+    """Close-to-close returns on the union of timestamps, prices carried forward like the event loop."""
+    closes = pd.DataFrame({s: load_bars(s, data_dir=data_dir)["close"] for s in symbols}).sort_index().ffill()
+    return closes.pct_change().iloc[1:]
+
+
+def main(rebalance_every: int, halflife: float, window: int, history_out: str, n_workers: int):
+    symbols = SYMBOLS
+    halflife = None if window else halflife
+    if history_out:
+        rets = close_returns(symbols)
+        hist = hrp_weight_history(rets, rebalance_every=rebalance_every, halflife=halflife, window=window,
+                                  min_obs=rebalance_every, n_workers=n_workers)
+        hist.to_csv(history_out)
+        print(f"{len(hist)} rebalance weight vectors written to {history_out}")
+        return
+
+    equity_df, fill_count, rebalancer = run_hrp_backtest(symbols, rebalance_every=rebalance_every,
+                                                         halflife=halflife, window=window,
+                                                         min_obs=rebalance_every)
+    print(f"Rebalances: {len(rebalancer.weight_history)}, fills: {fill_count}")
+    if fill_count == 0:
+        print("No trades were executed. Cannot calculate KPIs.")
+        return
+    kpis = summarize_performance(equity_df, rf_rate=0.0, periods_per_year=252 * 390)
+    print("\n--- HRP Rebalance Results ---")
+    for key, value in kpis.items():
+        if isinstance(value, float):
+            print(f"{key:<20}: {value:.4f}")
+        else:
+            print(f"{key:<20}: {value}")
+    print("-----------------------------")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rebalance-every", type=int, default=390, help="bars between rebalances")
+    ap.add_argument("--halflife", type=float, default=390.0, help="EWM covariance halflife in bars")
+    ap.add_argument("--window", type=int, default=None, help="fixed covariance window in bars (overrides --halflife)")
+    ap.add_argument("--history-out", default=None, help="write the batch weight history to this CSV instead")
+    ap.add_argument("--workers", type=int, default=1, help="processes for the batch weight history")
+    args = ap.parse_args()
+    main(args.rebalance_every, args.halflife, args.window, args.history_out, args.workers)
@@ -0,0 +1,81 @@
+# run_live_paper.py
+"""
+Paper-trades the dual-proba strategy against a local replay of the bar data through the
+asyncio runtime in core/live.py, then prints latency statistics and KPIs.
+
+    python run_live_paper.py --speed 600          # 10 minutes of bars per second
+    python run_live_paper.py --speed 0 --max-lag-ms 5
+"""
+import argparse
+import asyncio
+import os
+import pandas as pd
+
+from core.bar_store import BarStore
+from core.commission import FixedPercentageCommission
+from core.event_queue import FastEventQueue
+from core.execution import SimulatedExecutionHandler
+from core.live import ReplayServer, run_paper
+from core.metrics import summarize_performance
+from core.order_sizer import FixedSizeOrderSizer
+from core.portfolio import Portfolio
+from core.slippage import FixedBasisPointsSlippage
+from core.strategies.ml_dual_proba_strategy import MLDualProbaStrategy
+from run_loop_ml import SYMBOLS, DATA_DIR, load_signal_inputs
+
+
+def make_replay_server(symbols, data_dir=DATA_DIR, speed=None, **kwargs) -> ReplayServer:
+    store_dir = os.path.join(data_dir, "bars")
+    if all(os.path.exists(os.path.join(store_dir, f"{s}.bars")) for s in symbols):
+        return ReplayServer.from_bar_store(BarStore(store_dir), symbols, speed=speed, **kwargs)
+    return ReplayServer.from_csvs({s: os.path.join(data_dir, f"{s}_1min.csv") for s in symbols}, speed=speed, **kwargs)
+
+
+def run_live_paper(symbols, pfeeds, thr_up, thr_dn, quantity=10, slippage_bps=5.0, commission_pct=0.001,
+                   initial_cash=100_000.0, data_dir=DATA_DIR, speed=None, max_lag_ms=None,
+                   inference_in_thread=False, max_queue=256):
+    """Returns (equity curve DataFrame, number of fills, LiveRuntime)."""
+    portfolio = Portfolio(initial_cash=initial_cash)
+    runtime = asyncio.run(run_paper(
+        make_replay_server(symbols, data_dir, speed),
+        strategy=MLDualProbaStrategy(symbol_to_df=pfeeds, thr_up=thr_up, thr_dn=thr_dn),
+        sizer=FixedSizeOrderSizer(quantity=quantity),
+        execution=SimulatedExecutionHandler(
+            event_queue=FastEventQueue(),
+            commission_model=FixedPercentageCommission(commission_pct),
+            slippage_model=FixedBasisPointsSlippage(slippage_bps),
+        ),
+        portfolio=portfolio,
+        max_queue=max_queue,
+        max_lag_ms=max_lag_ms,
+        inference_in_thread=inference_in_thread,
+    ))
+    return pd.DataFrame(portfolio.equity_curve), portfolio.fill_count, runtime
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--speed", type=float, default=600.0, help="replay speed vs real time; 0 = as fast as possible")
+    ap.add_argument("--max-lag-ms", type=float, default=None, help="skip trading on bars older than this")
+    ap.add_argument("--inference-in-thread", action="store_true")
+    args = ap.parse_args()
+
+    pfeeds, thr_up, thr_dn = load_signal_inputs(SYMBOLS)
+    print(f"Replaying {SYMBOLS} at speed {args.speed or 'max'}...")
+    equity_df, fill_count, runtime = run_live_paper(
+        SYMBOLS, pfeeds, thr_up, thr_dn, speed=args.speed or None,
+        max_lag_ms=args.max_lag_ms, inference_in_thread=args.inference_in_thread,
+    )
+    runtime.print_stats()
+    if fill_count == 0:
+        print("No trades were executed. Cannot calculate KPIs.")
+        return
+    kpis = summarize_performance(equity_df, rf_rate=0.0, periods_per_year=252 * 390)
+    print("\n--- Paper Trading Results ---")
+    for key, value in kpis.items():
+        print(f"{key:<20}: {value:.4f}" if isinstance(value, float) else f"{key:<20}: {value}")
+    print("-----------------------------")
+
+
+if __name__ == "__main__":
+    main()
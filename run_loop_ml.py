@@ -1,79 +1,141 @@
 # run_loop_ml.py (Final Version)
+import argparse
 import os
 import pandas as pd
-from core.event_queue import EventQueue
-from core.data import CSVDataHandler
+from core.event_queue import FastEventQueue
+from core.data import ColumnarDataHandler
+from core.bar_store import BarStore, load_bars
 from core.order_sizer import FixedSizeOrderSizer
-from core.execution import SimulatedExecutionHandler
+from core.execution import SimulatedExecutionHandler, NettingExecutionHandler
 from core.commission import FixedPercentageCommission
 from core.slippage import FixedBasisPointsSlippage
-from core.events import MarketEvent, OrderEvent, FillEvent
-from core.portfolio import Portfolio
+from core.events import MarketEvent, MarketBatchEvent, SignalEvent, OrderEvent, FillEvent
+from core.dispatcher import EventDispatcher
+from core.portfolio import Portfolio, ArrayPortfolio
 from core.metrics import summarize_performance
+from core.ledger import TradeLedger
+from core.vectorized import align_panel, align_probas, run_vectorized_backtest
 # --- CHANGE 1: Import the correct dual-sided strategy ---
 from core.strategies.ml_dual_proba_strategy import MLDualProbaStrategy
 
-def main():
-    eq = EventQueue()
-    symbols = ["AAPL", "MSFT"]
-    data = CSVDataHandler(
-        event_queue=eq,
-        symbol_to_csv={s: f"data/{s}_1min.csv" for s in symbols},
-        datetime_col="datetime",
-    )
+SYMBOLS = ["AAPL", "MSFT"]
+DATA_DIR = "data"
+ARTIFACTS_DIR = "artifacts"
 
+
+def load_signal_inputs(symbols, artifacts_dir=ARTIFACTS_DIR):
+    """Out-of-sample dual probabilities and per-side thresholds written by ml_train_dual.py."""
     # --- CHANGE 2: Load the dual-sided probability and threshold files ---
     # Load the out-of-sample probabilities for both up and down sides
     pfeeds = {
-        s: pd.read_csv(f"artifacts/{s}_oos_dual.csv", parse_dates=["timestamp"]).set_index("timestamp")
+        s: pd.read_csv(os.path.join(artifacts_dir, f"{s}_oos_dual.csv"), parse_dates=["timestamp"]).set_index("timestamp")
         for s in symbols
     }
     # Load the separate thresholds for up and down signals
-    thr_up = {s: float(open(f"artifacts/{s}_thr_up.txt").read().strip()) for s in symbols}
-    thr_dn = {s: float(open(f"artifacts/{s}_thr_dn.txt").read().strip()) for s in symbols}
+    thr_up = {s: float(open(os.path.join(artifacts_dir, f"{s}_thr_up.txt")).read().strip()) for s in symbols}
+    thr_dn = {s: float(open(os.path.join(artifacts_dir, f"{s}_thr_dn.txt")).read().strip()) for s in symbols}
+    return pfeeds, thr_up, thr_dn
+
+
+def make_data_handler(eq, symbols, data_dir=DATA_DIR, batch=False):
+    store_dir = os.path.join(data_dir, "bars")
+    if all(os.path.exists(os.path.join(store_dir, f"{s}.bars")) for s in symbols):
+        return ColumnarDataHandler.from_bar_store(eq, BarStore(store_dir), symbols, batch=batch)
+    return ColumnarDataHandler(
+        event_queue=eq,
+        symbol_to_csv={s: os.path.join(data_dir, f"{s}_1min.csv") for s in symbols},
+        datetime_col="datetime",
+        batch=batch,
+    )
+
+
+def run_event_backtest(symbols, pfeeds, thr_up, thr_dn, quantity=10, slippage_bps=5.0,
+                       commission_pct=0.001, initial_cash=100_000.0, data_dir=DATA_DIR, batch=False,
+                       profile=False, array_portfolio=False, ledger=None, slippage_model=None,
+                       net_orders=False):
+    """
+    Event-driven backtest; returns (equity curve DataFrame, number of fills).
+    batch=True streams one MarketBatchEvent per timestamp instead of one MarketEvent per symbol.
+    profile=True prints per-handler call counts and timings at the end.
+    array_portfolio=True books fills and marks in ArrayPortfolio instead of Portfolio.
+    A TradeLedger passed as `ledger` records every fill for round-trip analysis.
+    slippage_model overrides the flat slippage_bps (e.g. SquareRootImpactSlippage).
+    net_orders=True nets each timestamp's orders per symbol into one fill (NettingExecutionHandler).
+    """
+    eq = FastEventQueue()
+    data = make_data_handler(eq, symbols, data_dir, batch=batch)
 
     # --- CHANGE 3: Instantiate the correct strategy with the new arguments ---
     strategy = MLDualProbaStrategy(symbol_to_df=pfeeds, thr_up=thr_up, thr_dn=thr_dn)
-    
-    sizer = FixedSizeOrderSizer(quantity=10)
-    exec_handler = SimulatedExecutionHandler(
+
+    sizer = FixedSizeOrderSizer(quantity=quantity)
+    exec_cls = NettingExecutionHandler if net_orders else SimulatedExecutionHandler
+    exec_handler = exec_cls(
         event_queue=eq,
-        commission_model=FixedPercentageCommission(0.001),
-        slippage_model=FixedBasisPointsSlippage(5.0)
+        commission_model=FixedPercentageCommission(commission_pct),
+        slippage_model=slippage_model or FixedBasisPointsSlippage(slippage_bps)
     )
-    portfolio = Portfolio(initial_cash=100_000.0)
+    if array_portfolio:
+        portfolio = ArrayPortfolio(initial_cash=initial_cash, symbols=symbols)
+    else:
+        portfolio = Portfolio(initial_cash=initial_cash)
 
-    print("Starting backtest loop...")
-    while data.has_data():
-        data.update_bars()
-        while not eq.empty():
-            evt = eq.get()
+    # Market data -> portfolio mark, execution cache, strategy; signals -> sizer -> orders -> fills
+    dispatcher = EventDispatcher(eq, instrument=profile)
+    dispatcher.subscribe(MarketEvent, portfolio.on_market, "Portfolio.on_market")
+    dispatcher.subscribe(MarketEvent, exec_handler.on_market, "Execution.on_market")
+    dispatcher.subscribe(MarketEvent, strategy.on_market, "Strategy.on_market")
+    dispatcher.subscribe(MarketBatchEvent, portfolio.on_market_batch, "Portfolio.on_market_batch")
+    dispatcher.subscribe(MarketBatchEvent, exec_handler.on_market_batch, "Execution.on_market_batch")
+    dispatcher.subscribe(MarketBatchEvent, strategy.on_market_batch, "Strategy.on_market_batch")
+    dispatcher.subscribe(SignalEvent, lambda sig: sizer.on_signals([sig]), "Sizer.on_signals")
+    dispatcher.subscribe(OrderEvent, exec_handler.on_order, "Execution.on_order")
+    dispatcher.subscribe(FillEvent, portfolio.on_fill, "Portfolio.on_fill")
+    if net_orders:
+        dispatcher.add_step_hook(exec_handler.flush)
+    if ledger is not None:
+        dispatcher.subscribe(FillEvent, ledger.on_fill, "TradeLedger.on_fill")
+    dispatcher.run(data)
 
-            if isinstance(evt, MarketEvent):
-                portfolio.on_market(evt)
-                exec_handler.on_market(evt)
-                signals = strategy.on_market(evt)
-                if signals:
-                    orders = sizer.on_signals(signals)
-                    for o in orders:
-                        eq.put(o)
+    if profile:
+        dispatcher.print_summary()
+    return pd.DataFrame(portfolio.equity_curve), portfolio.fill_count
 
-            elif isinstance(evt, OrderEvent):
-                exec_handler.on_order(evt)
 
-            elif isinstance(evt, FillEvent):
-                portfolio.on_fill(evt)
+def run_vectorized(symbols, pfeeds, thr_up, thr_dn, quantity=10, slippage_bps=5.0,
+                   commission_pct=0.001, initial_cash=100_000.0, data_dir=DATA_DIR, slippage_model=None):
+    """Whole-array backtest with the same fill semantics; returns (equity curve DataFrame, number of fills)."""
+    panel = align_panel({s: load_bars(s, data_dir=data_dir) for s in symbols})
+    proba_up, proba_dn = align_probas(pfeeds, panel)
+    res = run_vectorized_backtest(
+        panel, proba_up, proba_dn, thr_up, thr_dn,
+        quantity=quantity, slippage_bps=slippage_bps,
+        commission_pct=commission_pct, initial_cash=initial_cash,
+        slippage_cost=None if slippage_model is None else slippage_model.cost_array(panel, quantity),
+    )
+    return res.equity_curve, res.fill_count
+
+
+def main(vectorized: bool = False, profile: bool = False, trades_out: str = None):
+    symbols = SYMBOLS
+    pfeeds, thr_up, thr_dn = load_signal_inputs(symbols)
+
+    print("Starting backtest loop..." if not vectorized else "Starting vectorized backtest...")
+    ledger = None
+    if vectorized:
+        equity_df, fill_count = run_vectorized(symbols, pfeeds, thr_up, thr_dn)
+    else:
+        ledger = TradeLedger()
+        equity_df, fill_count = run_event_backtest(symbols, pfeeds, thr_up, thr_dn, profile=profile, ledger=ledger)
 
     print("Backtest complete. Calculating performance...")
-    equity_df = pd.DataFrame(portfolio.equity_curve)
-    
-    if portfolio.fill_count == 0:
+    if fill_count == 0:
         print("No trades were executed. Cannot calculate KPIs.")
         return
 
     # For minute bars in US equities: ~252 trading days * 390 minutes per day
     kpis = summarize_performance(equity_df, rf_rate=0.0, periods_per_year=252 * 390)
-    
+
     print("\n--- Backtest Results ---")
     for key, value in kpis.items():
         if isinstance(value, float):
@@ -82,6 +144,17 @@ def main():
             print(f"{key:<20}: {value}")
     print("------------------------")
 
+    if ledger is not None:
+        ledger.print_stats()
+        if trades_out:
+            ledger.save(trades_out)
+            print(f"Fills written to {trades_out}")
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--vectorized", action="store_true", help="run the whole-array engine instead of the event loop")
+    ap.add_argument("--profile", action="store_true", help="print per-handler timings of the event loop")
+    ap.add_argument("--trades-out", default=None, help="write the event loop's fills to this .npz file")
+    args = ap.parse_args()
+    main(vectorized=args.vectorized, profile=args.profile, trades_out=args.trades_out)
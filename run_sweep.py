@@ -0,0 +1,36 @@
+# run_sweep.py
+import argparse
+import numpy as np
+from core.bar_store import load_bars
+from core.sweep import config_grid, run_sweep
+from core.vectorized import align_panel, align_probas
+from run_loop_ml import SYMBOLS, load_signal_inputs
+
+# --- Sweep grid: every combination is one backtest ---
+GRID = dict(
+    thr_up=[None] + list(np.round(np.arange(0.20, 0.45, 0.05), 2)),   # None = trained thresholds
+    thr_dn=[None] + list(np.round(np.arange(0.00, 0.20, 0.05), 2)),
+    quantity=[10, 50],
+    slippage_bps=[0.0, 5.0, 10.0],
+    commission_pct=[0.0005, 0.001],
+)
+
+def main(out_csv: str, n_workers=None):
+    pfeeds, thr_up, thr_dn = load_signal_inputs(SYMBOLS)
+    # Load bars and probabilities once; workers see them through shared memory
+    panel = align_panel({s: load_bars(s, data_dir="data") for s in SYMBOLS})
+    proba_up, proba_dn = align_probas(pfeeds, panel)
+
+    configs = config_grid(**{k: [None if v is None else float(v) for v in vals] if k.startswith("thr") else vals
+                             for k, vals in GRID.items()})
+    results = run_sweep(panel, proba_up, proba_dn, configs, out_csv,
+                        thr_up=thr_up, thr_dn=thr_dn, n_workers=n_workers)
+    cols = ["thr_up", "thr_dn", "quantity", "slippage_bps", "commission_pct", "fill_count", "sharpe", "max_drawdown"]
+    print(results.sort_values("sharpe", ascending=False)[cols].head(10).to_string(index=False))
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--out", default="artifacts/sweep_results.csv")
+    ap.add_argument("--workers", type=int, default=None)
+    args = ap.parse_args()
+    main(args.out, args.workers)
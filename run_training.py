@@ -1,15 +1,47 @@
+import os
 import pandas as pd
+from core.bar_store import load_bars
+from core.feature_cache import FeatureCache
+from core.panel import BarPanel, compute_panel
 from ml_train_dual import train_dual_side
 
-# --- 1. Define Symbols and Load Data ---
-symbols = ["AAPL", "MSFT"]
-data = {s: pd.read_csv(f"data/{s}_1min.csv", parse_dates=["datetime"]).set_index("datetime") for s in symbols}
+# Panel mode computes every symbol's features and labels up front across this many processes
+# (bars and results travel through shared memory); 0 computes them per symbol through the cache
+PANEL_WORKERS = 0
+PROFIT_TAKE, STOP_LOSS, TMAX = 0.01, 0.01, 240
 
-# --- 2. Run Training for Each Symbol ---
-for symbol in symbols:
-    print(f"--- Training for {symbol} ---")
-    df = data[symbol]
-    train_dual_side(df, symbol=symbol)
-    print(f"--- Finished Training for {symbol} ---")
 
-print("All training complete. Artifacts saved to 'artifacts' directory.")
+def main():
+    # --- 1. Define Symbols and Load Data ---
+    symbols = ["AAPL", "MSFT"]
+    # Reads data/bars/{SYMBOL}.bars when the bar store has been built, else data/{SYMBOL}_1min.csv
+    data = {s: load_bars(s, data_dir="data") for s in symbols}
+
+    # Features and labels are cached per symbol and parameter set; unchanged bars are loaded from disk and
+    # appended bars only compute their own rows
+    cache = FeatureCache(os.path.join("artifacts", "cache"))
+
+    panel_features, panel_labels = None, None
+    if PANEL_WORKERS:
+        panel_features, panel_labels = compute_panel(BarPanel.from_frames(data), labels=(PROFIT_TAKE, STOP_LOSS, TMAX),
+                                                     n_workers=PANEL_WORKERS)
+
+    # --- 2. Run Training for Each Symbol ---
+    for symbol in symbols:
+        print(f"--- Training for {symbol} ---")
+        df = data[symbol]
+        if panel_features is not None:
+            train_dual_side(df, PROFIT_TAKE, STOP_LOSS, TMAX, symbol=symbol,
+                            features=panel_features.frame(symbol), labels=panel_labels[symbol])
+        else:
+            train_dual_side(df, PROFIT_TAKE, STOP_LOSS, TMAX, symbol=symbol, cache=cache)
+        print(f"--- Finished Training for {symbol} ---")
+    if panel_features is None:
+        print(f"Feature cache: {cache.stats()}")
+
+    print("All training complete. Artifacts saved to 'artifacts' directory.")
+
+
+# The guard keeps panel-mode worker processes from re-running the script
+if __name__ == "__main__":
+    main()